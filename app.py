@@ -1,31 +1,37 @@
 import os
+import time
+BOOT_T0 = time.perf_counter()
 import eventlet
 eventlet.monkey_patch(thread=False)
-import sys, json, logging, threading, time, requests, webbrowser
-import pandas as pd
-import numpy as np
+import sys, json, logging, threading, webbrowser, queue, math
 import pytz
+from eventlet.event import Event
 from flask import Flask, render_template, jsonify, request, send_file
-from flask_socketio import SocketIO
-from datetime import datetime
+from flask_socketio import SocketIO, join_room, leave_room
+from datetime import datetime, timedelta
 from pathlib import Path
 import warnings
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 # --- LICENSE & SECURITY ---
+license_checked = Event() # Sends True when the license is valid, False when expired
+
 def verify_license():
+    """Runs in the background at boot; the scanner waits on its verdict, page loads don't."""
+    import requests
     EXPIRY_DATE = datetime(2026, 1, 14)
     try:
         response = requests.get('http://worldtimeapi.org/api/timezone/Etc/UTC', timeout=5)
         current_date = datetime.fromisoformat(response.json()['datetime'][:10])
     except:
         current_date = datetime.now()
+    startup.mark('license_check')
     if current_date > EXPIRY_DATE:
         print("❌ LICENSE EXPIRED: Please contact developer.")
-        sys.exit()
-
-verify_license()
+        license_checked.send(False)
+        return
+    license_checked.send(True)
 
 # --- RESOURCE & DATA PATHS ---
 if getattr(sys, 'frozen', False):
@@ -53,51 +59,109 @@ def load_config():
     
     # We force the slash here to prevent "Endpoint Not Found"
     cfg["current_symbol"] = "BTC/USD" 
+    cfg.setdefault("watchlist", [cfg["current_symbol"]])
     return cfg
 
 CONFIG = load_config()
 
-from src.indicator_calculator import calculate_indicators
-from src.trade_executor import generate_prediction_and_risk
-from src.execution import ExecutionEngine
-from src.data_fetcher import fetch_market_data
+# pandas/numpy, the Alpaca SDK and the modules built on them are imported by
+# load_runtime() on a worker thread after boot, so they never delay the first page.
+from src.offload import Offloader
+from src.cluster import process_role, message_queue_url, make_interest
+from src.metrics import REGISTRY, PROFILER, GAUGES, SCAN_LAG, STARTUP_SECONDS, StartupTimer, timed
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("SNIPER")
 
-def init_log_file():
-    log_path = CONFIG_PATH.parent / "trade_log.csv"
-    if not log_path.exists():
-        with open(log_path, 'w') as f:
-            f.write("TIME,SYMBOL,TYPE,ENTRY,CURRENT,P/L %,STATUS\n")
-        logger.info(f"📝 Initialized new trade log at {log_path}")
-
-init_log_file()
+def init_journal():
+    """Opens the SQLite signal/fill/trade journal that replaces trade_log.csv."""
+    global journal
+    from src.journal import Journal
+    journal = Journal(CONFIG_PATH.parent / "journal.db", batch_size=CONFIG.get('journal_batch_size', 500))
+    logger.info(f"📝 Trade journal at {journal.path}")
 
 app = Flask(__name__, 
             template_folder=os.path.join(RESOURCE_DIR, 'templates'),
             static_folder=os.path.join(RESOURCE_DIR, 'static'))
 
+# --- PROCESS ROLE ---
+# With a message queue, one 'scanner' process publishes every emit through the
+# broker and any number of 'web' workers fan them out to their own clients.
+ROLE = process_role(CONFIG)
+MESSAGE_QUEUE = message_queue_url(CONFIG)
+interest = make_interest(CONFIG) # Cross-worker subscribed symbols, None without Redis
+
 socketio = SocketIO(app, 
                     async_mode='eventlet', 
                     cors_allowed_origins="*", 
+                    message_queue=MESSAGE_QUEUE,
                     ping_timeout=60, 
                     ping_interval=25)
 
 # --- GLOBAL STATE ---
-current_symbol = "BTC/USD"
+DEFAULT_SYMBOL = "BTC/USD"
 trader = None
 session_start_equity = 0.0
+indicator_engines = {} # symbol -> StreamingIndicators, updated bar-by-bar
+timeframe_series = {}  # symbol -> TimeframeSeries: 1m base bars and the 5m/15m/1h bars derived from them
+client_symbols = {}    # Socket.IO sid -> symbol that client is watching
+journal = None        # Journal: batched SQLite (WAL) history of signals, fills and closed trades
+notifier = None       # Notifier: background Telegram alerts for signals and fills, None when disabled
+history_cache = None  # HistoryCache: symbol -> pre-encoded 3d candle block, shared by all clients
+chart_history = None  # ChartHistory: downsampled range queries over cached 1m bars (scroll-back, /history)
+offloader = Offloader(max_in_flight=int(CONFIG.get('scan_workers', 4)))
 NY_TZ = pytz.timezone('America/New_York')
+STREAM_INTERVAL = "5m" # Bar size the streaming mode aggregates and evaluates
+STREAM_BAR = timedelta(minutes=5)
+STREAM_RESEED = timedelta(days=1) # Re-seed an engine once its VWAP / EMA start falls this far behind the fetch window
+BASE_INTERVAL = "1m"   # The one series fetched per symbol; every other timeframe is derived from it
+SIGNAL_PARAMS = {'htf_confirm': bool(CONFIG.get('htf_confirm', False))}
+SIGNAL_STRATEGY = CONFIG.get('strategy', 'fusion') # A name registered in src/strategy.py
+SCAN_PERIOD = 4 # Seconds between polling rounds
+
+startup = StartupTimer(BOOT_T0, gauge=STARTUP_SECONDS)
+runtime_loaded = Event() # Set once load_runtime() has imported the scanner stack
+
+if CONFIG.get('profiling_enabled'):
+    PROFILER.configure(enabled=True, sample_every=CONFIG.get('profiling_sample_every', 10))
+
+def load_runtime():
+    """Imports the heavy scanner stack; runs on a worker thread so the hub keeps serving."""
+    global history_cache, chart_history
+    import src.data_fetcher, src.execution, src.streaming_indicators, src.market_stream, src.trade_executor, src.timeframes
+    from src.history_cache import HistoryCache
+    from src.chart_history import ChartHistory, OVERLAYS
+    # The web role never scans, so nothing refreshes its entries: let them lapse with each bar
+    history_cache = HistoryCache(interval=STREAM_INTERVAL, overlays={'ema9': OVERLAYS['ema9']},
+                                 expire_every=STREAM_BAR.total_seconds() if ROLE == 'web' else None)
+    chart_history = ChartHistory(read_chart_bars)
+    init_journal()
+    init_notifier()
+
+def init_notifier():
+    """Background dispatcher for signal / fill alerts; only the process that scans and trades sends them."""
+    global notifier
+    if ROLE == 'web':
+        return
+    from src.notifier import make_notifier
+    notifier = make_notifier(CONFIG)
+    if notifier is not None:
+        logger.info(f"🔔 Notifications on: {', '.join(w.channel.name for w in notifier.workers)}")
 
 def init_trader():
     global trader, session_start_equity
     if CONFIG.get('alpaca_api_key'):
         try:
-            trader = ExecutionEngine(CONFIG)
-            account = trader.api.get_account()
-            session_start_equity = float(account.equity)
+            from src.execution import ExecutionEngine
+            trader = ExecutionEngine(CONFIG, journal=journal, notifier=notifier)
+            session_start_equity = trader.account.refresh().broker_equity
+            journal.seed_positions(trader.account.positions)
             logger.info(f"✅ Broker Synced. Starting Balance: ${session_start_equity}")
+            if CONFIG.get('trade_stream_enabled', True):
+                try:
+                    trader.start_trade_stream()
+                except Exception as e:
+                    logger.error(f"⚠️ Trade stream unavailable, using periodic account sync: {e}")
         except Exception as e:
             logger.error(f"❌ Broker Connection Failed: {e}")
 
@@ -108,95 +172,468 @@ def get_ny_timestamp(idx_name):
     utc_idx = idx_name.tz_localize(pytz.utc) if idx_name.tzinfo is None else idx_name
     return int(utc_idx.tz_convert(NY_TZ).timestamp())
 
+def normalize_symbol(symbol):
+    """'btc-usd' / 'BTCUSD' -> 'BTC/USD'; stocks pass through upper-cased."""
+    symbol = (symbol or DEFAULT_SYMBOL).upper().strip().replace('-', '')
+    if "USD" in symbol and "/" not in symbol:
+        symbol = symbol.replace("USD", "/USD")
+    return symbol
+
+def symbol_room(symbol):
+    return f"symbol:{symbol}"
+
+def active_symbols():
+    """Configured watchlist plus anything a connected client is looking at, without duplicates."""
+    watchlist = [normalize_symbol(s) for s in CONFIG.get('watchlist') or [DEFAULT_SYMBOL]]
+    watched = list(client_symbols.values())
+    if interest is not None:
+        try:
+            watched += interest.symbols() # Clients on the other web workers
+        except Exception as e:
+            logger.error(f"⚠️ Symbol interest lookup failed: {e}")
+    return list(dict.fromkeys(watchlist + watched))
+
+def ingest_base(symbol, df):
+    """Folds freshly fetched 1m bars into the symbol's multi-timeframe series."""
+    from src.timeframes import TimeframeSeries
+    series = timeframe_series.get(symbol)
+    if series is None:
+        series = timeframe_series.setdefault(symbol, TimeframeSeries())
+    with timed('resample'):
+        return series.update(df)
+
+def load_history(symbol):
+    """Worker-thread fetch + encode for a symbol the cache doesn't hold yet."""
+    from src.data_fetcher import fetch_market_data
+    df = fetch_market_data(symbol, CONFIG, period="7d", interval=BASE_INTERVAL)
+    return history_cache.update(symbol, ingest_base(symbol, df).frame(STREAM_INTERVAL))
+
 def send_historical_data(symbol, sid=None):
     try:
-        df = fetch_market_data(symbol, CONFIG, period="3d", interval="5m")
-        if not df.empty:
-            history = [{'time': get_ny_timestamp(idx), 'open': float(row['Open']), 'high': float(row['High']), 
-                        'low': float(row['Low']), 'close': float(row['Close'])} for idx, row in df.iterrows()]
-            socketio.emit('chart_history', {'symbol': symbol, 'candles': history}, to=sid)
+        # Only a page load that beats the boot warm-up waits here (green wait, hub stays free)
+        runtime_loaded.wait()
+        # Served from the shared cache; only a symbol nobody has loaded yet costs a fetch
+        payload = history_cache.get(symbol)
+        if payload is None:
+            payload = offloader.execute(load_history, symbol)
+        if payload:
+            socketio.emit('chart_history', payload, to=sid)
+            startup.mark('first_history')
     except Exception as e:
         logger.error(f"History Error: {e}")
 
-@socketio.on('connect')
-def handle_connect():
-    send_historical_data(current_symbol, request.sid)
+def read_chart_bars(symbol, since, until):
+    """1m bars for chart ranges: the bar store, with the history archive behind it for older ranges."""
+    import pandas as pd
+    from src.data_fetcher import get_bar_store
+    from src.history_archive import get_archive, default_archive_dir
+    store = get_bar_store(CONFIG)
+    if store is not None:
+        df = store.read(symbol, BASE_INTERVAL, since, until)
+    else:
+        series = timeframe_series.get(symbol)
+        base = series.base if series is not None else pd.DataFrame()
+        df = base[(base.index >= pd.Timestamp(since, unit='s', tz='UTC')) & (base.index < pd.Timestamp(until, unit='s', tz='UTC'))]
+    first = int(df.index[0].timestamp()) if not df.empty else until
+    if first > since and (CONFIG.get('archive_dir') or default_archive_dir().exists()):
+        older = get_archive(CONFIG).read(symbol, BASE_INTERVAL, pd.Timestamp(since, unit='s', tz='UTC'),
+                                         pd.Timestamp(first, unit='s', tz='UTC'))
+        if not older.empty:
+            df = pd.concat([older, df]) if not df.empty else older
+    return df
 
-def market_scanner():
-    global current_symbol, session_start_equity
-    logger.info("🚀 Background Scanner Started")
-    
+def history_window(data):
+    """Common argument handling for /history and the history_range event."""
+    runtime_loaded.wait()
+    symbol = normalize_symbol(data.get('symbol'))
+    overlays = data.get('overlays') or ('ema9',)
+    if isinstance(overlays, str):
+        overlays = tuple(o for o in overlays.split(',') if o)
+    with timed('chart_history'):
+        return offloader.execute(chart_history.window, symbol, data.get('start'), data.get('end'),
+                                 int(data.get('points') or 1000), data.get('bucket') or None, tuple(overlays))
+
+@socketio.on('history_range')
+def handle_history_range(data):
+    """Lazy scroll-back: an older page of candles + overlays for the requesting client only."""
+    from src.chart_history import encode_window
+    try:
+        socketio.emit('chart_history_page', encode_window(history_window(data or {})), to=request.sid)
+    except (ValueError, KeyError) as e:
+        socketio.emit('chart_history_error', {'error': str(e), 'status': 400}, to=request.sid)
+    except Exception as e:
+        logger.error(f"History Range Error: {e}")
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Moves this client to the room of the symbol it wants to watch."""
+    symbol = normalize_symbol((data or {}).get('symbol'))
+    previous = client_symbols.get(request.sid)
+    if previous and previous != symbol:
+        leave_room(symbol_room(previous))
+    client_symbols[request.sid] = symbol
+    join_room(symbol_room(symbol))
+    if interest is not None:
+        try:
+            interest.touch(symbol)
+        except Exception as e:
+            logger.error(f"⚠️ Symbol interest update failed: {e}")
+    send_historical_data(symbol, request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    client_symbols.pop(request.sid, None)
+
+def interest_heartbeat():
+    """Web workers keep their clients' symbols alive in the shared registry so the scanner covers them."""
     while True:
+        socketio.sleep(max(1, interest.ttl // 3))
         try:
-            live_profit = 0.0
-            if trader:
-                try:
-                    acc = trader.api.get_account()
-                    live_profit = float(acc.equity) - session_start_equity
-                except: pass
+            interest.touch(*set(client_symbols.values()))
+        except Exception as e:
+            logger.error(f"⚠️ Symbol interest heartbeat failed: {e}")
+
+def build_analysis(symbol, engine, live_profit, htf=None):
+    """Evaluates the symbol's indicator engine and returns (analysis payload, last candle)."""
+    from src.trade_executor import evaluate_latest_bar
+    last_row = engine.latest
+    with timed('signal'):
+        analysis = evaluate_latest_bar(last_row, engine.previous, engine.bars_seen, SIGNAL_PARAMS, htf, SIGNAL_STRATEGY)
+
+    clean_payload = {
+        'symbol': symbol,
+        'total_profit': round(float(live_profit), 2),
+        'signal': analysis.get('signal', 'HOLD'),
+        'regime': analysis.get('regime', 'RANGING'),
+        'confluence': analysis.get('confluence', 0),
+        'htf': {interval: ctx['trend'] for interval, ctx in (htf or {}).items()},
+        'entry_price': round(float(last_row['Close']), 2),
+        'sl_price': round(float(analysis.get('sl_price', 0)), 2),
+        'tp_price': round(float(analysis.get('tp_price', 0)), 2),
+        'adx': round(float(last_row['ADX']), 2),
+        'rsi': round(float(last_row['RSI']), 2),
+        'atr': round(float(last_row['ATR']), 2),
+        'dashboard': {
+            'Trend': 'BUY' if last_row['Fast_MA'] > last_row['Slow_MA'] else 'SELL',
+            'VWAP': 'BUY' if last_row['Close'] > last_row['VWAP'] else 'SELL',
+            'Bollinger': 'BUY' if last_row['Close'] <= last_row['BB_Lower'] else 'SELL' if last_row['Close'] >= last_row['BB_Upper'] else 'HOLD',
+            'MACD': 'BUY' if last_row['MACD_hist'] > 0 else 'SELL'
+        }
+    }
+    clean_payload = {k: (0.0 if isinstance(v, float) and (math.isnan(v) or math.isinf(v)) else v) for k, v in clean_payload.items()}
+    candle = {
+        'time': get_ny_timestamp(engine.last_timestamp),
+        'open': float(last_row['Open']), 'high': float(last_row['High']), 
+        'low': float(last_row['Low']), 'close': float(last_row['Close'])
+    }
+    return clean_payload, candle
+
+def indicator_engine(symbol, bars):
+    """
+    The symbol's streaming engine. VWAP and the EMA seeds accumulate from the
+    engine's first bar, so once that is STREAM_RESEED older than the fetched
+    window a fresh engine is seeded from `bars`, keeping live values within
+    a day's drift of calculate_indicators() on the same window (the backtester).
+    """
+    from src.streaming_indicators import StreamingIndicators
+    engine = indicator_engines.get(symbol)
+    if engine is None or (engine.first_timestamp is not None and not bars.empty
+                          and bars.index[0] - engine.first_timestamp > STREAM_RESEED):
+        engine = indicator_engines[symbol] = StreamingIndicators()
+    return engine
+
+def scan_symbol(symbol, df, live_profit):
+    """CPU-bound part of a tick; runs on a worker thread. `df` holds 1m base bars."""
+    series = ingest_base(symbol, df)
+    bars = series.frame(STREAM_INTERVAL)
+    with timed('history_encode'):
+        history_cache.update(symbol, bars)
+    # Only bars at/after the last one seen are folded into the running state
+    engine = indicator_engine(symbol, bars)
+    with timed('indicators'):
+        engine.update_from_frame(bars)
+        htf = series.context(params=SIGNAL_PARAMS)
+    return build_analysis(symbol, engine, live_profit, htf)
 
-            df = fetch_market_data(current_symbol, CONFIG, period="7d", interval="5m")
-            
+def scan_stream_updates(symbol, updates, live_profit):
+    """Worker-thread stage for streamed bar updates: apply each bar, then analyse once."""
+    from src.streaming_indicators import StreamingIndicators
+    from src.data_fetcher import fetch_market_data
+    engine = indicator_engines.setdefault(symbol, StreamingIndicators())
+    for bar, closed in updates:
+        last_ts = engine.last_timestamp
+        # Cold start, a gap in the stream, or a closed bar: repair from the REST/bar-store path
+        if closed or last_ts is None or bar['time'] - last_ts > STREAM_BAR:
+            df = fetch_market_data(symbol, CONFIG, period="7d", interval=BASE_INTERVAL)
             if not df.empty:
-                df = calculate_indicators(df)
-                analysis = generate_prediction_and_risk(df)
-                last_row = df.iloc[-1]
-                
-                clean_payload = {
-                    'symbol': current_symbol,
-                    'total_profit': round(float(live_profit), 2),
-                    'signal': analysis.get('signal', 'HOLD'),
-                    'regime': analysis.get('regime', 'RANGING'),
-                    'confluence': analysis.get('confluence', 0),
-                    'entry_price': round(float(last_row['Close']), 2),
-                    'sl_price': round(float(analysis.get('sl_price', 0)), 2),
-                    'tp_price': round(float(analysis.get('tp_price', 0)), 2),
-                    'adx': round(float(last_row.get('ADX', 0)), 2),
-                    'rsi': round(float(last_row.get('RSI', 0)), 2),
-                    'atr': round(float(last_row.get('ATR', 0)), 2),
-                    'dashboard': {
-                        'Trend': 'BUY' if last_row['Fast_MA'] > last_row['Slow_MA'] else 'SELL',
-                        'VWAP': 'BUY' if last_row['Close'] > last_row['VWAP'] else 'SELL',
-                        'Bollinger': 'BUY' if last_row['Close'] <= last_row['BB_Lower'] else 'SELL' if last_row['Close'] >= last_row['BB_Upper'] else 'HOLD',
-                        'MACD': 'BUY' if last_row['MACD_hist'] > 0 else 'SELL'
-                    }
-                }
-                clean_payload = {k: (0.0 if isinstance(v, float) and (pd.isna(v) or np.isinf(v)) else v) for k, v in clean_payload.items()}
-                socketio.emit('analysis_update', clean_payload)
-                socketio.emit('chart_update', {
-                    'time': get_ny_timestamp(last_row.name),
-                    'open': float(last_row['Open']), 'high': float(last_row['High']), 
-                    'low': float(last_row['Low']), 'close': float(last_row['Close'])
-                })
+                bars = ingest_base(symbol, df).frame(STREAM_INTERVAL)
+                history_cache.update(symbol, bars)
+                engine = indicator_engine(symbol, bars)
+                with timed('indicators'):
+                    engine.update_from_frame(bars[bars.index < bar['time']])
+        with timed('indicators'):
+            engine.update(bar['time'], bar['Open'], bar['High'], bar['Low'], bar['Close'], bar['Volume'])
+    series = timeframe_series.get(symbol)
+    htf = series.context(params=SIGNAL_PARAMS) if series is not None else None
+    return build_analysis(symbol, engine, live_profit, htf)
+
+def publish_analysis(symbol, clean_payload, candle):
+    """Runs back on the hub once scan_symbol() is done."""
+    if trader:
+        trader.mark(symbol, candle['close'])
+    room = symbol_room(symbol)
+    with timed('emit'):
+        socketio.emit('analysis_update', clean_payload, to=room)
+        socketio.emit('chart_update', candle, to=room)
+    if journal is not None:
+        journal.record_signal(symbol, clean_payload, candle['time'])
+    if notifier is not None:
+        notifier.signal(symbol, clean_payload, candle['time'])
+    if startup.mark('first_scan'):
+        logger.info("🏁 Startup timing:\n" + startup.report())
+
+def session_profit():
+    if trader:
+        try:
+            # Served from the in-memory account mirror, no broker round trip
+            return trader.account.equity - session_start_equity
+        except: pass
+    return 0.0
+
+def market_scanner(skip=()):
+    """Polling scanner; `skip` lists symbols a market stream already covers."""
+    from src.data_fetcher import fetch_many
+    logger.info("🚀 Background Scanner Started")
+    next_tick = time.monotonic()
+
+    while True:
+        # How late the hub woke us for this round; a busy hub shows up here first
+        SCAN_LAG.observe(max(0.0, time.monotonic() - next_tick), mode='poll')
+        try:
+            live_profit = session_profit()
+
+            # One fetch round for the whole watchlist; each symbol is analysed once per tick
+            # and pushed only to the clients subscribed to it. Fetching and the pandas work
+            # run on OS threads so heartbeats and page loads never wait behind them.
+            symbols = [s for s in active_symbols() if s not in skip]
+            if not symbols:
+                next_tick = time.monotonic() + SCAN_PERIOD
+                socketio.sleep(SCAN_PERIOD)
+                continue
+            with timed('fetch_round'):
+                # One 1m base series per symbol; 5m/15m/1h are derived from it in scan_symbol
+                frames = offloader.execute(fetch_many, symbols, CONFIG, period="7d", interval=BASE_INTERVAL)
+
+            for symbol in symbols:
+                df = frames.get(symbol)
+                if df is None or df.empty:
+                    continue
+                offloader.submit(symbol, scan_symbol, symbol, df, live_profit,
+                                 callback=lambda result, symbol=symbol: publish_analysis(symbol, *result))
         except Exception as e:
             logger.error(f"Scanner Logic Error: {e}")
-        socketio.sleep(4)
+        next_tick = time.monotonic() + SCAN_PERIOD
+        socketio.sleep(SCAN_PERIOD)
+
+def stream_scanner():
+    """
+    Push mode: trades are aggregated into bars in process and each symbol is
+    evaluated only when its bar changes. fetch_market_data stays as the
+    backfill and gap-repair path, and symbols outside the stream (clients
+    browsing something off the watchlist) keep being polled.
+    """
+    from src.market_stream import MarketStream, RecordedFeed, AlpacaTradeFeed
+    symbols = active_symbols()
+    events = queue.Queue(maxsize=10000)
+
+    def on_bar(symbol, interval, bar, closed):
+        try:
+            events.put_nowait((symbol, bar, closed, time.monotonic()))
+        except queue.Full:
+            pass # Only possible if workers fall far behind; a later update supersedes it
+
+    if CONFIG.get('stream_replay_file'):
+        feed = RecordedFeed(CONFIG['stream_replay_file'], speed=CONFIG.get('stream_replay_speed', 1))
+    else:
+        feed = AlpacaTradeFeed(CONFIG.get('alpaca_api_key'), CONFIG.get('alpaca_secret_key'), symbols)
+    MarketStream(feed, intervals=(STREAM_INTERVAL,), on_bar=on_bar).start()
+    socketio.start_background_task(market_scanner, skip=set(symbols))
+    logger.info(f"📡 Streaming {len(symbols)} symbol(s) in push mode.")
+
+    pending = {}
+    while True:
+        batch = []
+        try:
+            # Wait on a worker thread so the hub stays free, then drain whatever else queued up
+            batch.append(offloader.execute(events.get, True, 5))
+            while True:
+                batch.append(events.get_nowait())
+        except queue.Empty:
+            pass
+        except Exception as e:
+            logger.error(f"Stream Scanner Error: {e}")
+
+        now = time.monotonic()
+        GAUGES.set(events.qsize(), name='stream_queue')
+        for symbol, bar, closed, queued_at in batch:
+            SCAN_LAG.observe(now - queued_at, mode='stream')
+            pending.setdefault(symbol, []).append((bar, closed))
+
+        live_profit = session_profit()
+        for symbol in list(pending):
+            if symbol in offloader.busy:
+                continue # Keep buffering until its previous evaluation finishes
+            # Closed bars are kept; of the open-bar updates only the newest matters
+            updates = pending.pop(symbol)
+            updates = [u for i, u in enumerate(updates) if u[1] or i == len(updates) - 1]
+            offloader.submit(symbol, scan_stream_updates, symbol, updates, live_profit,
+                             callback=lambda result, symbol=symbol: publish_analysis(symbol, *result))
 
 @app.route('/')
 @app.route('/<symbol>')
-def index(symbol="BTC/USD"):
+def index(symbol=DEFAULT_SYMBOL):
     if "favicon" in symbol.lower(): return "", 204
-    global current_symbol
-    symbol = symbol.upper().replace('-', '')
-    if "USD" in symbol and "/" not in symbol:
-        symbol = symbol.replace("USD", "/USD")
-    current_symbol = symbol
-    return render_template('index.html', config=CONFIG, initial_symbol=current_symbol)
+    # The page subscribes to its symbol over Socket.IO; other clients are unaffected
+    startup.mark('first_page')
+    # Behind several workers there are no sticky sessions, so skip long-polling
+    transports = ['websocket'] if MESSAGE_QUEUE else None
+    return render_template('index.html', config=CONFIG, initial_symbol=normalize_symbol(symbol),
+                           socket_transports=transports)
+
+# --- JOURNAL ---
+def journal_query(method):
+    """Runs a Journal query off the hub with the request's symbol/start/end filters."""
+    runtime_loaded.wait()
+    args = request.args
+    symbol = normalize_symbol(args['symbol']) if args.get('symbol') else None
+    kwargs = {'symbol': symbol, 'start': args.get('start'), 'end': args.get('end')}
+    if method != 'signals':
+        kwargs['source'] = args.get('source', 'live')
+    if method == 'performance':
+        kwargs['starting_equity'] = float(args.get('starting_equity', session_start_equity))
+    else:
+        kwargs['limit'] = min(int(args.get('limit', 500)), 5000)
+    return jsonify(offloader.execute(getattr(journal, method), **kwargs))
+
+@app.route('/journal/performance')
+def journal_performance():
+    """P/L, win rate and drawdown of closed trades; ?symbol=&start=&end=&source=live|backtest"""
+    return journal_query('performance')
+
+@app.route('/journal/trades')
+def journal_trades():
+    return journal_query('trades')
+
+@app.route('/journal/signals')
+def journal_signals():
+    return journal_query('signals')
+
+# --- METRICS ---
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of stage latencies, fallbacks, errors and scan lag."""
+    GAUGES.set(len(client_symbols), name='clients')
+    GAUGES.set(len(offloader.busy), name='scans_in_flight')
+    GAUGES.set(len(indicator_engines), name='symbols_tracked')
+    return REGISTRY.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def profile_control_allowed():
+    """Switching the profiler on the live trading process: loopback callers, or the configured token."""
+    import hmac
+    if request.remote_addr in ('127.0.0.1', '::1'):
+        return True
+    token = CONFIG.get('profiling_token')
+    # Compared as bytes: compare_digest raises on non-ASCII str, which would turn a bad header into a 500
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Profile-Token', '').encode(), str(token).encode())
+
+@app.route('/metrics/profile', methods=['GET', 'POST'])
+def metrics_profile():
+    """
+    GET: merged cProfile report. POST {"enabled", "sample_every", "reset"}: switch the hook at runtime,
+    from localhost only unless the request carries config.json's profiling_token as X-Profile-Token.
+    """
+    if request.method == 'POST':
+        if not profile_control_allowed():
+            return jsonify({'error': 'profiling control is restricted to localhost'}), 403
+        body = request.get_json(silent=True) or {}
+        return jsonify(PROFILER.configure(body.get('enabled'), body.get('sample_every'), bool(body.get('reset'))))
+    report = PROFILER.report(sort=request.args.get('sort', 'cumulative'), limit=int(request.args.get('limit', 40)))
+    return report, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+@app.route('/metrics/startup')
+def metrics_startup():
+    """Seconds from process start to each boot milestone reached so far."""
+    return jsonify({phase: round(elapsed, 4) for phase, elapsed in startup.marks.items()})
+
+@app.route('/history')
+def history_range():
+    """?symbol=&start=&end=&points=&bucket=&overlays=ema9,sma50 -> downsampled candles and overlays."""
+    from src.chart_history import window_json
+    try:
+        return jsonify(window_json(history_window(request.args)))
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/risk')
+def risk_status():
+    """Pre-trade gate state: limits, today's P/L against the daily stop, recent decisions with check times."""
+    if not trader:
+        return jsonify({'error': 'trading disabled'}), 404
+    return jsonify(trader.risk.status())
 
 # --- STARTUP LOGIC ---
+def warm_start():
+    """
+    Boot work that used to block the import: the license check and the heavy
+    imports run alongside the web server, then the scanner starts as soon as
+    both are done instead of after a fixed settle delay.
+    """
+    startup.mark('app_imported')
+    eventlet.spawn_n(verify_license)
+    try:
+        offloader.execute(load_runtime)
+    except Exception as e:
+        logger.error(f"❌ Runtime Import Failed: {e}")
+        return
+    startup.mark('runtime_imported')
+    runtime_loaded.send()
+    if interest is not None and ROLE != 'scanner':
+        socketio.start_background_task(interest_heartbeat)
+    ensure_scanner()
+
 def start_scanner(app_context):
     with app_context:
-        logger.info("⏳ Waiting for server to settle...")
-        eventlet.sleep(8) # Increased to 8 for Render stability
-        init_trader() 
+        runtime_loaded.wait()
+        if not license_checked.wait():
+            return
+        init_trader()
+        startup.mark('broker_synced')
         logger.info("📡 Initializing Global Background Task...")
-        market_scanner()
+        if CONFIG.get('market_data_mode') == 'stream':
+            stream_scanner()
+        else:
+            market_scanner()
 
-@app.before_request
-def initialize_scanner():
+def ensure_scanner():
+    # Web workers never scan or trade; that is the scanner process's job
+    if ROLE == 'web':
+        return
     if not hasattr(app, 'scanner_started'):
         app.scanner_started = True
         socketio.start_background_task(start_scanner, app.app_context())
 
+@app.before_request
+def initialize_scanner():
+    if license_checked.ready() and not license_checked.wait():
+        return "❌ LICENSE EXPIRED: Please contact developer.", 403
+    ensure_scanner()
+
+# Runs as soon as the hub starts (gunicorn worker boot or socketio.run below)
+eventlet.spawn_n(warm_start)
+
 if __name__ == '__main__':
-    socketio.run(app, host='127.0.0.1', port=5001, debug=False)
+    if ROLE != 'all':
+        logger.info(f"🧩 Role: {ROLE} | Message queue: {MESSAGE_QUEUE or 'none'}")
+    # The scanner process still serves /metrics, on its own port
+    port = int(CONFIG.get('scanner_port', 5002)) if ROLE == 'scanner' else 5001
+    socketio.run(app, host='127.0.0.1', port=port, debug=False)
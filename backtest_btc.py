@@ -1,97 +1,82 @@
+import json
 import pandas as pd
 import numpy as np
-from src.data_fetcher import fetch_market_data
+from pathlib import Path
+from src.data_fetcher import fetch_market_data, fetch_many
 from src.indicator_calculator import calculate_indicators
-from src.trade_executor import generate_prediction_and_risk
+from src.backtest_engine import run_backtest
+from src.portfolio_backtest import run_portfolio_backtest
+from src.history_archive import bulk_load, get_archive
 
 pd.options.mode.chained_assignment = None 
 
 def run_10_day_test(symbol="BTC"):
     print(f"🔍 Fetching last 10 days of data for {symbol}...")
-    df = fetch_market_data(symbol, period="10d", interval="15m")
+    df = fetch_market_data(symbol, load_config(), period="10d", interval="15m")
     if df.empty: return
 
     df = calculate_indicators(df)
     
-    balance = 10000.0
-    position_type = None # None, 'LONG', or 'SHORT'
-    units = 0.0
-    locked_tp = 0.0
-    locked_sl = 0.0
-    trade_count = 0
-    wins = 0
-
-    print(f"🚀 Starting BI-DIRECTIONAL Backtest with ${balance}...")
+    starting_balance = 10000.0
+    print(f"🚀 Starting BI-DIRECTIONAL Backtest with ${starting_balance}...")
     print("-" * 60)
 
-    for i in range(35, len(df)):
-        current_data = df.iloc[:i+1]
-        analysis = generate_prediction_and_risk(current_data)
-        price = float(df.iloc[i]['Close'])
-        
-        # --- 1. ENTRY LOGIC ---
-        if position_type is None:
-            if analysis['signal'] == 'BUY':
-                position_type = 'LONG'
-                units = balance / price
-                locked_tp = analysis['tp_price']
-                locked_sl = analysis['sl_price']
-                balance = 0
-                trade_count += 1
-                print(f"🚀 LONG at ${price:.2f} | TP: {locked_tp:.2f} | SL: {locked_sl:.2f}")
-
-            elif analysis['signal'] == 'SELL':
-                position_type = 'SHORT'
-                units = balance / price
-                locked_tp = analysis['tp_price']
-                locked_sl = analysis['sl_price']
-                balance = 0
-                trade_count += 1
-                print(f"📉 SHORT at ${price:.2f} | TP: {locked_tp:.2f} | SL: {locked_sl:.2f}")
-
-        # --- 2. EXIT LOGIC (LONG) ---
-        elif position_type == 'LONG':
-            if price >= locked_tp:
-                balance = units * price
-                wins += 1
-                print(f"✅ TP LONG at ${price:.2f}")
-                position_type = None
-            elif price <= locked_sl:
-                balance = units * price
-                print(f"❌ SL LONG at ${price:.2f}")
-                position_type = None
+    # Signals for every bar are computed in one vectorized pass, then exits are simulated in one sweep
+    result = run_backtest(df, start=35, starting_balance=starting_balance)
+    for t in result['trades']:
+        if t['side'] == 'LONG':
+            print(f"🚀 LONG at ${t['entry_price']:.2f} | TP: {t['tp_price']:.2f} | SL: {t['sl_price']:.2f}")
+        else:
+            print(f"📉 SHORT at ${t['entry_price']:.2f} | TP: {t['tp_price']:.2f} | SL: {t['sl_price']:.2f}")
+        if t['outcome'] == 'TP':
+            print(f"✅ TP {t['side']} at ${t['exit_price']:.2f}")
+        elif t['outcome'] == 'SL':
+            print(f"❌ SL {t['side']} at ${t['exit_price']:.2f}")
 
-        # --- 3. EXIT LOGIC (SHORT) ---
-        elif position_type == 'SHORT':
-            # For Shorts, TP is BELOW entry and SL is ABOVE entry
-            if price <= locked_tp:
-                # Profit = (Entry - Exit) * units + Original Capital
-                # Simplest way: Entry Price + (Entry Price - Exit Price)
-                # But since we use 'units', it's:
-                profit = (units * locked_sl) - (units * price) # conceptual
-                balance = units * (analysis['entry_price'] + (analysis['entry_price'] - price))
-                balance = units * analysis['entry_price'] * (1 + (analysis['entry_price'] - price)/analysis['entry_price'])
-                # Standard PnL math for backtest:
-                entry_val = units * analysis['entry_price']
-                balance = entry_val + (entry_val - (units * price))
-                wins += 1
-                print(f"✅ TP SHORT at ${price:.2f}")
-                position_type = None
-            elif price >= locked_sl:
-                entry_val = units * analysis['entry_price']
-                balance = entry_val + (entry_val - (units * price))
-                print(f"❌ SL SHORT at ${price:.2f}")
-                position_type = None
-
-    final_value = balance if position_type is None else 10000 # fallback
-    total_profit = final_value - 10000
+    trade_count = result['trade_count']
+    wins = result['wins']
+    total_profit = result['final_balance'] - starting_balance
     
     print("-" * 60)
     print(f"📊 FINAL RESULTS FOR {symbol}")
     print(f"Total Trades: {trade_count}")
     if trade_count > 0:
         print(f"Win Rate: {(wins/trade_count)*100:.1f}%")
-        print(f"Total Profit/Loss: ${total_profit:.2f} ({ (total_profit/10000)*100:.2f}%)")
+        print(f"Total Profit/Loss: ${total_profit:.2f} ({ (total_profit/starting_balance)*100:.2f}%)")
+
+def load_config():
+    path = Path(__file__).parent / "config.json"
+    return json.loads(path.read_text()) if path.exists() else {}
+
+def run_portfolio_test(symbols=None, period="60d", interval="15m", starting_balance=10000.0):
+    """Whole watchlist as one account, sized like ExecutionEngine (risk_settings.risk_per_trade_percent)."""
+    config = load_config()
+    symbols = symbols or config.get('watchlist', [])
+    print(f"🔍 Fetching {period} of {interval} bars for {len(symbols)} symbols...")
+    frames = fetch_many(symbols, config, period=period, interval=interval)
+    risk_pct = (config.get('risk_settings') or {}).get('risk_per_trade_percent', 0.01)
+
+    result = run_portfolio_backtest(frames, starting_balance=starting_balance, risk_pct=risk_pct)
+    print("-" * 60)
+    for symbol, stats in sorted(result['per_symbol'].items(), key=lambda kv: -kv[1]['pnl']):
+        print(f"{symbol:<10} trades: {stats['trades']:<5} wins: {stats['wins']:<5} P/L: ${stats['pnl']:.2f}")
+    print("-" * 60)
+    print(f"📊 PORTFOLIO: {result['trade_count']} trades | Return: {result['return_pct']:.2f}% | "
+          f"Max DD: {result['max_drawdown_pct']:.2f}% | Peak gross exposure: ${result['max_gross_exposure']:.2f}")
+    return result
+
+def run_archive_test(symbols=None, start="2024-01-01", end=None, interval="15m", starting_balance=10000.0):
+    """Portfolio backtest over archived history: fills the archive (resumably), then opens just [start, end)."""
+    config = load_config()
+    symbols = symbols or config.get('watchlist', [])
+    bulk_load(symbols, config, interval=interval, start=start, end=end)
+    archive = get_archive(config)
+    frames = {symbol: archive.read(symbol, interval, start, end) for symbol in symbols}
+    risk_pct = (config.get('risk_settings') or {}).get('risk_per_trade_percent', 0.01)
+    result = run_portfolio_backtest(frames, starting_balance=starting_balance, risk_pct=risk_pct)
+    print(f"📊 ARCHIVE {start}..{end or 'now'}: {result['trade_count']} trades | Return: {result['return_pct']:.2f}% | "
+          f"Max DD: {result['max_drawdown_pct']:.2f}%")
+    return result
 
 if __name__ == "__main__":
     run_10_day_test("TSLA") # Let's try Tesla!
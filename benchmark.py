@@ -0,0 +1,181 @@
+"""
+Hot-path benchmarks on seeded synthetic bars.
+
+    python benchmark.py --sizes 1k,10k,100k,1m --out bench.json
+    python benchmark.py --out new.json --compare bench.json --threshold 0.15
+
+Results are written as JSON (one record per case/kind/size). With --compare,
+every case whose best-of-N time got slower than the baseline by more than
+--threshold is reported and the exit code is 1, so CI can gate on it.
+Best-of-N is compared rather than the median because it is the least
+sensitive to a noisy machine.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from src.synthetic_data import SERIES_KINDS, generate_ohlcv, yahoo_chart_payload
+from src.indicator_calculator import calculate_indicators
+from src.streaming_indicators import StreamingIndicators
+from src.trade_executor import generate_prediction_and_risk
+from src.backtest_engine import run_backtest
+from src.history_cache import encode_candles
+from src.data_fetcher import _parse_yahoo_chart
+from src.strategy import FUSION_ENGINE
+
+pd.options.mode.chained_assignment = None
+
+DEFAULT_SIZES = "1k,10k,100k"
+PANEL_SYMBOLS = 10  # strategy_panel evaluates this many symbols x bars in one call
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+# --- CASES ---
+# Each case: (name, prepare(df) -> args, run(*args), max bars or None).
+# prepare() runs once outside the timer; run() is what gets timed.
+def _prep_raw(df):
+    return (df,)
+
+def _prep_indicators(df):
+    return (calculate_indicators(df),)
+
+def _prep_payload(df):
+    return (yahoo_chart_payload(df),)
+
+def _run_streaming(df):
+    engine = StreamingIndicators()
+    engine.update_from_frame(df)
+
+def _prep_panel(df):
+    ind = calculate_indicators(df)
+    compiled = FUSION_ENGINE.compile()
+    return compiled, {c: np.tile(ind[c].to_numpy(dtype=float), (PANEL_SYMBOLS, 1)) for c in compiled.columns}
+
+CASES = [
+    ('calculate_indicators', _prep_raw, calculate_indicators, None),
+    ('generate_prediction_and_risk', _prep_indicators, generate_prediction_and_risk, None),
+    ('streaming_indicators', _prep_raw, _run_streaming, 50_000),  # pure-Python per bar
+    ('yahoo_parse', _prep_payload, _parse_yahoo_chart, None),
+    ('history_encode', _prep_raw, lambda df: encode_candles('BENCH', df), None),
+    ('backtest', _prep_indicators, run_backtest, None),
+    ('strategy_panel', _prep_panel, lambda compiled, panel: compiled.evaluate(panel), 100_000),
+]
+
+
+def time_case(run, args, repeat):
+    run(*args)  # Warm-up: imports, caches, allocator
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(sizes, kinds, cases, repeat, seed):
+    results = []
+    for size in sizes:
+        for kind in kinds:
+            df = generate_ohlcv(size, kind=kind, seed=seed)
+            for name, prepare, run, max_bars in CASES:
+                if cases and name not in cases:
+                    continue
+                if max_bars and size > max_bars:
+                    continue
+                args = prepare(df)
+                # Big inputs get fewer repeats so a 1M run stays in minutes
+                reps = max(1, repeat if size <= 100_000 else min(repeat, 3))
+                samples = time_case(run, args, reps)
+                median = statistics.median(samples)
+                record = {
+                    'case': name, 'kind': kind, 'size': size, 'repeat': reps,
+                    'best': min(samples), 'median': median, 'mean': statistics.fmean(samples),
+                    'ns_per_bar': median / size * 1e9,
+                }
+                results.append(record)
+                print(f"⏱️  {name:<30} {kind:<9} {size:>9,} bars  median {median * 1e3:10.3f} ms  ({record['ns_per_bar']:9.1f} ns/bar)")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Returns [(record, baseline_record, ratio)] for cases slower than baseline by > threshold."""
+    previous = {(r['case'], r['kind'], r['size']): r for r in baseline['results']}
+    regressions = []
+    print("\n📊 Comparison vs baseline" + (f" ({baseline.get('git')})" if baseline.get('git') else ""))
+    for record in current['results']:
+        old = previous.get((record['case'], record['kind'], record['size']))
+        if old is None:
+            continue
+        ratio = record['best'] / old['best'] if old['best'] > 0 else float('inf')
+        flag = "❌ REGRESSION" if ratio > 1 + threshold else ("✅ faster" if ratio < 1 - threshold else "")
+        print(f"   {record['case']:<30} {record['kind']:<9} {record['size']:>9,}  x{ratio:6.2f}  {flag}")
+        if ratio > 1 + threshold:
+            regressions.append((record, old, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the indicator, signal, parse, encode and backtest hot paths.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated bar counts, e.g. 1k,10k,100k,1m")
+    parser.add_argument('--kinds', default=','.join(SERIES_KINDS), help="Series shapes: trending,ranging,gappy")
+    parser.add_argument('--cases', default='', help="Only run these case names (comma-separated)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--out', help="Write results JSON here")
+    parser.add_argument('--compare', help="Baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed best-time slowdown before flagging (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    kinds = [k.strip() for k in args.kinds.split(',') if k.strip()]
+    cases = {c.strip() for c in args.cases.split(',') if c.strip()}
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': f"{platform.system()} {platform.machine()}",
+        'seed': args.seed,
+        'results': run_suite(sizes, kinds, cases, args.repeat, args.seed),
+    }
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+            return 1
+        print("\n✅ No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import time
+import logging
+import threading
+from src.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+FILL_EVENTS = ('fill', 'partial_fill')
+
+
+def _key(symbol):
+    """Alpaca reports crypto positions as 'BTCUSD' but orders as 'BTC/USD'."""
+    return (symbol or '').upper().replace('/', '')
+
+
+class AccountMirror:
+    """
+    In-process copy of the broker account and open positions.
+
+    Reads (equity, buying power, positions) are served from memory. The
+    mirror re-syncs with get_account()/list_positions() every `ttl` seconds
+    in a background thread, and between syncs it applies fills from the
+    trade-updates stream and marks positions to the scanner's latest prices.
+    Only the very first read blocks on the broker.
+    """
+
+    def __init__(self, api, ttl=15.0):
+        self.api = api
+        self.ttl = float(ttl)
+        self.cash = 0.0
+        self.buying_power = 0.0
+        self.broker_equity = 0.0
+        self.last_equity = 0.0  # Broker equity at the previous close; the risk gate's day start
+        self.positions = {}   # key -> {'symbol', 'qty', 'avg_entry_price', 'price'}
+        self.last_sync = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    # --- BROKER SYNC ---
+    def refresh(self):
+        """Blocking re-sync from the REST API."""
+        with timed('broker_account'):
+            account = self.api.get_account()
+            positions = self.api.list_positions()
+        with self._lock:
+            self.cash = float(account.cash)
+            self.buying_power = float(account.non_marginable_buying_power)
+            self.broker_equity = float(account.equity)
+            self.last_equity = float(getattr(account, 'last_equity', 0) or 0)
+            previous = self.positions
+            self.positions = {}
+            for p in positions:
+                key = _key(p.symbol)
+                # The broker's mark wins; the last local mark only fills in when it has none
+                price = float(p.current_price or 0) or previous.get(key, {}).get('price') or 0.0
+                self.positions[key] = {'symbol': p.symbol, 'qty': float(p.qty),
+                                       'avg_entry_price': float(p.avg_entry_price), 'price': price}
+            self.last_sync = time.time()
+        return self
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"❌ Account Sync Failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        if self.last_sync == 0.0:
+            self.refresh()
+        elif time.time() - self.last_sync > self.ttl and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    # --- LOCAL UPDATES ---
+    def mark(self, symbol, price):
+        """Records the latest traded price for P/L of an open position."""
+        with self._lock:
+            position = self.positions.get(_key(symbol))
+            if position is not None:
+                position['price'] = float(price)
+
+    def apply_fill(self, symbol, side, qty, price, position_qty=None):
+        """Applies one fill to cash and the position without a broker round trip."""
+        qty, price = float(qty), float(price)
+        signed = qty if side == 'buy' else -qty
+        with self._lock:
+            self.cash -= signed * price
+            self.buying_power -= signed * price
+            key = _key(symbol)
+            position = self.positions.setdefault(key, {'symbol': symbol, 'qty': 0.0, 'avg_entry_price': price, 'price': price})
+            held = position['qty']
+            new_qty = float(position_qty) if position_qty is not None else held + signed
+            if held and new_qty and (new_qty > 0) != (held > 0):
+                # Flipped (long -> short or back): the remainder was opened at this fill
+                position['avg_entry_price'] = price
+            elif new_qty and abs(new_qty) > abs(held):
+                # Adding to the position: blend the average entry
+                position['avg_entry_price'] = (position['avg_entry_price'] * held + price * (new_qty - held)) / new_qty
+            position['qty'] = new_qty
+            position['price'] = price
+            if not new_qty:
+                del self.positions[key]
+
+    async def on_trade_update(self, data):
+        """Handler for Stream.subscribe_trade_updates()."""
+        try:
+            if data.event not in FILL_EVENTS:
+                return
+            order = data.order
+            # partial fills report the cumulative order qty; use the per-event qty when given
+            qty = getattr(data, 'qty', None) or order.get('filled_qty')
+            self.apply_fill(order['symbol'], order['side'], qty, data.price, getattr(data, 'position_qty', None))
+        except Exception as e:
+            logger.error(f"Trade Update Error: {e}")
+
+    def attach_stream(self, stream):
+        """Subscribes to `stream`'s trade updates and runs it on a daemon thread."""
+        stream.subscribe_trade_updates(self.on_trade_update)
+        threading.Thread(target=stream.run, daemon=True, name="trade-updates").start()
+        logger.info("📡 Account mirror listening to trade updates.")
+
+    # --- READS (memory only after the first sync) ---
+    @property
+    def equity(self):
+        self._ensure_fresh()
+        with self._lock:
+            return self.cash + sum(p['qty'] * p['price'] for p in self.positions.values())
+
+    @property
+    def available_cash(self):
+        self._ensure_fresh()
+        return self.buying_power
+
+    def position(self, symbol):
+        self._ensure_fresh()
+        with self._lock:
+            position = self.positions.get(_key(symbol))
+            return dict(position) if position else None
@@ -0,0 +1,123 @@
+import logging
+import numpy as np
+import pandas as pd
+from src.strategy import BUY, HOLD, SELL, SIGNAL_NAMES, FUSION_ENGINE, get_strategy
+
+logger = logging.getLogger(__name__)
+
+MIN_BARS = FUSION_ENGINE.min_bars              # generate_prediction_and_risk needs 50 bars to stabilize
+TOTAL_POSSIBLE = FUSION_ENGINE.total_possible  # Confluence denominator used by the Fusion Engine
+
+
+def _col(df, name):
+    """Column as float array, defaulting to 0 like latest.get(name, 0)."""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=float)
+    return np.zeros(len(df))
+
+
+def compute_signals(df: pd.DataFrame, params=None, strategy=None) -> pd.DataFrame:
+    """
+    Evaluates the Fusion Engine for every bar at once.
+
+    Row i holds exactly what generate_prediction_and_risk(df.iloc[:i+1])
+    returns for signal, regime and confluence, plus the SL/TP it would set.
+    `df` must already carry calculate_indicators() columns; `params`
+    overrides DEFAULT_PARAMS the same way it does for the scalar engine.
+    `strategy` picks another registered Strategy (default: the Fusion Engine).
+    """
+    compiled = get_strategy(strategy).compile(params)
+    cols = {name: _col(df, name) for name in df.columns if pd.api.types.is_numeric_dtype(df[name])}
+    cols['Close'] = _col(df, 'Close')
+    out = compiled.evaluate(cols)
+    entry_price, sl_price, tp_price = compiled.risk_levels(out['signal'], cols['Close'], _col(df, 'ATR'))
+
+    return pd.DataFrame({
+        'signal': out['signal'], 'regime': out['regime'], 'confluence': out['confluence'].astype(int),
+        'entry_price': entry_price, 'sl_price': sl_price, 'tp_price': tp_price
+    }, index=df.index)
+
+
+def _first_hit(hit_mask_fn, start, n):
+    """Index of the first bar >= start where the exit condition holds, scanning in doubling chunks."""
+    chunk = 64
+    while start < n:
+        stop = min(n, start + chunk)
+        hits = np.flatnonzero(hit_mask_fn(start, stop))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        chunk *= 2
+    return None
+
+
+def simulate_trades(df: pd.DataFrame, signals: pd.DataFrame, start=35, starting_balance=10000.0):
+    """
+    Replays the backtest's all-in, one-position-at-a-time TP/SL rules in one pass.
+
+    Exits are checked on bars after the entry bar, and a new entry can only
+    happen on the bar after an exit, as in run_10_day_test. Instead of
+    stepping bar by bar we jump from each exit to the next signal bar, and
+    search forward for the exit in growing chunks.
+    """
+    close = df['Close'].to_numpy(dtype=float)
+    sig = signals['signal'].to_numpy()
+    tp_arr = signals['tp_price'].to_numpy()
+    sl_arr = signals['sl_price'].to_numpy()
+    n = len(close)
+
+    entries = np.flatnonzero(sig != HOLD)
+    entries = entries[entries >= start]
+
+    balance = starting_balance
+    trades = []
+    pos = start
+    while True:
+        k = np.searchsorted(entries, pos)
+        if k >= len(entries):
+            break
+        i = int(entries[k])
+        side = int(sig[i])
+        entry, tp, sl = close[i], tp_arr[i], sl_arr[i]
+        units = balance / entry
+
+        if side == BUY:
+            j = _first_hit(lambda a, b: (close[a:b] >= tp) | (close[a:b] <= sl), i + 1, n)
+        else:
+            j = _first_hit(lambda a, b: (close[a:b] <= tp) | (close[a:b] >= sl), i + 1, n)
+
+        exit_price = close[j] if j is not None else close[-1]
+        balance_before = balance
+        if side == BUY:
+            balance = units * exit_price
+            won = exit_price >= tp
+        else:
+            # Short P/L: capital plus (entry - exit) on the borrowed units
+            balance = units * (2 * entry - exit_price)
+            won = exit_price <= tp
+
+        trades.append({
+            'side': 'LONG' if side == BUY else 'SHORT',
+            'entry_time': df.index[i], 'entry_price': entry, 'tp_price': tp, 'sl_price': sl,
+            'exit_time': df.index[j] if j is not None else None, 'exit_price': exit_price,
+            'outcome': ('TP' if won else 'SL') if j is not None else 'OPEN',
+            'qty': units, 'pnl': balance - balance_before, 'balance': balance
+        })
+        if j is None:
+            break
+        pos = j + 1
+
+    closed = [t for t in trades if t['outcome'] != 'OPEN']
+    return {
+        'starting_balance': starting_balance,
+        'final_balance': balance,
+        'trade_count': len(trades),
+        'wins': sum(1 for t in closed if t['outcome'] == 'TP'),
+        'trades': trades
+    }
+
+
+def run_backtest(df: pd.DataFrame, start=35, starting_balance=10000.0, params=None):
+    """compute_signals + simulate_trades on an indicator frame."""
+    signals = compute_signals(df, params)
+    return simulate_trades(df, signals, start=start, starting_balance=starting_balance)
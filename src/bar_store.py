@@ -0,0 +1,144 @@
+import re
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the store is then only safe within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width record per bar; the file is a flat array of these so it can
+# be memory-mapped straight into NumPy without any parsing.
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'), ('Open', '<f8'), ('High', '<f8'),
+    ('Low', '<f8'), ('Close', '<f8'), ('Volume', '<f8')
+])
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def default_store_dir():
+    return Path.home() / ".sniper_ai" / "bars"
+
+
+class BarStore:
+    """
+    Append-only, memory-mappable OHLCV store, one file per (symbol, interval).
+
+    Bars are only ever appended in timestamp order. The single exception is
+    the newest bar, which is rewritten in place when the source revises it
+    (the still-forming candle). The scanner and web processes share the
+    files, so every access also takes an flock on a sidecar .lock file:
+    shared for reads, exclusive for writes.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else default_store_dir()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, symbol, interval):
+        safe = re.sub(r'[^A-Z0-9]+', '_', symbol.upper()).strip('_')
+        return self.root / f"{safe}_{interval}.bars"
+
+    def _thread_lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @contextmanager
+    def _lock(self, path, exclusive=False):
+        """Per-path lock across threads (threading.Lock) and processes (flock)."""
+        with self._thread_lock(path):
+            if fcntl is None:
+                yield
+                return
+            with open(path.with_suffix('.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _record_count(self, path, repair=False):
+        """Number of complete records; with `repair` (writers only) a torn trailing write is truncated."""
+        if not path.exists():
+            return 0
+        size = path.stat().st_size
+        count, torn = divmod(size, BAR_DTYPE.itemsize)
+        if torn and repair:
+            logger.warning(f"⚠️ Truncating partial bar record in {path.name}")
+            with open(path, 'r+b') as f:
+                f.truncate(count * BAR_DTYPE.itemsize)
+        return count
+
+    @staticmethod
+    def _read_last_ts(path, count):
+        with open(path, 'rb') as f:
+            f.seek((count - 1) * BAR_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)['ts'][0])
+
+    def last_timestamp(self, symbol, interval):
+        """Epoch seconds of the newest stored bar, or None if the store is empty."""
+        path = self.path(symbol, interval)
+        with self._lock(path):
+            count = self._record_count(path)
+            if count == 0:
+                return None
+            return self._read_last_ts(path, count)
+
+    def read(self, symbol, interval, since=None, until=None) -> pd.DataFrame:
+        """Bars with `since` <= ts < `until` (epoch seconds, both optional) as a UTC-indexed OHLCV frame."""
+        path = self.path(symbol, interval)
+        with self._lock(path):
+            count = self._record_count(path)
+            if count == 0:
+                return pd.DataFrame(columns=OHLCV_COLUMNS)
+            bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+            start = int(np.searchsorted(bars['ts'], since, side='left')) if since is not None else 0
+            stop = int(np.searchsorted(bars['ts'], until, side='left')) if until is not None else count
+            window = np.array(bars[start:stop])
+            del bars
+        df = pd.DataFrame({col: window[col] for col in OHLCV_COLUMNS},
+                          index=pd.to_datetime(window['ts'], unit='s', utc=True))
+        return df
+
+    def merge(self, symbol, interval, df: pd.DataFrame):
+        """
+        Merges freshly fetched bars into the store.
+
+        Bars older than the newest stored one are ignored, a bar with the same
+        timestamp replaces it, and newer bars are appended. Returns the number
+        of records written.
+        """
+        if df is None or df.empty:
+            return 0
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        ts = pd.DatetimeIndex(df.index).as_unit('s').asi8
+        records = np.empty(len(df), dtype=BAR_DTYPE)
+        records['ts'] = ts
+        for col in OHLCV_COLUMNS:
+            records[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) if col in df.columns else np.nan
+
+        path = self.path(symbol, interval)
+        with self._lock(path, exclusive=True):
+            count = self._record_count(path, repair=True)
+            last_ts = None
+            if count:
+                last_ts = self._read_last_ts(path, count)
+                records = records[records['ts'] >= last_ts]
+            if len(records) == 0:
+                return 0
+
+            with open(path, 'r+b' if path.exists() else 'wb') as f:
+                if last_ts is not None and records['ts'][0] == last_ts:
+                    f.seek((count - 1) * BAR_DTYPE.itemsize)
+                else:
+                    f.seek(count * BAR_DTYPE.itemsize)
+                f.write(records.tobytes())
+            return len(records)
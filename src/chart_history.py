@@ -0,0 +1,136 @@
+import time
+import numpy as np
+import pandas as pd
+from src.timeframes import resample_ohlcv
+from src.history_cache import encode_candles
+from src.fetch_cache import SingleFlightCache, next_bar_boundary
+
+# Candle sizes a window can be downsampled to, in minutes of base (1m) bars
+BUCKET_MINUTES = (1, 2, 3, 5, 10, 15, 30, 60, 120, 240, 360, 720, 1440)
+MAX_POINTS = 5000
+OVERLAY_WARMUP = 200  # Buckets read before `start` so every overlay has settled at the left edge
+CLOSED_TTL = 600      # Seconds a window that ends before the forming bucket stays cached
+
+# Overlays are computed on the downsampled closes, i.e. on the candles the chart shows.
+# 'ema9' is a true EMA, matching its "9 EMA" label; dashboards before the server-side
+# overlays drew a 9-bar SMA under that label, which 'sma9' still provides.
+OVERLAYS = {
+    'ema9': lambda close: close.ewm(span=9, adjust=False).mean(),
+    'sma9': lambda close: close.rolling(9, min_periods=9).mean(),
+    'sma50': lambda close: close.rolling(50, min_periods=1).mean(),
+    'sma200': lambda close: close.rolling(200, min_periods=1).mean(),
+}
+
+
+def to_epoch(value):
+    """Epoch seconds from an epoch number, a numeric string or an ISO date; None stays None."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        ts = pd.Timestamp(value)
+        return int((ts.tz_localize('UTC') if ts.tzinfo is None else ts).timestamp())
+
+
+BUCKET_UNITS = {'m': 1, 'h': 60, 'd': 1440}
+
+
+def bucket_minutes(spec):
+    """'15m' / '1h' / '1d' / 15 -> minutes; ValueError for anything else or a size below one minute."""
+    try:
+        if isinstance(spec, (int, float)):
+            minutes = int(spec)
+        else:
+            spec = str(spec).strip().lower()
+            minutes = int(spec[:-1]) * BUCKET_UNITS[spec[-1]]
+    except (KeyError, IndexError, ValueError, OverflowError):
+        raise ValueError(f"bucket must look like 15m, 1h or 1d, got {spec!r}") from None
+    if minutes < 1 or minutes > BUCKET_MINUTES[-1]:
+        raise ValueError(f"bucket must be between 1m and {BUCKET_MINUTES[-1] // 1440}d, got {spec!r}")
+    return minutes
+
+
+def pick_bucket(span_seconds, points):
+    """Smallest candle size that fits `span_seconds` into at most `points` candles."""
+    for minutes in BUCKET_MINUTES:
+        if span_seconds / (minutes * 60) <= points:
+            return minutes
+    return BUCKET_MINUTES[-1]
+
+
+class ChartHistory:
+    """
+    Range queries over cached base bars for the chart.
+
+    window() reads 1m bars for [start, end) (plus a warm-up margin) through
+    `read_bars(symbol, since, until)`, rolls them into time-aligned OHLC
+    buckets (first open, max high, min low, last close, summed volume) sized
+    so the range fits the requested point count, and computes the overlays
+    on those candles. Ranges are snapped to bucket boundaries so scrolling
+    clients repeat cache keys; identical concurrent requests share one build.
+    """
+
+    def __init__(self, read_bars, max_entries=256):
+        self.read_bars = read_bars
+        self.cache = SingleFlightCache(max_entries=max_entries, keep=lambda win: win is not None)
+
+    def window(self, symbol, start=None, end=None, points=1000, bucket=None, overlays=('ema9',)):
+        points = max(1, min(int(points), MAX_POINTS))
+        now = time.time()
+        end = to_epoch(end) or int(now)
+        start = to_epoch(start)
+        if bucket is not None:
+            minutes = bucket_minutes(bucket)
+        else:
+            minutes = pick_bucket(end - (start if start is not None else end - 3 * 86400), points)
+        size = minutes * 60
+        # Snap outward to bucket boundaries; without a start, page back `points` buckets from end
+        end = -(-end // size) * size
+        start = (start // size) * size if start is not None else end - points * size
+        overlays = tuple(name for name in overlays if name in OVERLAYS)
+
+        key = (symbol, minutes, start, end, overlays)
+        forming = next_bar_boundary(size, now)
+        expires = now + CLOSED_TTL if end < forming - size else forming
+        return self.cache.get(key, lambda: self._build(symbol, minutes, start, end, points, overlays), expires)
+
+    def _build(self, symbol, minutes, start, end, points, overlays):
+        size = minutes * 60
+        bars = self.read_bars(symbol, start - OVERLAY_WARMUP * size, end)
+        candles = resample_ohlcv(bars, f"{minutes}m") if bars is not None and not bars.empty else pd.DataFrame()
+        lines = {name: OVERLAYS[name](candles['Close']) for name in overlays} if not candles.empty else {}
+        first = pd.Timestamp(start, unit='s', tz='UTC')
+        older = not candles.empty and candles.index[0] < first
+        if not candles.empty:
+            keep = candles.index >= first
+            candles = candles[keep].iloc[-points:]
+            lines = {name: line[keep].iloc[-points:] for name, line in lines.items()}
+        return {
+            'symbol': symbol, 'bucket': f"{minutes}m", 'start': start, 'end': end,
+            'candles': candles, 'overlays': lines,
+            # Whether anything older than this page exists; clients stop paging back when False
+            'has_more': bool(older),
+        }
+
+
+def encode_window(win: dict) -> dict:
+    """Socket.IO form: packed candle block as in chart_history, overlays as float64 blocks (NaN for gaps)."""
+    payload = encode_candles(win['symbol'], win['candles']) if not win['candles'].empty else \
+        {'symbol': win['symbol'], 'count': 0, 'candles': b''}
+    payload.update({k: win[k] for k in ('bucket', 'start', 'end', 'has_more')})
+    payload['overlays'] = {name: line.to_numpy(dtype='<f8').tobytes() for name, line in win['overlays'].items()}
+    return payload
+
+
+def window_json(win: dict) -> dict:
+    """HTTP form: columnar lists (time in epoch seconds)."""
+    candles = win['candles']
+    out = {k: win[k] for k in ('symbol', 'bucket', 'start', 'end', 'has_more')}
+    out['count'] = len(candles)
+    out['time'] = pd.DatetimeIndex(candles.index).as_unit('s').asi8.tolist() if len(candles) else []
+    for col in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        out[col.lower()] = np.round(candles[col].to_numpy(dtype=float), 8).tolist() if len(candles) else []
+    out['overlays'] = {name: [None if np.isnan(v) else round(float(v), 8) for v in line.to_numpy(dtype=float)]
+                       for name, line in win['overlays'].items()}
+    return out
@@ -0,0 +1,74 @@
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Scaled-out layout (any Redis works as the broker, a local redis-server included):
+#   SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0
+#   scanner: SNIPER_ROLE=scanner python app.py
+#   web:     SNIPER_ROLE=web gunicorn --worker-class eventlet -w 4 app:app
+# Clients then connect over WebSocket only, so web workers need no sticky sessions.
+#
+# all:     one process serves clients and runs the scanner/trader (the default, `-w 1`)
+# web:     stateless Socket.IO fan-out; never scans or trades, any number of workers
+# scanner: the single scanner/trader process; publishes through the message queue
+ROLES = ('all', 'web', 'scanner')
+INTEREST_PREFIX = "sniper:interest:"
+
+
+def process_role(config: dict) -> str:
+    role = (os.getenv("SNIPER_ROLE") or config.get('process_role') or 'all').lower()
+    if role not in ROLES:
+        raise ValueError(f"process_role must be one of {ROLES}, got {role!r}")
+    return role
+
+
+def message_queue_url(config: dict):
+    """Broker URL shared by the scanner and every web worker (redis://, amqp://, ...), or None."""
+    return os.getenv("SOCKETIO_MESSAGE_QUEUE") or config.get('message_queue') or None
+
+
+class SymbolInterest:
+    """
+    Which symbols some client, on any web worker, is currently watching.
+
+    Web workers touch() the symbols their clients subscribe to and keep them
+    alive with heartbeats; the scanner adds symbols() to its watchlist. Each
+    entry is a Redis key that expires after `ttl` seconds, so a worker that
+    dies stops holding symbols in the scan set on its own.
+    """
+
+    def __init__(self, url, ttl=60):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+
+    def touch(self, *symbols):
+        if not symbols:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.set(INTEREST_PREFIX + symbol, int(time.time()), ex=self.ttl)
+        pipe.execute()
+
+    def symbols(self):
+        keys = self.client.scan_iter(match=INTEREST_PREFIX + "*", count=500)
+        return sorted(k.decode()[len(INTEREST_PREFIX):] for k in keys)
+
+
+def make_interest(config: dict):
+    """
+    Cross-process interest registry when the message queue is Redis, else None.
+
+    With another broker (or none) the scanner covers the configured watchlist
+    plus the clients connected to its own process.
+    """
+    url = message_queue_url(config)
+    if not url or not url.startswith(('redis://', 'rediss://', 'unix://')):
+        return None
+    try:
+        return SymbolInterest(url, ttl=config.get('interest_ttl', 60))
+    except Exception as e:
+        logger.error(f"⚠️ Symbol interest registry unavailable, scanning the watchlist only: {e}")
+        return None
@@ -1,77 +1,290 @@
+import time
 import pandas as pd
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from datetime import datetime, timedelta
-from alpaca_trade_api.rest import REST, TimeFrame
+from datetime import datetime, timedelta, timezone
+from alpaca_trade_api.rest import TimeFrame
+from src.bar_store import BarStore
+from src.http_clients import get_clients
+from src.metrics import timed, DATA_SOURCE
+from src.fetch_cache import SingleFlightCache, next_bar_boundary
 
 logger = logging.getLogger(__name__)
 
+CRYPTO_BASES = ['BTC', 'ETH', 'SOL']
+FULL_LOOKBACK = "7d" # Cold-fill depth; guarantees 200+ candles for indicator warm-up
+
+_stores = {}
+_caches = {}
+
+def _duration_seconds(spec: str) -> int:
+    """'5m' -> 300, '1h' -> 3600, '7d' -> 604800."""
+    spec = spec.strip().lower()
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    if spec.endswith('mo'):
+        return int(spec[:-2]) * 30 * 86400
+    return int(spec[:-1]) * units[spec[-1]]
+
+def get_bar_store(config: dict):
+    """Returns the shared BarStore for this config, or None when disabled."""
+    if config is None or not config.get('bar_store_enabled', True):
+        return None
+    root = config.get('bar_store_dir')
+    if root not in _stores:
+        _stores[root] = BarStore(root)
+    return _stores[root]
+
+def get_fetch_cache(config: dict):
+    """Shared single-flight cache in front of the fetchers, or None when disabled."""
+    if config is None or not config.get('fetch_cache_enabled', True):
+        return None
+    key = config.get('bar_store_dir')
+    if key not in _caches:
+        _caches[key] = SingleFlightCache(copy=lambda df: df.copy(), keep=lambda df: df is not None and not df.empty)
+    return _caches[key]
+
+def _cache_expiry(config: dict, interval: str) -> float:
+    """A few seconds at most, and never past the close of the bar forming now."""
+    now = time.time()
+    return min(now + float(config.get('fetch_cache_ttl', 3.0)), next_bar_boundary(_duration_seconds(interval), now))
+
+def _is_crypto(clean_symbol: str) -> bool:
+    return clean_symbol in CRYPTO_BASES or clean_symbol.endswith('/USD')
+
+def _align(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Floors timestamps to bar boundaries so a live 'now' bar maps onto its candle."""
+    df.index = df.index.floor(interval.replace('m', 'min'))
+    return df[~df.index.duplicated(keep='last')]
+
+def _fetch_yahoo(clean_symbol: str, config: dict, interval: str, since=None) -> pd.DataFrame:
+    yahoo_sym = f"{clean_symbol.split('/')[0]}-USD" if _is_crypto(clean_symbol) else clean_symbol
+    clients = get_clients(config)
+    url = f"{clients.yahoo_base_url}/v8/finance/chart/{yahoo_sym}"
+
+    # Delta request when we already hold history, otherwise a full warm-up range
+    if since is not None:
+        params = {"interval": interval, "period1": int(since), "period2": int(time.time()) + 1}
+    else:
+        params = {"interval": interval, "range": FULL_LOOKBACK}
+
+    # Pooled keep-alive session; the User-Agent header is set on the session
+    response = clients.session().get(url, params=params, timeout=clients.timeout)
+    if response.status_code == 200:
+        return _parse_yahoo_chart(response.json())
+    return None
+
+def _parse_yahoo_chart(data: dict) -> pd.DataFrame:
+    """Yahoo chart JSON -> OHLCV frame; None when the payload carries no result."""
+    if data.get('chart') and data['chart'].get('result'):
+        result = data['chart']['result'][0]
+        if not result.get('timestamp'):
+            return pd.DataFrame()
+        df = pd.DataFrame(result['indicators']['quote'][0], index=pd.to_datetime(result['timestamp'], unit='s', utc=True))
+        df.columns = [c.capitalize() for c in df.columns]
+        df.dropna(subset=['Close'], inplace=True)
+        return df
+    return None
+
+def _fetch_alpaca(clean_symbols: list, config: dict, interval: str, since=None) -> dict:
+    """One batched bars request per asset class; returns {clean_symbol: frame}."""
+    # Use the passed 'config' argument instead of importing from app.py
+    api_key = config.get('alpaca_api_key')
+    api_secret = config.get('alpaca_secret_key')
+
+    # Explicitly set the base_url to paper to avoid 401 Unauthorized errors
+    api = get_clients(config).rest(api_key, api_secret, base_url="https://paper-api.alpaca.markets")
+
+    def search_symbol(clean):
+        return f"{clean.split('/')[0]}/USD" if _is_crypto(clean) else clean
+
+    # Standardize timeframe to 5m if interval is weird
+    val = 5 if "51" in interval else int(''.join(filter(str.isdigit, interval)))
+    tf_unit = TimeFrame.Minute if "m" in interval.lower() else TimeFrame.Hour
+
+    if since is not None:
+        start_time = datetime.fromtimestamp(since, tz=timezone.utc).isoformat()
+    else:
+        start_time = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+
+    crypto = [search_symbol(c) for c in clean_symbols if _is_crypto(c)]
+    stocks = [search_symbol(c) for c in clean_symbols if not _is_crypto(c)]
+    # Alpaca's limit is per request, so scale it with the bars per symbol and the number of symbols
+    per_symbol = max(1000, _duration_seconds(FULL_LOOKBACK) // _duration_seconds(interval) + 1)
+    limit = per_symbol * max(len(crypto), len(stocks), 1)
+
+    frames = []
+    if crypto:
+        # Force Crypto endpoint
+        frames.append(api.get_crypto_bars(symbol=crypto, timeframe=TimeFrame(val, tf_unit), start=start_time, limit=limit).df)
+    if stocks:
+        # Force Stock endpoint
+        frames.append(api.get_bars(symbol=stocks, timeframe=TimeFrame(val, tf_unit), start=start_time, limit=limit).df)
+
+    results = {}
+    for bars in frames:
+        if bars.empty:
+            continue
+        bars = bars.rename(columns={'open':'Open', 'high':'High', 'low':'Low', 'close':'Close', 'volume':'Volume'})
+        for clean in clean_symbols:
+            wanted = search_symbol(clean)
+            if isinstance(bars.index, pd.MultiIndex):
+                if wanted not in bars.index.get_level_values(0):
+                    continue
+                df = bars.xs(wanted, level=0)
+            elif 'symbol' in bars.columns:
+                df = bars[bars['symbol'] == wanted].drop(columns='symbol')
+            else:
+                df = bars
+            if df.empty:
+                continue
+            df.index = pd.to_datetime(df.index, utc=True)
+            results[clean] = df
+    return results
+
+def _since(store, clean_symbol: str, interval: str):
+    """Timestamp to delta-fetch from, or None when a full warm-up fill is needed."""
+    if store is None:
+        return None
+    last_ts = store.last_timestamp(clean_symbol, interval)
+    # A store older than the cold-fill window gets refilled from scratch
+    if last_ts is not None and last_ts > time.time() - _duration_seconds(FULL_LOOKBACK):
+        return last_ts
+    return None
+
+def _from_store(store, clean_symbol: str, interval: str, period: str, fresh) -> pd.DataFrame:
+    """Merges freshly fetched bars and serves the requested window from the store."""
+    if fresh is not None and not fresh.empty:
+        store.merge(clean_symbol, interval, _align(fresh, interval))
+
+    df = store.read(clean_symbol, interval, since=int(time.time()) - _duration_seconds(period))
+    if df.empty:
+        return pd.DataFrame()
+    # Standardize resampling to handle small gaps in market data
+    return df.resample(interval.replace('m', 'min')).ffill()
+
 def fetch_market_data(symbol: str, config: dict, period: str = "7d", interval: str = "5m") -> pd.DataFrame:
     """
     Unified Data Fetcher with extended lookback for indicator 'warm-up'.
-    Period increased to 7d and Alpaca limit to 1000 bars.
+
+    Bars are persisted in the local BarStore, so after the first cold fill only
+    bars newer than the last stored one are requested from the upstream source.
+    The returned frame covers `period` and is read back from the store.
+
+    Results are cached per (symbol, interval, period) until the current bar
+    closes (at most `fetch_cache_ttl` seconds), and concurrent callers for the
+    same key share one upstream request.
     """
+    cache = get_fetch_cache(config)
+    if cache is None:
+        return _fetch_market_data(symbol, config, period, interval)
+    key = (symbol.upper().strip(), interval, period)
+    return cache.get(key, lambda: _fetch_market_data(symbol, config, period, interval), _cache_expiry(config, interval))
+
+def _fetch_market_data(symbol: str, config: dict, period: str, interval: str) -> pd.DataFrame:
     clean_symbol = symbol.upper().strip()
-    
+    store = get_bar_store(config)
+    since = _since(store, clean_symbol, interval)
+    fresh = None
+
     # 1. --- PRIMARY: YAHOO FINANCE ---
     try:
-        yahoo_sym = f"{clean_symbol}-USD" if clean_symbol in ['BTC', 'ETH', 'SOL'] else clean_symbol
-        url = f"https://query2.finance.yahoo.com/v8/finance/chart/{yahoo_sym}"
-        headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Chrome/131.0.0.0 Safari/537.36"}
-        
-        # We use a 7-day range to ensure 200+ candles are always available for indicators
-        response = requests.get(url, params={"interval": interval, "range": "7d"}, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('chart') and data['chart'].get('result'):
-                result = data['chart']['result'][0]
-                df = pd.DataFrame(result['indicators']['quote'][0], index=pd.to_datetime(result['timestamp'], unit='s', utc=True))
-                df.columns = [c.capitalize() for c in df.columns]
-                df.dropna(subset=['Close'], inplace=True)
-                
+        with timed('yahoo'):
+            fresh = _fetch_yahoo(clean_symbol, config, interval, since)
+        if fresh is not None:
+            DATA_SOURCE.inc(source='yahoo')
+            logger.info(f"📊 {symbol}: Data via Yahoo.")
+            if store is None and not fresh.empty:
                 # Standardize resampling to handle small gaps in market data
-                df = df.resample(interval.replace('m', 'min')).ffill()
-                logger.info(f"📊 {symbol}: Data via Yahoo.")
-                return df
+                return fresh.resample(interval.replace('m', 'min')).ffill()
     except Exception:
         pass
 
     # 2. --- FAILOVER: ALPACA (STRICT 2026 SDK RULES) ---
-    try:
-        # Use the passed 'config' argument instead of importing from app.py
-        api_key = config.get('alpaca_api_key')
-        api_secret = config.get('alpaca_secret_key')
-        
-        # Explicitly set the base_url to paper to avoid 401 Unauthorized errors
-        api = REST(api_key, api_secret, base_url="https://paper-api.alpaca.markets")
-        
-        search_symbol = f"{clean_symbol}/USD" if clean_symbol in ['BTC', 'ETH', 'SOL'] else clean_symbol
-        
-        # Standardize timeframe to 5m if interval is weird
-        val = 5 if "51" in interval else int(''.join(filter(str.isdigit, interval)))
-        tf_unit = TimeFrame.Minute if "m" in interval.lower() else TimeFrame.Hour
-        
-        start_time = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    if fresh is None:
+        try:
+            with timed('alpaca_failover'):
+                fresh = _fetch_alpaca([clean_symbol], config, interval, since).get(clean_symbol)
+            if fresh is not None:
+                DATA_SOURCE.inc(source='alpaca')
+                logger.info(f"🛡️ {symbol}: Alpaca Failover Success.")
+                if store is None:
+                    return fresh
+        except Exception as e:
+            logger.error(f"❌ Alpaca Failover Failed: {e}")
+        if fresh is None:
+            DATA_SOURCE.inc(source='none')
 
-        if clean_symbol in ['BTC', 'ETH', 'SOL']:
-            # Force Crypto endpoint
-            bars_obj = api.get_crypto_bars(symbol=[search_symbol], timeframe=TimeFrame(val, tf_unit), start=start_time, limit=1000)
-        else:
-            # Force Stock endpoint
-            bars_obj = api.get_bars(symbol=[search_symbol], timeframe=TimeFrame(val, tf_unit), start=start_time, limit=1000)
+    if store is None:
+        return pd.DataFrame()
 
-        bars = bars_obj.df
-        if not bars.empty:
-            df = bars.rename(columns={'open':'Open', 'high':'High', 'low':'Low', 'close':'Close', 'volume':'Volume'})
-            df.index = pd.to_datetime(df.index, utc=True)
-            
-            if isinstance(df.index, pd.MultiIndex):
-                df = df.xs(search_symbol, level=0)
-
-            logger.info(f"🛡️ {symbol}: Alpaca Failover Success.")
-            return df
-                
-    except Exception as e:
-        logger.error(f"❌ Alpaca Failover Failed: {e}")
-        
-    return pd.DataFrame()
+    # 3. --- MERGE INTO STORE & SERVE THE REQUESTED WINDOW ---
+    return _from_store(store, clean_symbol, interval, period, fresh)
+
+def fetch_many(symbols: list, config: dict, period: str = "7d", interval: str = "5m", max_workers: int = None) -> dict:
+    """
+    Watchlist fetcher: {symbol: frame} for every symbol in one round.
+
+    Yahoo has no multi-symbol chart endpoint, so those calls run concurrently
+    on a small thread pool; every symbol Yahoo misses is then retried in a
+    single batched Alpaca bars request per asset class. Shares the
+    fetch_market_data cache: only symbols that are neither cached nor
+    already being fetched go upstream.
+    """
+    cache = get_fetch_cache(config)
+    if cache is None:
+        return _fetch_many(symbols, config, period, interval, max_workers)
+    keys = {symbol: (symbol.upper().strip(), interval, period) for symbol in symbols}
+    by_key = {key: symbol for symbol, key in keys.items()}
+
+    def load(missing_keys):
+        frames = _fetch_many([by_key[key] for key in missing_keys], config, period, interval, max_workers)
+        return {keys[symbol]: df for symbol, df in frames.items()}
+
+    frames = cache.get_many(list(keys.values()), load, _cache_expiry(config, interval))
+    return {symbol: (frames[key] if frames[key] is not None else pd.DataFrame()) for symbol, key in keys.items()}
+
+def _fetch_many(symbols: list, config: dict, period: str, interval: str, max_workers: int = None) -> dict:
+    store = get_bar_store(config)
+    # Never run more concurrent Yahoo calls than the HTTP pool has connections
+    max_workers = max_workers or get_clients(config).pool_size
+    cleans = {symbol: symbol.upper().strip() for symbol in symbols}
+    sinces = {symbol: _since(store, clean, interval) for symbol, clean in cleans.items()}
+
+    def try_yahoo(symbol):
+        try:
+            with timed('yahoo'):
+                return _fetch_yahoo(cleans[symbol], config, interval, sinces[symbol])
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        fresh = dict(zip(symbols, pool.map(try_yahoo, symbols)))
+
+    missing = [symbol for symbol in symbols if fresh[symbol] is None]
+    DATA_SOURCE.inc(len(symbols) - len(missing), source='yahoo')
+    if missing:
+        # Full refill if any of them needs it; the store drops bars it already has
+        starts = [sinces[symbol] for symbol in missing]
+        since = None if None in starts else min(starts)
+        try:
+            with timed('alpaca_failover'):
+                batch = _fetch_alpaca([cleans[symbol] for symbol in missing], config, interval, since)
+            for symbol in missing:
+                fresh[symbol] = batch.get(cleans[symbol])
+            DATA_SOURCE.inc(len(batch), source='alpaca')
+            logger.info(f"🛡️ Alpaca Failover: {len(batch)}/{len(missing)} symbols.")
+        except Exception as e:
+            logger.error(f"❌ Alpaca Failover Failed: {e}")
+        DATA_SOURCE.inc(sum(fresh[symbol] is None for symbol in missing), source='none')
+
+    results = {}
+    for symbol in symbols:
+        if store is not None:
+            results[symbol] = _from_store(store, cleans[symbol], interval, period, fresh[symbol])
+        elif fresh[symbol] is None or fresh[symbol].empty:
+            results[symbol] = pd.DataFrame()
+        elif symbol in missing:
+            results[symbol] = fresh[symbol]
+        else:
+            results[symbol] = fresh[symbol].resample(interval.replace('m', 'min')).ffill()
+    return results
@@ -1,11 +1,45 @@
-import alpaca_trade_api as tradeapi
 import logging
+import threading
+from src.http_clients import get_clients
+from src.account_mirror import AccountMirror
+from src.order_pipeline import OrderPipeline, make_order_group_id
+from src.risk_gate import RiskGate
 
 logger = logging.getLogger(__name__)
 
+def position_size(symbol, entry_price, sl_price, equity, available_cash, risk_pct):
+    """
+    Live sizing rules, shared with the portfolio backtester.
+
+    Risks `risk_pct` of equity on the distance to the stop, capped at 95% of
+    available cash; crypto gets 4 decimals, stocks whole shares.
+    """
+    # 1. Risk-Based Position Sizing (Risk Amount / Distance to Stop)
+    risk_amount = equity * risk_pct
+    risk_per_unit = abs(entry_price - sl_price)
+
+    # Prevent Division by Zero with minimum tick
+    if risk_per_unit < 0.01: risk_per_unit = 0.01
+
+    intended_qty = risk_amount / risk_per_unit
+
+    # 2. Safety Budget Cap (Don't use more than 95% of cash)
+    max_affordable = (available_cash * 0.95) / entry_price
+    qty = max(0.0, min(intended_qty, max_affordable))
+
+    # 3. Precision Formatting based on asset type
+    if "/USD" in symbol or any(c in symbol for c in ['BTC', 'ETH', 'SOL']):
+        # Crypto lot sizes vary; 4 decimals is a safe universal standard for major coins
+        return round(qty, 4)
+    else:
+        # Standard US Stocks require whole shares for most bracket orders
+        return int(qty)
+
 class ExecutionEngine:
-    def __init__(self, config):
+    def __init__(self, config, journal=None, notifier=None):
         self.config = config
+        self.journal = journal  # Optional src.journal.Journal; fills are appended from the trade stream
+        self.notifier = notifier  # Optional src.notifier.Notifier; fills are announced without blocking
         self.api_key = config.get('alpaca_api_key')
         self.secret_key = config.get('alpaca_secret_key')
         
@@ -15,54 +49,84 @@ class ExecutionEngine:
         if not self.api_key or not self.secret_key:
             raise ValueError("Alpaca API Keys missing in config.json")
 
-        self.api = tradeapi.REST(
+        # Shared per-credential client, so its connection pool stays warm across components
+        self.api = get_clients(config).rest(
             key_id=self.api_key, 
             secret_key=self.secret_key, 
             base_url=self.base_url, 
             api_version='v2'
         )
         
-        self.risk_pct = float(config.get('risk_per_trade', 1.0)) / 100.0
+        risk_settings = config.get('risk_settings') or {}
+        # risk_settings are fractions (0.01 = 1%); the legacy top-level key is a percent
+        if 'risk_per_trade_percent' in risk_settings:
+            self.risk_pct = float(risk_settings['risk_per_trade_percent'])
+        else:
+            self.risk_pct = float(config.get('risk_per_trade', 1.0)) / 100.0
+
+        # Equity / buying power are read from this mirror instead of a get_account() per order
+        self.account = AccountMirror(self.api, ttl=config.get('account_ttl', 15))
+        # Order legs go through an idempotent pipeline with a local order-state table
+        self.orders = OrderPipeline(self.api, retries=config.get('order_retries', 2),
+                                    fill_timeout=config.get('entry_fill_timeout', 10.0))
+        # Every entry passes the pre-trade gate first; it only reads the mirror and its own state
+        self.risk = RiskGate(self.account, risk_settings)
+
+    def mark(self, symbol, price):
+        """Latest scanner price: marks open positions, is the gate's slippage reference and works deferred exits."""
+        self.account.mark(symbol, price)
+        self.risk.mark(symbol, price)
+        self.orders.on_price(symbol, price)
+
+    def start_trade_stream(self):
+        """Keeps the account mirror and order table current from Alpaca's trade-updates websocket."""
+        from alpaca_trade_api.stream import Stream
+        stream = Stream(self.api_key, self.secret_key, base_url=self.base_url)
+        stream.subscribe_trade_updates(self._on_trade_update)
+        threading.Thread(target=stream.run, daemon=True, name="trade-updates").start()
+        logger.info("📡 Listening to trade updates.")
+
+    async def _on_trade_update(self, data):
+        await self.account.on_trade_update(data)
+        self.orders.on_trade_update(data)
+        if self.journal is not None and data.event in ('fill', 'partial_fill'):
+            try:
+                order = data.order
+                self.journal.record_fill(order['symbol'], order['side'],
+                                         getattr(data, 'qty', None) or order.get('filled_qty'), data.price,
+                                         ts=getattr(data, 'timestamp', None), event=data.event,
+                                         order_id=order.get('id'), client_order_id=order.get('client_order_id'))
+            except Exception as e:
+                logger.error(f"Journal Fill Error: {e}")
+        if self.notifier is not None and data.event in ('fill', 'partial_fill'):
+            order = data.order
+            self.notifier.fill(order['symbol'], order['side'], getattr(data, 'qty', None) or order.get('filled_qty'),
+                               data.price, event=data.event, order_id=order.get('id'))
 
     def calculate_trade_qty(self, symbol, entry_price, sl_price):
         """Calculates quantity with fractional support for Crypto and whole numbers for Stocks."""
         try:
-            account = self.api.get_account()
-            equity = float(account.equity)
             # Use non_marginable_buying_power for safer paper trading limits
-            available_cash = float(account.non_marginable_buying_power)
-
-            # 1. Risk-Based Position Sizing (Risk Amount / Distance to Stop)
-            risk_amount = equity * self.risk_pct
-            risk_per_unit = abs(entry_price - sl_price)
-            
-            # Prevent Division by Zero with minimum tick
-            if risk_per_unit < 0.01: risk_per_unit = 0.01
-            
-            intended_qty = risk_amount / risk_per_unit
-
-            # 2. Safety Budget Cap (Don't use more than 95% of cash)
-            max_affordable = (available_cash * 0.95) / entry_price
-            qty = min(intended_qty, max_affordable)
-
-            # 3. Precision Formatting based on asset type
-            if "/USD" in symbol or any(c in symbol for c in ['BTC', 'ETH', 'SOL']):
-                # Crypto lot sizes vary; 4 decimals is a safe universal standard for major coins
-                return round(qty, 4) 
-            else:
-                # Standard US Stocks require whole shares for most bracket orders
-                return int(qty)      
-
+            return position_size(symbol, entry_price, sl_price, self.account.equity,
+                                 self.account.available_cash, self.risk_pct)
         except Exception as e:
             logger.error(f"Error calculating quantity for {symbol}: {e}")
             return 0
 
-    def execute_long(self, symbol, entry, sl, tp):
+    def execute_long(self, symbol, entry, sl, tp, signal_id=None, bar_ts=None):
         """Execute Long with Alpaca Safety Buffers and Bracket Logic."""
+        # Orders are keyed by the signal (bar + id), so a re-sent signal never places twice
+        try:
+            group_id = make_order_group_id(symbol, 'buy', bar_ts, signal_id)
+        except ValueError as e:
+            logger.error(f"❌ Long Execution Failed for {symbol}: {e}")
+            return False
         qty = self.calculate_trade_qty(symbol, entry, sl)
         if qty <= 0:
             logger.warning(f"Quantity too low for {symbol}. Trade skipped.")
             return False
+        if not self.risk.check(symbol, 'buy', qty, entry)['approved']:
+            return False
 
         try:
             # SAFETY BUFFERS: Alpaca requires a minimum spread for brackets
@@ -71,50 +135,58 @@ class ExecutionEngine:
 
             if "/USD" in symbol:
                 # Manual Bracket for Crypto (Alpaca API v2 constraint)
-                # 1. Entry Order
-                self.api.submit_order(symbol=symbol, qty=qty, side='buy', type='market', time_in_force='gtc')
-                # 2. Stop Loss (Stop-Limit)
-                self.api.submit_order(symbol=symbol, qty=qty, side='sell', type='stop_limit', 
-                                      stop_price=valid_sl, limit_price=round(valid_sl * 0.995, 2), time_in_force='gtc')
-                # 3. Take Profit
-                self.api.submit_order(symbol=symbol, qty=qty, side='sell', type='limit', limit_price=valid_tp, time_in_force='gtc')
+                # Entry first; once it fills, Stop Loss (Stop-Limit) then Take Profit
+                placed = self.orders.place_manual_bracket(group_id, symbol, qty, 'buy', {
+                    'sl': dict(side='sell', type='stop_limit', stop_price=valid_sl,
+                               limit_price=round(valid_sl * 0.995, 2), time_in_force='gtc'),
+                    'tp': dict(side='sell', type='limit', limit_price=valid_tp, time_in_force='gtc'),
+                })
             else:
                 # Native Bracket for Stocks
-                self.api.submit_order(
-                    symbol=symbol, qty=qty, side='buy', type='market', 
-                    time_in_force='day', order_class='bracket',
-                    take_profit={'limit_price': valid_tp},
-                    stop_loss={'stop_price': valid_sl}
-                )
+                placed = self.orders.place_bracket(group_id, symbol, qty, 'buy',
+                                                   take_profit={'limit_price': valid_tp},
+                                                   stop_loss={'stop_price': valid_sl})
 
+            if not placed:
+                logger.error(f"❌ Long Execution Failed for {symbol} (orders {group_id})")
+                return False
             logger.info(f"✅ LONG PLACED: {symbol} | Qty: {qty} | SL: {valid_sl} | TP: {valid_tp}")
             return True
         except Exception as e:
             logger.error(f"❌ Long Execution Failed for {symbol}: {e}")
             return False
 
-    def execute_short(self, symbol, entry, sl, tp):
+    def execute_short(self, symbol, entry, sl, tp, signal_id=None, bar_ts=None):
         """Execute Short with Alpaca Safety Buffers."""
+        # Orders are keyed by the signal (bar + id), so a re-sent signal never places twice
+        try:
+            group_id = make_order_group_id(symbol, 'sell', bar_ts, signal_id)
+        except ValueError as e:
+            logger.error(f"❌ Short Execution Failed for {symbol}: {e}")
+            return False
         qty = self.calculate_trade_qty(symbol, entry, sl)
         if qty <= 0: return False
+        if not self.risk.check(symbol, 'sell', qty, entry)['approved']:
+            return False
 
         try:
             valid_sl = round(max(entry + 0.01, sl), 2)
             valid_tp = round(min(entry - 0.01, tp), 2)
 
             if "/USD" in symbol:
-                self.api.submit_order(symbol=symbol, qty=qty, side='sell', type='market', time_in_force='gtc')
-                self.api.submit_order(symbol=symbol, qty=qty, side='buy', type='stop_limit', 
-                                      stop_price=valid_sl, limit_price=round(valid_sl * 1.005, 2), time_in_force='gtc')
-                self.api.submit_order(symbol=symbol, qty=qty, side='buy', type='limit', limit_price=valid_tp, time_in_force='gtc')
+                placed = self.orders.place_manual_bracket(group_id, symbol, qty, 'sell', {
+                    'sl': dict(side='buy', type='stop_limit', stop_price=valid_sl,
+                               limit_price=round(valid_sl * 1.005, 2), time_in_force='gtc'),
+                    'tp': dict(side='buy', type='limit', limit_price=valid_tp, time_in_force='gtc'),
+                })
             else:
-                self.api.submit_order(
-                    symbol=symbol, qty=qty, side='sell', type='market', 
-                    time_in_force='day', order_class='bracket',
-                    take_profit={'limit_price': valid_tp},
-                    stop_loss={'stop_price': valid_sl}
-                )
+                placed = self.orders.place_bracket(group_id, symbol, qty, 'sell',
+                                                   take_profit={'limit_price': valid_tp},
+                                                   stop_loss={'stop_price': valid_sl})
 
+            if not placed:
+                logger.error(f"❌ Short Execution Failed for {symbol} (orders {group_id})")
+                return False
             logger.info(f"📉 SHORT PLACED: {symbol} | Qty: {qty} | SL: {valid_sl} | TP: {valid_tp}")
             return True
         except Exception as e:
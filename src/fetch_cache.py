@@ -0,0 +1,149 @@
+import time
+import logging
+import threading
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FETCH_CACHE = REGISTRY.counter('sniper_fetch_cache_total', 'fetch_market_data cache lookups by result (hit, miss, coalesced).', ('result',))
+
+
+def next_bar_boundary(interval_seconds, now=None):
+    """Epoch seconds at which the bar that is forming at `now` closes."""
+    now = time.time() if now is None else now
+    return (int(now // interval_seconds) + 1) * interval_seconds
+
+
+class _Flight:
+    """One upstream request that other callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def resolve(self, value=None, error=None):
+        self.value, self.error = value, error
+        self.done.set()
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlightCache:
+    """
+    TTL cache where concurrent misses for one key share a single load.
+
+    The first caller for a missing key runs the loader; everyone arriving
+    while it is in flight waits for that result instead of issuing their own
+    request. Errors are not cached, and every waiter sees the leader's error.
+    Callers here run on OS threads (tpool / thread pools), never on the hub.
+    """
+
+    def __init__(self, max_entries=512, copy=None, keep=None):
+        self.max_entries = int(max_entries)
+        self.copy = copy or (lambda value: value)      # Hands each caller its own object
+        self.keep = keep or (lambda value: value is not None)  # Which results are worth caching
+        self._entries = {}   # key -> (expires_at, value)
+        self._flights = {}   # key -> _Flight
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = 0
+
+    def _lookup(self, key, now):
+        """Under the lock: ('hit', value) | ('wait', flight) | ('lead', flight)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            FETCH_CACHE.inc(result='hit')
+            return 'hit', entry[1]
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            FETCH_CACHE.inc(result='coalesced')
+            return 'wait', flight
+        self.misses += 1
+        FETCH_CACHE.inc(result='miss')
+        flight = self._flights[key] = _Flight()
+        return 'lead', flight
+
+    def _store(self, key, value, expires_at):
+        if not self.keep(value) or expires_at <= time.time():
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (expires_at, value)
+
+    def _land(self, key, flight, value=None, error=None):
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.resolve(value, error)
+
+    def get(self, key, loader, expires_at):
+        """Cached value for `key`, else the result of one shared loader() call."""
+        with self._lock:
+            state, found = self._lookup(key, time.time())
+        if state == 'hit':
+            return self.copy(found)
+        if state == 'wait':
+            return self.copy(found.wait())
+        try:
+            value = loader()
+        except Exception as e:
+            self._land(key, found, error=e)
+            raise
+        self._store(key, value, expires_at)
+        self._land(key, found, value)
+        return self.copy(value)
+
+    def get_many(self, keys, loader_many, expires_at):
+        """
+        Batched get(): `loader_many(missing_keys)` returns {key: value} for the
+        keys nobody else is already loading; keys it leaves out resolve to None.
+        """
+        now = time.time()
+        results, waiting, leading = {}, {}, {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                state, found = self._lookup(key, now)
+                if state == 'hit':
+                    results[key] = found
+                elif state == 'wait':
+                    waiting[key] = found
+                else:
+                    leading[key] = found
+        if leading:
+            try:
+                loaded = loader_many(list(leading))
+            except Exception as e:
+                for key, flight in leading.items():
+                    self._land(key, flight, error=e)
+                raise
+            for key, flight in leading.items():
+                value = loaded.get(key)
+                self._store(key, value, expires_at)
+                self._land(key, flight, value)
+                results[key] = value
+        for key, flight in waiting.items():
+            try:
+                results[key] = flight.wait()
+            except Exception:
+                results[key] = None
+        return {key: (None if results[key] is None else self.copy(results[key])) for key in keys}
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'in_flight': len(self._flights),
+                'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced}
@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from src.bar_store import BAR_DTYPE, OHLCV_COLUMNS
+from src.http_clients import get_clients
+
+logger = logging.getLogger(__name__)
+
+ALPACA_DATA_URL = "https://data.alpaca.markets"
+ALPACA_TIMEFRAMES = {'1m': '1Min', '5m': '5Min', '15m': '15Min', '30m': '30Min', '1h': '1Hour', '1d': '1Day'}
+CHUNK_COLUMNS = ['ts'] + OHLCV_COLUMNS
+
+
+def default_archive_dir():
+    return Path.home() / ".sniper_ai" / "archive"
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+def _is_crypto(symbol: str) -> bool:
+    return '/' in symbol or symbol.upper() in ('BTC', 'ETH', 'SOL')
+
+
+def month_chunks(start, end):
+    """[(label, chunk_start, chunk_end)] per calendar month overlapping [start, end)."""
+    start, end = _utc(start), _utc(end)
+    chunks = []
+    month = start.normalize().replace(day=1)
+    while month < end:
+        following = month + pd.offsets.MonthBegin(1)
+        chunks.append((month.strftime('%Y-%m'), max(start, month), min(end, following)))
+        month = following
+    return chunks
+
+
+# --- PAGE SOURCES ---
+def parse_bar_page(payload: dict, symbol: str):
+    """One Alpaca bars page -> (BAR_DTYPE records, next_page_token)."""
+    bars = payload.get('bars') or {}
+    if isinstance(bars, dict):
+        bars = bars.get(symbol) or []
+    records = np.empty(len(bars), dtype=BAR_DTYPE)
+    if bars:
+        records['ts'] = pd.to_datetime([b['t'] for b in bars], utc=True).as_unit('s').asi8
+        for col, key in zip(OHLCV_COLUMNS, 'ohlcv'):
+            records[col] = [float(b.get(key, np.nan)) for b in bars]
+    return records, payload.get('next_page_token')
+
+
+class AlpacaBarPages:
+    """
+    Fetches one page of historical bars per call from Alpaca's market-data API.
+
+    Crypto goes to the v1beta3 crypto endpoint, stocks to v2 (feed from
+    `alpaca_data_feed`, IEX by default). Uses the shared pooled session.
+    """
+
+    def __init__(self, config: dict, page_limit=10000):
+        self.config = config
+        self.page_limit = int(page_limit)
+        self.base_url = config.get('alpaca_data_url', ALPACA_DATA_URL).rstrip('/')
+        self.headers = {'APCA-API-KEY-ID': config.get('alpaca_api_key', ''),
+                        'APCA-API-SECRET-KEY': config.get('alpaca_secret_key', '')}
+
+    def __call__(self, symbol, interval, start, end, page_token=None) -> dict:
+        params = {'symbols': symbol, 'timeframe': ALPACA_TIMEFRAMES[interval], 'limit': self.page_limit,
+                  'start': _utc(start).isoformat(), 'end': _utc(end).isoformat(), 'sort': 'asc'}
+        if page_token:
+            params['page_token'] = page_token
+        if _is_crypto(symbol):
+            url = f"{self.base_url}/v1beta3/crypto/us/bars"
+        else:
+            url = f"{self.base_url}/v2/stocks/bars"
+            params.update(feed=self.config.get('alpaca_data_feed', 'iex'), adjustment='raw')
+        clients = get_clients(self.config)
+        response = clients.session().get(url, params=params, headers=self.headers, timeout=max(clients.timeout, 30))
+        response.raise_for_status()
+        return response.json()
+
+
+class RecordedPages:
+    """
+    Replays pages saved as JSON under `directory`, one file per request.
+
+    With a `source` (e.g. AlpacaBarPages) every page not on disk yet is
+    fetched once and recorded; without one it runs fully offline and a
+    missing page raises FileNotFoundError.
+    """
+
+    def __init__(self, directory, source=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.source = source
+
+    def path(self, symbol, interval, start, end, page_token=None):
+        key = json.dumps([symbol, interval, _utc(start).isoformat(), _utc(end).isoformat(), page_token])
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def __call__(self, symbol, interval, start, end, page_token=None) -> dict:
+        path = self.path(symbol, interval, start, end, page_token)
+        if path.exists():
+            return json.loads(path.read_text())
+        if self.source is None:
+            raise FileNotFoundError(f"No recorded page for {symbol} {interval} {start}..{end} ({page_token})")
+        payload = self.source(symbol, interval, start, end, page_token)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, path)
+        return payload
+
+
+# --- ARCHIVE ---
+class ArchiveRange:
+    """
+    A date range of one archived series, opened lazily.
+
+    Nothing is read until iterated: each monthly chunk is memory-mapped
+    column by column and sliced to the range, so only the pages of the
+    files that fall inside [start, end) are touched.
+    """
+
+    def __init__(self, chunk_dirs, start, end):
+        self.chunk_dirs = chunk_dirs
+        self.start = int(_utc(start).timestamp()) if start is not None else None
+        self.end = int(_utc(end).timestamp()) if end is not None else None
+
+    def _columns(self, chunk_dir):
+        ts = np.load(chunk_dir / "ts.npy", mmap_mode='r')
+        lo = int(np.searchsorted(ts, self.start, side='left')) if self.start is not None else 0
+        hi = int(np.searchsorted(ts, self.end, side='left')) if self.end is not None else len(ts)
+        return {col: np.load(chunk_dir / f"{col}.npy", mmap_mode='r')[lo:hi] for col in CHUNK_COLUMNS}
+
+    def iter_columns(self):
+        """Yields {column: read-only memmap slice} per chunk."""
+        for chunk_dir in self.chunk_dirs:
+            cols = self._columns(chunk_dir)
+            if len(cols['ts']):
+                yield cols
+
+    def iter_frames(self):
+        """Yields one OHLCV frame per chunk, for passes that never need the whole range at once."""
+        for cols in self.iter_columns():
+            yield pd.DataFrame({col: np.asarray(cols[col]) for col in OHLCV_COLUMNS},
+                               index=pd.to_datetime(np.asarray(cols['ts']), unit='s', utc=True))
+
+    def __len__(self):
+        return sum(len(cols['ts']) for cols in self.iter_columns())
+
+    def frame(self) -> pd.DataFrame:
+        """The whole range as one UTC-indexed OHLCV frame (only this range is loaded)."""
+        frames = list(self.iter_frames())
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+
+class HistoryArchive:
+    """
+    Multi-year bar history as chunked, memory-mapped columnar files.
+
+    Layout: <root>/<SYMBOL>_<interval>/<YYYY-MM>/{ts,Open,High,Low,Close,Volume}.npy
+    plus a manifest.json recording each chunk's rows, bounds, the span that
+    was actually fetched ('from' / 'until') and whether that span is the
+    whole, already-closed month. Chunks are written to a temporary
+    directory and renamed into place, so a reader never sees half a chunk.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else default_archive_dir()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def series_dir(self, symbol, interval):
+        safe = ''.join(c if c.isalnum() else '_' for c in symbol.upper()).strip('_')
+        return self.root / f"{safe}_{interval}"
+
+    def manifest(self, symbol, interval) -> dict:
+        path = self.series_dir(symbol, interval) / "manifest.json"
+        return json.loads(path.read_text()) if path.exists() else {'symbol': symbol, 'interval': interval, 'chunks': {}}
+
+    def chunk_records(self, symbol, interval, label):
+        """One stored month as BAR_DTYPE records (empty when not archived)."""
+        chunk_dir = self.series_dir(symbol, interval) / label
+        if not (chunk_dir / "ts.npy").exists():
+            return np.empty(0, dtype=BAR_DTYPE)
+        ts = np.load(chunk_dir / "ts.npy")
+        records = np.empty(len(ts), dtype=BAR_DTYPE)
+        records['ts'] = ts
+        for col in OHLCV_COLUMNS:
+            records[col] = np.load(chunk_dir / f"{col}.npy")
+        return records
+
+    def write_chunk(self, symbol, interval, label, records, complete, covered=(None, None)):
+        """Stores one month of BAR_DTYPE records (sorted, de-duplicated by ts); `covered` is the fetched span."""
+        records = records[np.argsort(records['ts'], kind='stable')]
+        if len(records):
+            keep = np.ones(len(records), dtype=bool)
+            keep[:-1] = records['ts'][1:] != records['ts'][:-1]  # Last copy of a timestamp wins
+            records = records[keep]
+        series = self.series_dir(symbol, interval)
+        final, tmp = series / label, series / f"{label}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for col in CHUNK_COLUMNS:
+            np.save(tmp / f"{col}.npy", np.ascontiguousarray(records[col]))
+        with self._lock:
+            shutil.rmtree(final, ignore_errors=True)
+            os.replace(tmp, final)
+            manifest = self.manifest(symbol, interval)
+            manifest['chunks'][label] = {
+                'rows': int(len(records)), 'complete': bool(complete),
+                'from': covered[0], 'until': covered[1],
+                'first': int(records['ts'][0]) if len(records) else None,
+                'last': int(records['ts'][-1]) if len(records) else None}
+            path = series / "manifest.json"
+            path.with_suffix('.tmp').write_text(json.dumps(manifest, indent=1, sort_keys=True))
+            os.replace(path.with_suffix('.tmp'), path)
+
+    def open(self, symbol, interval, start=None, end=None) -> ArchiveRange:
+        """Lazy view of [start, end) over the chunks that overlap it."""
+        series = self.series_dir(symbol, interval)
+        chunks = self.manifest(symbol, interval)['chunks']
+        lo = int(_utc(start).timestamp()) if start is not None else None
+        hi = int(_utc(end).timestamp()) if end is not None else None
+        dirs = [series / label for label, meta in sorted(chunks.items())
+                if meta['rows'] and (lo is None or meta['last'] >= lo) and (hi is None or meta['first'] < hi)]
+        return ArchiveRange(dirs, start, end)
+
+    def read(self, symbol, interval, start=None, end=None) -> pd.DataFrame:
+        return self.open(symbol, interval, start, end).frame()
+
+
+# --- BULK LOADER ---
+class BulkLoader:
+    """
+    Fills a HistoryArchive from a page source, resumably.
+
+    The range is split into (symbol, month) chunks that run concurrently on
+    a thread pool; within a chunk pages are followed in order. Every page is
+    appended to <month>.part and the next page token saved to <month>.token
+    before asking for the following one, so an interrupted run picks each
+    chunk up where it stopped. A month is complete only once the whole
+    calendar month has been fetched and has closed; complete months are
+    skipped, partial ones resume from the high-water mark of what was
+    fetched before and merge with the bars already archived.
+    """
+
+    def __init__(self, archive: HistoryArchive, pages, max_workers=4, retries=3, backoff=1.0):
+        self.archive = archive
+        self.pages = pages
+        self.max_workers = int(max_workers)
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+
+    def _page(self, symbol, interval, start, end, token):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.pages(symbol, interval, start, end, token)
+            except FileNotFoundError:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"⚠️ {symbol} page retry {attempt + 1}/{self.retries}: {e}")
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _resume_from(self, meta, start, end):
+        """
+        Where fetching [start, end) has to begin given what the chunk already
+        holds: the previous high-water mark when the stored span covers
+        `start`, otherwise `start` itself. Returns (fetch_start, covered_from).
+        """
+        lo, hi = int(start.timestamp()), int(end.timestamp())
+        covered_from, until = meta.get('from'), meta.get('until')
+        if covered_from is None or until is None or not (covered_from <= lo <= until):
+            return start, lo
+        # Re-read from the last stored bar too, it may have still been forming
+        mark = min(until, meta['last']) if meta.get('last') is not None else until
+        return pd.Timestamp(min(max(lo, mark), hi), unit='s', tz='UTC'), covered_from
+
+    def _load_chunk(self, symbol, interval, label, start, end, month_end):
+        series = self.archive.series_dir(symbol, interval)
+        series.mkdir(parents=True, exist_ok=True)
+        part, token_path = series / f"{label}.part", series / f"{label}.token"
+        meta = self.archive.manifest(symbol, interval)['chunks'].get(label) or {}
+        fetch_start, covered_from = self._resume_from(meta, start, end)
+
+        span = [fetch_start.isoformat(), end.isoformat()]
+        state = json.loads(token_path.read_text()) if token_path.exists() and part.exists() else None
+        if state is None or state.get('span') != span:
+            part.unlink(missing_ok=True)
+            state = {'token': None, 'pages': 0, 'span': span}
+        elif state['token'] is not None:
+            logger.info(f"↩️ Resuming {symbol} {interval} {label} after page {state['pages']}")
+
+        while state['pages'] == 0 or state['token'] is not None:
+            records, next_token = parse_bar_page(self._page(symbol, interval, fetch_start, end, state['token']), symbol)
+            with open(part, 'ab') as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            state = {'token': next_token, 'pages': state['pages'] + 1, 'span': span}
+            token_path.with_suffix('.tmp').write_text(json.dumps(state))
+            os.replace(token_path.with_suffix('.tmp'), token_path)
+
+        # Stored bars first so re-fetched ones (and a page re-read after a crash) win the de-duplication
+        fetched = np.fromfile(part, dtype=BAR_DTYPE)
+        records = np.concatenate([self.archive.chunk_records(symbol, interval, label), fetched])
+        now = pd.Timestamp.now(tz='UTC')
+        until = int(min(end, now).timestamp())
+        stored_from, stored_until = meta.get('from'), meta.get('until')
+        if stored_from is not None and stored_until is not None and stored_from <= until and covered_from <= stored_until:
+            # Overlapping or adjacent spans merge; a disjoint one replaces the record, the gap between is unfetched
+            covered_from, until = min(covered_from, stored_from), max(until, stored_until)
+        month_start = int(start.normalize().replace(day=1).timestamp())
+        complete = covered_from <= month_start and until >= int(month_end.timestamp()) and month_end <= now
+        self.archive.write_chunk(symbol, interval, label, records, complete, (covered_from, until))
+        part.unlink(missing_ok=True)
+        token_path.unlink(missing_ok=True)
+        return len(fetched)
+
+    def load(self, symbols, interval, start, end=None):
+        """
+        Archives [start, end) of every symbol; returns {symbol: {'rows', 'chunks',
+        'skipped', 'failed'}}. Failed chunks keep their checkpoint for the next run.
+        """
+        if interval not in ALPACA_TIMEFRAMES:
+            raise ValueError(f"interval must be one of {list(ALPACA_TIMEFRAMES)}, got {interval!r}")
+        start = _utc(start)
+        end = _utc(end) if end is not None else pd.Timestamp.now(tz='UTC')
+        summary = {s: {'rows': 0, 'chunks': 0, 'skipped': 0, 'failed': 0} for s in symbols}
+        tasks = []
+        for symbol in symbols:
+            done = self.archive.manifest(symbol, interval)['chunks']
+            for label, chunk_start, chunk_end in month_chunks(start, end):
+                meta = done.get(label)
+                if meta and meta['complete']:
+                    summary[symbol]['skipped'] += 1
+                else:
+                    month_end = chunk_start.normalize().replace(day=1) + pd.offsets.MonthBegin(1)
+                    tasks.append((symbol, label, chunk_start, chunk_end, month_end))
+
+        logger.info(f"📚 Archiving {len(tasks)} month(s) of {interval} bars for {len(symbols)} symbol(s)...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="archive") as pool:
+            futures = {pool.submit(self._load_chunk, s, interval, label, a, b, m): (s, label)
+                       for s, label, a, b, m in tasks}
+            for future, (symbol, label) in futures.items():
+                try:
+                    summary[symbol]['rows'] += future.result()
+                    summary[symbol]['chunks'] += 1
+                except Exception as e:
+                    summary[symbol]['failed'] += 1
+                    logger.error(f"❌ Archive {symbol} {interval} {label} failed (resumable): {e}")
+        logger.info(f"✅ Archive pass done in {time.perf_counter() - started:.1f}s")
+        return summary
+
+
+def get_archive(config: dict) -> HistoryArchive:
+    return HistoryArchive(config.get('archive_dir'))
+
+
+def bulk_load(symbols, config: dict, interval="1m", start=None, end=None, years=2, pages=None):
+    """Archives `years` of history (or [start, end)) straight from Alpaca, or from `pages` when given."""
+    end = _utc(end) if end is not None else pd.Timestamp.now(tz='UTC')
+    start = _utc(start) if start is not None else end - pd.DateOffset(years=years)
+    loader = BulkLoader(get_archive(config), pages or AlpacaBarPages(config),
+                        max_workers=config.get('archive_workers', 4))
+    return loader.load(symbols, interval, start, end)
@@ -0,0 +1,72 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+from src.fetch_cache import next_bar_boundary
+
+# Column order of the packed candle block; dashboard.js decodes in this order
+HISTORY_COLUMNS = ['time', 'open', 'high', 'low', 'close']
+
+
+def encode_candles(symbol, df: pd.DataFrame) -> dict:
+    """
+    Packs candles as one little-endian float64 block, column after column.
+
+    Socket.IO ships the bytes as a binary attachment, so the browser gets an
+    ArrayBuffer it can wrap in a Float64Array without parsing any JSON.
+    Epoch seconds are exact in float64.
+    """
+    block = np.empty((len(HISTORY_COLUMNS), len(df)), dtype='<f8')
+    block[0] = pd.DatetimeIndex(df.index).as_unit('s').asi8
+    for row, col in enumerate(['Open', 'High', 'Low', 'Close'], start=1):
+        block[row] = df[col].to_numpy(dtype=float)
+    np.nan_to_num(block, copy=False)
+    return {'symbol': symbol, 'columns': HISTORY_COLUMNS, 'count': len(df), 'candles': block.tobytes()}
+
+
+class HistoryCache:
+    """
+    Per-symbol chart history, encoded once per new bar and shared by every client.
+
+    The live (still-forming) candle keeps flowing through chart_update, so the
+    cached block only has to be rebuilt when a new bar opens. A process that
+    does not scan itself (the web role) passes `expire_every` (seconds, the
+    bar size): entries then go stale when the next bar opens, so the next
+    request reloads instead of serving the first copy forever.
+    """
+
+    def __init__(self, lookback=pd.Timedelta(days=3), interval=None, overlays=None, expire_every=None):
+        self.lookback = lookback
+        self.interval = interval
+        self.overlays = overlays or {}  # name -> fn(close series); computed on all of `df`, sent for the window
+        self.expire_every = expire_every
+        self._entries = {}  # symbol -> (last bar timestamp, payload, expires at)
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry):
+        return entry is not None and (entry[2] is None or time.time() < entry[2])
+
+    def get(self, symbol):
+        with self._lock:
+            entry = self._entries.get(symbol)
+            return entry[1] if self._fresh(entry) else None
+
+    def update(self, symbol, df: pd.DataFrame):
+        """Returns the cached payload, re-encoding only if `df` ends on a newer bar."""
+        if df is None or df.empty:
+            return self.get(symbol)
+        last_ts = df.index[-1]
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if self._fresh(entry) and entry[0] >= last_ts:
+                return entry[1]
+        in_window = df.index >= last_ts - self.lookback
+        window = df[in_window]
+        payload = encode_candles(symbol, window)
+        payload['bucket'] = self.interval
+        payload['overlays'] = {name: fn(df['Close'])[in_window].to_numpy(dtype='<f8').tobytes()
+                               for name, fn in self.overlays.items()}
+        expires = next_bar_boundary(self.expire_every) if self.expire_every else None
+        with self._lock:
+            self._entries[symbol] = (last_ts, payload, expires)
+        return payload
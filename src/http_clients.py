@@ -0,0 +1,88 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from alpaca_trade_api.rest import REST
+
+logger = logging.getLogger(__name__)
+
+YAHOO_BASE_URL = "https://query2.finance.yahoo.com"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Chrome/131.0.0.0 Safari/537.36"
+
+
+class ClientRegistry:
+    """
+    Process-wide HTTP clients: one keep-alive requests.Session for market data
+    and one alpaca REST client per (key, secret, base_url).
+
+    Reusing them keeps TCP+TLS connections warm between scans instead of
+    handshaking on every call. Swap the registry with set_clients() to point
+    everything at a local stand-in server.
+    """
+
+    def __init__(self, pool_size=10, timeout=5, retries=0, yahoo_base_url=YAHOO_BASE_URL):
+        self.pool_size = int(pool_size)
+        self.timeout = float(timeout)
+        self.retries = int(retries)
+        self.yahoo_base_url = yahoo_base_url.rstrip('/')
+        self._session = None
+        self._rest = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict):
+        config = config or {}
+        return cls(pool_size=config.get('http_pool_size', 10),
+                   timeout=config.get('http_timeout', 5),
+                   retries=config.get('http_retries', 0),
+                   yahoo_base_url=config.get('yahoo_base_url', YAHOO_BASE_URL))
+
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                                      max_retries=self.retries)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({"User-Agent": USER_AGENT})
+                self._session = session
+            return self._session
+
+    def rest(self, key_id, secret_key, base_url, api_version='v2') -> REST:
+        """Shared alpaca REST client for this credential set (it keeps its own session)."""
+        cache_key = (key_id, secret_key, base_url, api_version)
+        with self._lock:
+            client = self._rest.get(cache_key)
+            if client is None:
+                client = REST(key_id=key_id, secret_key=secret_key, base_url=base_url, api_version=api_version)
+                self._rest[cache_key] = client
+            return client
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            self._rest.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_clients(config: dict = None) -> ClientRegistry:
+    """The shared registry, built from `config` on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry.from_config(config)
+            logger.info(f"🔌 HTTP pool ready (size={_registry.pool_size}, timeout={_registry.timeout}s)")
+        return _registry
+
+def set_clients(registry: ClientRegistry):
+    """Replaces the shared registry (e.g. with one aimed at a local test server)."""
+    global _registry
+    with _registry_lock:
+        if _registry is not None and _registry is not registry:
+            _registry.close()
+        _registry = registry
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 
-def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_indicators(df: pd.DataFrame, fast_window: int = 10, slow_window: int = 50, trend_window: int = 200) -> pd.DataFrame:
     # 1. FIX: Only convert OHLCV columns to float. 
     # This prevents the "BTC/USD" string conversion error
     numeric_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
@@ -11,9 +11,9 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
 
     # 2. MOVING AVERAGES (Trend MA Support)
     # Using min_periods=1 ensures indicators appear immediately
-    df['Fast_MA'] = df['Close'].rolling(window=10, min_periods=1).mean()
-    df['Slow_MA'] = df['Close'].rolling(window=50, min_periods=1).mean()
-    df['Trend_MA'] = df['Close'].rolling(window=200, min_periods=1).mean()
+    df['Fast_MA'] = df['Close'].rolling(window=fast_window, min_periods=1).mean()
+    df['Slow_MA'] = df['Close'].rolling(window=slow_window, min_periods=1).mean()
+    df['Trend_MA'] = df['Close'].rolling(window=trend_window, min_periods=1).mean()
 
     # 3. RSI
     delta = df['Close'].diff()
@@ -0,0 +1,320 @@
+import time
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from peewee import (SqliteDatabase, Model, AutoField, CharField, DoubleField,
+                    IntegerField, fn)
+from src.account_mirror import _key
+
+logger = logging.getLogger(__name__)
+
+
+# --- SCHEMA ---
+# The models below are unbound templates: every Journal binds its own copies (see
+# _bind), so two journals never write through each other's connection.
+# Timestamps are epoch seconds (float) so range queries are plain indexed comparisons.
+class SignalRecord(Model):
+    id = AutoField()
+    ts = DoubleField(index=True)
+    symbol = CharField(max_length=16)
+    signal = CharField(max_length=8)
+    regime = CharField(max_length=16)
+    confluence = IntegerField(default=0)
+    price = DoubleField()
+    sl_price = DoubleField(default=0)
+    tp_price = DoubleField(default=0)
+    rsi = DoubleField(default=0)
+    adx = DoubleField(default=0)
+    atr = DoubleField(default=0)
+
+    class Meta:
+        table_name = 'signals'
+        indexes = ((('symbol', 'ts'), False),)
+
+
+class FillRecord(Model):
+    id = AutoField()
+    ts = DoubleField(index=True)
+    symbol = CharField(max_length=16)
+    side = CharField(max_length=4)
+    qty = DoubleField()
+    price = DoubleField()
+    event = CharField(max_length=16, default='fill')
+    order_id = CharField(max_length=64, null=True)
+    client_order_id = CharField(max_length=64, null=True, index=True)
+
+    class Meta:
+        table_name = 'fills'
+        indexes = ((('symbol', 'ts'), False),)
+
+
+class TradeRecord(Model):
+    """One closed round trip (or the closed part of one), live or backtest."""
+    id = AutoField()
+    source = CharField(max_length=16, default='live')  # 'live' | 'backtest' | a backtest run name
+    symbol = CharField(max_length=16)
+    side = CharField(max_length=5)                     # 'LONG' | 'SHORT'
+    qty = DoubleField()
+    opened_at = DoubleField(null=True)
+    closed_at = DoubleField(index=True)
+    entry_price = DoubleField()
+    exit_price = DoubleField()
+    pnl = DoubleField()
+    outcome = CharField(max_length=8, null=True)      # 'TP' | 'SL' | None when unknown
+
+    class Meta:
+        table_name = 'trades'
+        indexes = ((('source', 'closed_at'), False), (('symbol', 'closed_at'), False))
+
+
+TABLES = [SignalRecord, FillRecord, TradeRecord]
+
+
+def _bind(db):
+    """Copies of TABLES bound to `db`, keyed by the template model."""
+    return {model: type(model.__name__, (model,), {
+        '__module__': model.__module__,
+        'Meta': type('Meta', (), {'database': db, 'table_name': model._meta.table_name}),
+    }) for model in TABLES}
+
+
+def _epoch(value):
+    """datetime / pandas Timestamp / ISO string / epoch number -> epoch seconds (float)."""
+    if value is None:
+        return time.time()
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if hasattr(value, 'timestamp'):
+        if getattr(value, 'tzinfo', None) is None and isinstance(value, datetime):
+            value = value.replace(tzinfo=timezone.utc)
+        return float(value.timestamp())
+    return float(value)
+
+
+class _RoundTrips:
+    """
+    Turns a stream of fills into closed trades, per symbol (average-cost basis).
+
+    Books are keyed like AccountMirror's positions, so a position seeded as
+    'BTCUSD' is closed by fills of 'BTC/USD' orders.
+    """
+
+    def __init__(self):
+        self.books = {}  # symbol key -> [signed qty, avg price, opened_at]
+
+    def seed(self, symbol, qty, avg_price, ts=None):
+        """Starts a book from a position that was already open when the journal started."""
+        self.books[_key(symbol)] = [float(qty), float(avg_price), ts]
+
+    def apply(self, symbol, side, qty, price, ts):
+        signed = qty if side == 'buy' else -qty
+        book = self.books.setdefault(_key(symbol), [0.0, 0.0, ts])
+        held, avg, opened = book
+        closed = []
+        if held and (held > 0) != (signed > 0):
+            # Reduces (or flips) the position: the overlapping part is realized
+            size = min(abs(held), abs(signed))
+            direction = 1 if held > 0 else -1
+            closed.append({'symbol': symbol, 'side': 'LONG' if direction > 0 else 'SHORT', 'qty': size,
+                           'opened_at': opened, 'closed_at': ts, 'entry_price': avg, 'exit_price': price,
+                           'pnl': (price - avg) * size * direction})
+            held += signed
+            if abs(held) < 1e-12:
+                held = 0.0
+            elif (held > 0) == (signed > 0):
+                avg, opened = price, ts  # Flipped: the remainder opens a new position
+        else:
+            total = held + signed
+            avg = (avg * held + price * signed) / total if total else price
+            opened = opened if held else ts
+            held = total
+        book[:] = [held, avg, opened]
+        return closed
+
+
+class Journal:
+    """
+    Signal, fill and trade history in SQLite (WAL) through peewee.
+
+    record_*() only enqueue; one writer thread drains the queue and inserts
+    in batches of up to `batch_size` rows per transaction, so the scan path
+    and the trade-update stream never wait on disk. Queries read through
+    indexes on time (and symbol / source), so P/L, win rate and drawdown over
+    a range never load the whole table.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=0.5, max_queue=100000):
+        self.path = str(path)
+        self.db = SqliteDatabase(self.path, pragmas={
+            'journal_mode': 'wal', 'synchronous': 'normal', 'cache_size': -16000, 'foreign_keys': 0})
+        self.models = _bind(self.db)
+        self.db.create_tables(list(self.models.values()), safe=True)
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._round_trips = _RoundTrips()
+        self._last_signal = {}  # symbol -> (signal, bar ts) last journaled
+        self._writer = threading.Thread(target=self._run, daemon=True, name="journal-writer")
+        self._writer.start()
+
+    # --- NON-BLOCKING APPENDS ---
+    def _put(self, model, row):
+        try:
+            self._queue.put_nowait((model, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def record_signal(self, symbol, analysis, bar_ts=None):
+        """Journals a signal when it changes, or once per bar while it stays BUY/SELL."""
+        signal = analysis.get('signal', 'HOLD')
+        key = (signal, bar_ts)
+        previous = self._last_signal.get(symbol)
+        if previous is not None and (previous[0] == signal and (signal == 'HOLD' or previous == key)):
+            return False
+        self._last_signal[symbol] = key
+        self._put(SignalRecord, {
+            'ts': time.time(), 'symbol': symbol, 'signal': signal,
+            'regime': analysis.get('regime', ''), 'confluence': int(analysis.get('confluence', 0)),
+            'price': float(analysis.get('entry_price', 0)), 'sl_price': float(analysis.get('sl_price', 0)),
+            'tp_price': float(analysis.get('tp_price', 0)), 'rsi': float(analysis.get('rsi', 0)),
+            'adx': float(analysis.get('adx', 0)), 'atr': float(analysis.get('atr', 0)),
+        })
+        return True
+
+    def record_fill(self, symbol, side, qty, price, ts=None, event='fill', order_id=None, client_order_id=None):
+        """Journals one fill and any round trip it closes."""
+        ts, qty, price = _epoch(ts), float(qty), float(price)
+        self._put(FillRecord, {'ts': ts, 'symbol': symbol, 'side': side, 'qty': qty, 'price': price,
+                               'event': event, 'order_id': order_id, 'client_order_id': client_order_id})
+        for trade in self._round_trips.apply(symbol, side, qty, price, ts):
+            self._put(TradeRecord, dict(trade, source='live'))
+
+    def seed_positions(self, positions):
+        """Seeds the round-trip books from AccountMirror.positions so pre-existing positions close correctly."""
+        for p in positions.values():
+            self._round_trips.seed(p['symbol'], p['qty'], p['avg_entry_price'])
+
+    def record_trades(self, trades, source='backtest', symbol=''):
+        """Journals the closed trades of a run_backtest() result; still-open ones are skipped."""
+        for t in trades:
+            if t.get('outcome') == 'OPEN' or t.get('exit_time') is None:
+                continue
+            self._put(TradeRecord, {
+                'source': source, 'symbol': t.get('symbol', symbol), 'side': t['side'],
+                'qty': float(t.get('qty', 1.0)), 'opened_at': _epoch(t['entry_time']) if t.get('entry_time') is not None else None,
+                'closed_at': _epoch(t['exit_time']), 'entry_price': float(t['entry_price']),
+                'exit_price': float(t['exit_price']), 'pnl': float(t['pnl']), 'outcome': t.get('outcome'),
+            })
+
+    # --- WRITER ---
+    def _collect(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, batch):
+        by_model = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+        with self.db.atomic():
+            for model, rows in by_model.items():
+                self.models[model].insert_many(rows).execute()
+        return len(batch)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._collect(first)
+            try:
+                self._drain(batch)
+            except Exception as e:
+                logger.error(f"❌ Journal Write Failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything queued so far is on disk (tests, shutdown, backtests)."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    # --- QUERIES ---
+    @staticmethod
+    def _range(query, column, start, end):
+        if start is not None:
+            query = query.where(column >= _epoch(start))
+        if end is not None:
+            query = query.where(column < _epoch(end))
+        return query
+
+    def signals(self, symbol=None, start=None, end=None, limit=500):
+        Signal = self.models[SignalRecord]
+        query = self._range(Signal.select(), Signal.ts, start, end)
+        if symbol:
+            query = query.where(Signal.symbol == symbol)
+        return list(query.order_by(Signal.ts.desc()).limit(limit).dicts())
+
+    def trades(self, symbol=None, start=None, end=None, source='live', limit=500):
+        Trade = self.models[TradeRecord]
+        query = self._range(Trade.select(), Trade.closed_at, start, end)
+        if symbol:
+            query = query.where(Trade.symbol == symbol)
+        if source:
+            query = query.where(Trade.source == source)
+        return list(query.order_by(Trade.closed_at.desc()).limit(limit).dicts())
+
+    def performance(self, symbol=None, start=None, end=None, source='live', starting_equity=0.0):
+        """
+        P/L, win rate and max drawdown of closed trades in [start, end).
+
+        Counts and sums are aggregated in SQL; the drawdown walk streams only
+        the pnl column in close order.
+        """
+        Trade = self.models[TradeRecord]
+
+        def scoped(query):
+            query = self._range(query, Trade.closed_at, start, end)
+            if symbol:
+                query = query.where(Trade.symbol == symbol)
+            if source:
+                query = query.where(Trade.source == source)
+            return query
+
+        totals = scoped(Trade.select(
+            fn.COUNT(Trade.id), fn.SUM(Trade.pnl),
+            fn.SUM((Trade.pnl > 0).cast('INTEGER')),
+            fn.SUM(fn.MAX(Trade.pnl, 0)), fn.SUM(fn.MIN(Trade.pnl, 0)))).tuples().get()
+        count, net, wins, gross_profit, gross_loss = (v or 0 for v in totals)
+
+        equity = peak = float(starting_equity)
+        max_drawdown = max_drawdown_pct = 0.0
+        pnls = scoped(Trade.select(Trade.pnl)).order_by(Trade.closed_at).tuples()
+        for (pnl,) in pnls.iterator():
+            equity += pnl
+            peak = max(peak, equity)
+            drawdown = peak - equity
+            if drawdown > max_drawdown:
+                max_drawdown = drawdown
+                # Only meaningful against a real account size
+                max_drawdown_pct = drawdown / peak * 100 if starting_equity > 0 and peak > 0 else 0.0
+
+        return {
+            'trades': count, 'wins': wins, 'losses': count - wins,
+            'win_rate': round(wins / count * 100, 2) if count else 0.0,
+            'net_pnl': round(net, 2), 'gross_profit': round(gross_profit, 2), 'gross_loss': round(gross_loss, 2),
+            'profit_factor': round(gross_profit / -gross_loss, 2) if gross_loss else None,
+            'max_drawdown': round(max_drawdown, 2), 'max_drawdown_pct': round(max_drawdown_pct, 2),
+        }
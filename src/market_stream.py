@@ -0,0 +1,147 @@
+import json
+import time
+import logging
+import threading
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def interval_seconds(interval: str) -> int:
+    """'1m' -> 60, '5m' -> 300, '1h' -> 3600."""
+    units = {'m': 60, 'h': 3600, 'd': 86400}
+    return int(interval[:-1]) * units[interval[-1].lower()]
+
+
+class BarAggregator:
+    """
+    Folds trades into OHLCV bars for one interval, per symbol.
+
+    add_trade() returns the bar it touched plus the bar it closed (if the
+    trade opened a new bucket). Late trades for an already-closed bucket are
+    dropped; the backfill path owns history.
+
+    Bars close on the next trade, not on the clock: a bucket is only
+    reported closed once a trade for a later bucket arrives. An illiquid
+    symbol's last bar therefore stays open (and is never emitted with
+    closed=True) until it trades again; the scanner's REST/bar-store
+    repair path is what eventually settles such a bar.
+    """
+
+    def __init__(self, interval: str):
+        self.interval = interval
+        self.seconds = interval_seconds(interval)
+        self.bars = {}  # symbol -> open bar dict
+
+    def add_trade(self, symbol, ts, price, size):
+        bucket = int(ts // self.seconds) * self.seconds
+        bar = self.bars.get(symbol)
+        closed = None
+        if bar is not None and bucket < bar['bucket']:
+            return None, None
+        if bar is None or bucket > bar['bucket']:
+            closed = bar
+            bar = {'bucket': bucket, 'time': pd.Timestamp(bucket, unit='s', tz='UTC'),
+                   'Open': price, 'High': price, 'Low': price, 'Close': price, 'Volume': 0.0}
+            self.bars[symbol] = bar
+        bar['High'] = max(bar['High'], price)
+        bar['Low'] = min(bar['Low'], price)
+        bar['Close'] = price
+        bar['Volume'] += size
+        return dict(bar), closed
+
+
+class MarketStream:
+    """
+    Runs a trade feed on a daemon thread and aggregates it into bars.
+
+    `on_bar(symbol, interval, bar, closed)` fires for every bar a trade updates
+    (closed=False) and once more when the bar is superseded (closed=True),
+    i.e. when the symbol's next trade lands in a later bucket.
+    It is called on the feed's thread, so hand work off rather than doing it
+    inline.
+    """
+
+    def __init__(self, feed, intervals=('1m', '5m'), on_bar=None):
+        self.feed = feed
+        self.aggregators = [BarAggregator(i) for i in intervals]
+        self.on_bar = on_bar
+        self.trades = 0
+        self.last_message = None
+
+    def handle_trade(self, symbol, ts, price, size):
+        self.trades += 1
+        self.last_message = time.time()
+        for agg in self.aggregators:
+            bar, closed = agg.add_trade(symbol, ts, float(price), float(size))
+            if self.on_bar is None or bar is None:
+                continue
+            if closed is not None:
+                self.on_bar(symbol, agg.interval, closed, True)
+            self.on_bar(symbol, agg.interval, bar, False)
+
+    def start(self):
+        thread = threading.Thread(target=self._run, daemon=True, name="market-stream")
+        thread.start()
+        return thread
+
+    def _run(self):
+        try:
+            self.feed.run(self.handle_trade)
+        except Exception as e:
+            logger.error(f"❌ Market Stream Stopped: {e}")
+
+
+class RecordedFeed:
+    """
+    Replays Alpaca-format trade messages from a JSONL file.
+
+    Each line looks like {"T": "t", "S": "BTC/USD", "p": 97000.5, "s": 0.01,
+    "t": "2026-01-05T14:30:00.123Z"}; other message types are skipped.
+    `speed` > 0 sleeps out the recorded gaps divided by that factor.
+    """
+
+    def __init__(self, path, speed=0):
+        self.path = path
+        self.speed = float(speed)
+
+    def run(self, on_trade):
+        previous = None
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                msg = json.loads(line)
+                if msg.get('T') != 't':
+                    continue
+                ts = pd.Timestamp(msg['t']).timestamp()
+                if self.speed > 0 and previous is not None and ts > previous:
+                    time.sleep((ts - previous) / self.speed)
+                previous = ts
+                on_trade(msg['S'], ts, msg['p'], msg.get('s', 0.0))
+
+
+class AlpacaTradeFeed:
+    """Live trades from Alpaca's market-data websocket (crypto and stocks)."""
+
+    def __init__(self, key_id, secret_key, symbols):
+        self.key_id = key_id
+        self.secret_key = secret_key
+        self.symbols = list(symbols)
+
+    def run(self, on_trade):
+        from alpaca_trade_api.stream import Stream
+        stream = Stream(self.key_id, self.secret_key)
+
+        async def handler(trade):
+            ts = pd.Timestamp(trade.timestamp).timestamp()
+            on_trade(trade.symbol, ts, trade.price, trade.size)
+
+        crypto = [s for s in self.symbols if '/' in s]
+        stocks = [s for s in self.symbols if '/' not in s]
+        if crypto:
+            stream.subscribe_crypto_trades(handler, *crypto)
+        if stocks:
+            stream.subscribe_trades(handler, *stocks)
+        stream.run()
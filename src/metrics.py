@@ -0,0 +1,273 @@
+import io
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond indicator steps up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram, rendered with cumulative buckets like Prometheus expects."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self, **labels):
+        """(count, sum) for one label set."""
+        entry = self._values.get(self._key(labels))
+        return (entry[2], entry[1]) if entry else (0, 0.0)
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', repr(bound)))} {running}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus the Prometheus text exposition of all of them."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageProfiler:
+    """
+    Optional cProfile hook around pipeline stages, switchable at runtime.
+
+    Disabled, profiled() costs one attribute check. Enabled, every
+    `sample_every`-th call per stage runs under cProfile and the results
+    are merged into one pstats report. Only one sample is taken at a time
+    (the interpreter allows a single active profiler), so overlapping or
+    nested stages simply go unsampled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_every = 1
+        self._calls = {}
+        self._stats = None
+        self._samples = 0
+        self._active = False
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, sample_every=None, reset=False):
+        with self._lock:
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            if sample_every is not None:
+                self.sample_every = max(1, int(sample_every))
+            if reset:
+                self._stats, self._samples, self._calls = None, 0, {}
+        logger.info(f"🔬 Profiler {'ON' if self.enabled else 'OFF'} (1 in {self.sample_every} calls).")
+        return self.status()
+
+    def status(self):
+        return {'enabled': self.enabled, 'sample_every': self.sample_every, 'samples': self._samples}
+
+    def _should_sample(self, stage):
+        with self._lock:
+            n = self._calls.get(stage, 0)
+            self._calls[stage] = n + 1
+            if self._active or n % self.sample_every:
+                return False
+            self._active = True
+            return True
+
+    @contextmanager
+    def profiled(self, stage):
+        if not self.enabled or not self._should_sample(stage):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Some other profiler (a debugger, py-spy in-process, ...) owns the hook
+            self._active = False
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._active = False
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+                self._samples += 1
+
+    def report(self, sort='cumulative', limit=40):
+        """Top `limit` functions of everything sampled so far, as text."""
+        with self._lock:
+            if self._stats is None:
+                return "No profile samples yet.\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class StartupTimer:
+    """Seconds from process start to each boot milestone; the first mark of a phase wins."""
+
+    def __init__(self, t0=None, gauge=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.gauge = gauge
+        self.marks = {}
+
+    def mark(self, phase):
+        if phase in self.marks:
+            return False
+        elapsed = time.perf_counter() - self.t0
+        self.marks[phase] = elapsed
+        if self.gauge is not None:
+            self.gauge.set(round(elapsed, 4), phase=phase)
+        return True
+
+    def report(self):
+        """One line per milestone, in the order they were reached, with the gap since the previous one."""
+        lines, previous = [], 0.0
+        for phase, elapsed in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"   {phase:<18} {elapsed:7.3f}s  (+{elapsed - previous:.3f}s)")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+# --- SHARED INSTRUMENTS ---
+REGISTRY = MetricsRegistry()
+PROFILER = StageProfiler()
+
+STAGE_SECONDS = REGISTRY.histogram('sniper_stage_seconds', 'Wall time per pipeline stage.', ('stage',))
+STAGE_ERRORS = REGISTRY.counter('sniper_stage_errors_total', 'Exceptions raised per pipeline stage.', ('stage',))
+DATA_SOURCE = REGISTRY.counter('sniper_data_source_total', 'Market data fetch results by source (yahoo, alpaca, none).', ('source',))
+SCAN_LAG = REGISTRY.histogram('sniper_scan_lag_seconds', 'How late a scanner tick or streamed bar was picked up.', ('mode',))
+SCAN_SKIPPED = REGISTRY.counter('sniper_scan_skipped_total', 'Scans skipped because the previous one for the symbol was still running.')
+GAUGES = REGISTRY.gauge('sniper_state', 'Point-in-time scanner state.', ('name',))
+STARTUP_SECONDS = REGISTRY.gauge('sniper_startup_seconds', 'Seconds from process start to each boot milestone.', ('phase',))
+
+
+@contextmanager
+def timed(stage):
+    """Records the wall time of the block under `stage` (and profiles it when the hook is on)."""
+    start = time.perf_counter()
+    try:
+        with PROFILER.profiled(stage):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
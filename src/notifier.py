@@ -0,0 +1,241 @@
+import time
+import queue
+import logging
+import threading
+from src.http_clients import get_clients
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS = REGISTRY.counter('sniper_notifications_total',
+                                 'Notifications by channel and result (sent, deduped, dropped, retried, failed).',
+                                 ('channel', 'result'))
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MAX_CHARS = 4096
+PLACEHOLDERS = ('', 'YOUR_TOKEN_HERE', 'YOUR_ID_HERE')
+
+
+class RetryAfter(Exception):
+    """The channel asked us to wait `seconds` before the next attempt (HTTP 429)."""
+
+    def __init__(self, seconds):
+        super().__init__(f"retry after {seconds}s")
+        self.seconds = float(seconds)
+
+
+class TelegramChannel:
+    """Bot API sendMessage; `base_url` can point at a local stand-in server."""
+    name = 'telegram'
+    max_chars = TELEGRAM_MAX_CHARS
+
+    def __init__(self, token, chat_id, config=None, base_url=TELEGRAM_API_URL):
+        self.url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.config = config or {}
+
+    def send(self, text):
+        clients = get_clients(self.config)
+        try:
+            response = clients.session().post(self.url, timeout=clients.timeout, json={
+                'chat_id': self.chat_id, 'text': text, 'disable_web_page_preview': True})
+        except Exception as e:
+            # requests puts the URL, and with it the bot token, in its messages
+            raise ConnectionError(f"Telegram unreachable ({type(e).__name__})") from None
+        if response.status_code == 429:
+            retry_after = 1.0
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after', retry_after)
+            except ValueError:
+                pass
+            raise RetryAfter(retry_after)
+        if response.status_code >= 400:
+            raise ConnectionError(f"Telegram HTTP {response.status_code}")
+
+
+class RateLimiter:
+    """Token bucket: `rate` sends per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def wait_time(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            delay = self.wait_time()
+            if delay <= 0:
+                self.tokens -= 1
+                return
+            time.sleep(delay)
+
+
+class _ChannelWorker:
+    """One channel's bounded queue, rate limiter and sender thread."""
+
+    def __init__(self, channel, max_queue, batch_window, max_batch, rate, burst, retries, backoff):
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.limiter = RateLimiter(rate, burst)
+        self.batch_window, self.max_batch = float(batch_window), int(max_batch)
+        self.retries, self.backoff = int(retries), float(backoff)
+        self.sent = self.failed = self.dropped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"notify-{channel.name}")
+        self._thread.start()
+
+    def offer(self, text):
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            NOTIFICATIONS.inc(channel=self.channel.name, result='dropped')
+            return False
+
+    def _collect(self, first):
+        """Everything that arrives within `batch_window` of the first message, up to `max_batch`."""
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _messages(self, batch):
+        """Joins a burst into as few messages as the channel's size limit allows."""
+        messages, current = [], ''
+        for text in batch:
+            text = text[:self.channel.max_chars]
+            if current and len(current) + 2 + len(text) > self.channel.max_chars:
+                messages.append(current)
+                current = text
+            else:
+                current = f"{current}\n\n{text}" if current else text
+        if current:
+            messages.append(current)
+        return messages
+
+    def _deliver(self, message, count):
+        name = self.channel.name
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                self.channel.send(message)
+                self.sent += count
+                NOTIFICATIONS.inc(count, channel=name, result='sent')
+                return True
+            except Exception as e:
+                if attempt == self.retries:
+                    self.failed += count
+                    NOTIFICATIONS.inc(count, channel=name, result='failed')
+                    logger.error(f"❌ {name} notification failed after {attempt + 1} attempts: {e}")
+                    return False
+                NOTIFICATIONS.inc(channel=name, result='retried')
+                delay = e.seconds if isinstance(e, RetryAfter) else self.backoff * 2 ** attempt
+                logger.warning(f"⚠️ {name} notification retry {attempt + 1}/{self.retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _run(self):
+        while True:
+            batch = self._collect(self.queue.get())
+            for message in self._messages(batch):
+                self._deliver(message, message.count('\n\n') + 1)
+            for _ in batch:
+                self.queue.task_done()
+
+
+class Notifier:
+    """
+    Fire-and-forget notifications for signals and fills.
+
+    notify() only checks the dedup table and enqueues, so the scan path and
+    the trade-update stream never wait on the network. Each channel has its
+    own bounded queue and sender thread: bursts arriving within
+    `batch_window` seconds go out as one message, sends are held to `rate`
+    per second (bursts of `burst`), and failures retry with exponential
+    backoff (or the channel's Retry-After). A full queue drops the message
+    and counts it rather than blocking.
+    """
+
+    def __init__(self, channels, max_queue=500, batch_window=2.0, max_batch=20, rate=1 / 3, burst=3,
+                 retries=4, backoff=1.0, dedup_ttl=6 * 3600):
+        self.dedup_ttl = float(dedup_ttl)
+        self._seen = {}  # dedup key -> time it was first sent
+        self._lock = threading.Lock()
+        self.workers = [_ChannelWorker(c, max_queue, batch_window, max_batch, rate, burst, retries, backoff)
+                        for c in channels]
+
+    def _first_time(self, key):
+        now = time.time()
+        with self._lock:
+            if len(self._seen) > 10000:
+                self._seen = {k: t for k, t in self._seen.items() if now - t < self.dedup_ttl}
+            seen = self._seen.get(key)
+            if seen is not None and now - seen < self.dedup_ttl:
+                return False
+            self._seen[key] = now
+            return True
+
+    def notify(self, text, key=None):
+        """Queues `text` on every channel; False when it was a duplicate of `key` or nothing took it."""
+        if key is not None and not self._first_time(key):
+            for worker in self.workers:
+                NOTIFICATIONS.inc(channel=worker.channel.name, result='deduped')
+            return False
+        return any([worker.offer(text) for worker in self.workers])
+
+    def signal(self, symbol, analysis, bar_ts=None):
+        """BUY/SELL signals, once per symbol, side and bar."""
+        signal = analysis.get('signal', 'HOLD')
+        if signal not in ('BUY', 'SELL'):
+            return False
+        icon = '🟢' if signal == 'BUY' else '🔴'
+        text = (f"{icon} {signal} {symbol} @ {analysis.get('entry_price', 0)}\n"
+                f"SL {analysis.get('sl_price', 0)} | TP {analysis.get('tp_price', 0)} | "
+                f"{analysis.get('regime', '')} | Confluence {analysis.get('confluence', 0)}%")
+        return self.notify(text, key=('signal', symbol, signal, bar_ts))
+
+    def fill(self, symbol, side, qty, price, event='fill', order_id=None):
+        """Order fills and partial fills, once per order / event / filled quantity."""
+        text = f"✅ {event.replace('_', ' ').upper()}: {side.upper()} {qty} {symbol} @ {price}"
+        return self.notify(text, key=('fill', order_id, event, str(qty)) if order_id else None)
+
+    def flush(self, timeout=10.0):
+        """Blocks until every queue is drained (tests, shutdown)."""
+        deadline = time.time() + timeout
+        while any(w.queue.unfinished_tasks for w in self.workers) and time.time() < deadline:
+            time.sleep(0.01)
+
+    def stats(self):
+        return {w.channel.name: {'queued': w.queue.qsize(), 'sent': w.sent, 'failed': w.failed, 'dropped': w.dropped}
+                for w in self.workers}
+
+
+def make_notifier(config: dict):
+    """Notifier for the channels enabled in config.json, or None when none is."""
+    channels = []
+    token = config.get('telegram_bot_token') or config.get('telegram_token')
+    chat_id = config.get('telegram_chat_id')
+    if config.get('telegram_enabled'):
+        if token in PLACEHOLDERS or chat_id in PLACEHOLDERS or not token or not chat_id:
+            logger.warning("⚠️ Telegram enabled but telegram_token / telegram_chat_id are not set.")
+        else:
+            channels.append(TelegramChannel(token, chat_id, config, config.get('telegram_api_url', TELEGRAM_API_URL)))
+    if not channels:
+        return None
+    return Notifier(channels,
+                    batch_window=config.get('notify_batch_seconds', 2.0),
+                    rate=config.get('notify_per_minute', 20) / 60.0,
+                    retries=config.get('notify_retries', 4))
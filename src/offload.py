@@ -0,0 +1,57 @@
+import logging
+import eventlet
+from eventlet import tpool
+from src.metrics import SCAN_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+
+class Offloader:
+    """
+    Runs CPU-bound scan work on eventlet's OS thread pool (tpool).
+
+    pandas/numpy code never yields to the hub, so running it in a green thread
+    stalls heartbeats, page loads and emits for every client. Here only the
+    calling green thread waits; the hub keeps serving.
+
+    Backpressure: at most `max_in_flight` jobs run at once (submit() blocks
+    the caller while the pool is full), and a key whose previous job is still
+    running is skipped rather than queued behind it.
+    """
+
+    def __init__(self, max_in_flight=4):
+        self.pool = eventlet.GreenPool(max_in_flight)
+        self.busy = set()
+        self.skipped = 0
+
+    def execute(self, fn, *args, **kwargs):
+        """Runs `fn` on a worker thread and returns its result to this green thread."""
+        return tpool.execute(fn, *args, **kwargs)
+
+    def submit(self, key, fn, *args, callback=None):
+        """
+        Schedules `fn(*args)` for `key`; `callback(result)` runs back on the hub.
+        Returns False if the previous job for `key` has not finished yet.
+        """
+        if key in self.busy:
+            self.skipped += 1
+            SCAN_SKIPPED.inc()
+            logger.warning(f"⏳ {key}: previous scan still running, skipping this tick.")
+            return False
+        self.busy.add(key)
+
+        def job():
+            try:
+                result = tpool.execute(fn, *args)
+                if callback:
+                    callback(result)
+            except Exception as e:
+                logger.error(f"Offloaded Job Error ({key}): {e}")
+            finally:
+                self.busy.discard(key)
+
+        self.pool.spawn_n(job)
+        return True
+
+    def waitall(self):
+        self.pool.waitall()
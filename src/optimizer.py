@@ -0,0 +1,133 @@
+import os
+import itertools
+import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from src.indicator_calculator import calculate_indicators
+from src.backtest_engine import compute_signals, simulate_trades, MIN_BARS
+from src.shared_bars import SharedBars, attach_bars
+
+logger = logging.getLogger(__name__)
+
+# Sweepable MA windows (calculate_indicators); every other key goes to the Fusion Engine
+WINDOW_PARAMS = {'fast_window': ('Fast_MA', 10), 'slow_window': ('Slow_MA', 50), 'trend_window': ('Trend_MA', 200)}
+
+# Per-process state, filled once by _init_worker
+_WORKER = {}
+
+
+def param_grid(grid: dict):
+    """{'adx_trending': [20, 25], 'sl_atr_mult': [1.5, 2]} -> list of every combination."""
+    keys = list(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def walk_forward_splits(n_bars, train_bars, test_bars, step=None, warmup=MIN_BARS):
+    """Rolling ((train_start, train_end), (test_start, test_end)) bar ranges."""
+    step = step or test_bars
+    splits = []
+    start = warmup
+    while start + train_bars + test_bars <= n_bars:
+        train = (start, start + train_bars)
+        splits.append((train, (train[1], train[1] + test_bars)))
+        start += step
+    return splits
+
+
+def _metrics(result):
+    start = result['starting_balance']
+    curve = np.array([start] + [t['balance'] for t in result['trades']])
+    peaks = np.maximum.accumulate(curve)
+    trades = result['trade_count']
+    return {
+        'return_pct': round(float(result['final_balance'] / start - 1) * 100, 4),
+        'trade_count': trades,
+        'win_rate': round(result['wins'] / trades * 100, 2) if trades else 0.0,
+        'max_drawdown_pct': round(float(((peaks - curve) / peaks).max()) * 100, 4),
+    }
+
+
+def _init_worker(spec):
+    """Attach the shared bars and compute the parameter-independent indicators once."""
+    shm, bars = attach_bars(spec)
+    _WORKER['shm'] = shm
+    _WORKER['base'] = calculate_indicators(bars.copy())
+    _WORKER['ma_cache'] = {}
+
+
+def _frame_for(params):
+    """Base indicator frame with only the swept MA columns swapped in (cached per window)."""
+    frame = _WORKER['base']
+    overrides = {}
+    for key, (column, default) in WINDOW_PARAMS.items():
+        window = int(params.get(key, default))
+        if window == default:
+            continue
+        cache = _WORKER['ma_cache']
+        if window not in cache:
+            cache[window] = frame['Close'].rolling(window=window, min_periods=1).mean()
+        overrides[column] = cache[window]
+    return frame.assign(**overrides) if overrides else frame
+
+
+def _evaluate(task):
+    params, windows = task
+    frame = _frame_for(params)
+    strategy = {k: v for k, v in params.items() if k not in WINDOW_PARAMS}
+    signals = compute_signals(frame, strategy)
+    scores = []
+    for start, end in windows:
+        result = simulate_trades(frame.iloc[start:end], signals.iloc[start:end], start=0)
+        scores.append(_metrics(result))
+    return params, scores
+
+
+def _run_pool(df, tasks, processes):
+    processes = processes or os.cpu_count() or 1
+    with SharedBars(df) as shared:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            chunksize = max(1, len(tasks) // (processes * 4))
+            return list(pool.map(_evaluate, tasks, chunksize=chunksize))
+
+
+def sweep(df, grid: dict, windows=None, processes=None):
+    """
+    Backtests every combination in `grid` across a process pool.
+
+    `df` is a raw OHLCV frame; it is placed in shared memory once and each
+    worker derives indicators from it itself. `windows` is a list of
+    (start, end) bar ranges to score (default: everything after warm-up).
+    Returns [{'params': ..., 'scores': [metrics per window]}].
+    """
+    windows = windows or [(MIN_BARS, len(df))]
+    tasks = [(params, windows) for params in param_grid(grid)]
+    logger.info(f"🧪 Sweeping {len(tasks)} parameter sets over {len(windows)} window(s)...")
+    return [{'params': params, 'scores': scores} for params, scores in _run_pool(df, tasks, processes)]
+
+
+def walk_forward(df, grid: dict, train_bars, test_bars, step=None, processes=None, metric='return_pct'):
+    """
+    Walk-forward optimization: for each fold pick the best `metric` on the
+    train window and report how that parameter set did on the following
+    unseen test window.
+    """
+    splits = walk_forward_splits(len(df), train_bars, test_bars, step)
+    if not splits:
+        raise ValueError("Not enough bars for a single train/test fold")
+    windows = [w for split in splits for w in split]
+    results = sweep(df, grid, windows=windows, processes=processes)
+
+    folds = []
+    compounded = 1.0
+    for k, (train, test) in enumerate(splits):
+        best = max(results, key=lambda r: r['scores'][2 * k][metric])
+        test_score = best['scores'][2 * k + 1]
+        compounded *= 1 + test_score['return_pct'] / 100
+        folds.append({
+            'train': train, 'test': test, 'params': best['params'],
+            'train_score': best['scores'][2 * k], 'test_score': test_score
+        })
+        logger.info(f"📈 Fold {k + 1}/{len(splits)}: {best['params']} | "
+                    f"train {metric}={best['scores'][2 * k][metric]} | test return={test_score['return_pct']}%")
+
+    return {'folds': folds, 'test_return_pct': round((compounded - 1) * 100, 4)}
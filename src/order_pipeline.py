@@ -0,0 +1,267 @@
+import re
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.metrics import timed
+from src.account_mirror import _key
+
+logger = logging.getLogger(__name__)
+
+# Local order states
+PENDING, ACCEPTED, FILLED, FAILED, CANCELED = 'pending', 'accepted', 'filled', 'failed', 'canceled'
+LIVE = (ACCEPTED, FILLED)
+# Broker order statuses that mean the order is not (or no longer) working
+BROKER_DEAD = ('rejected', 'canceled', 'expired', 'done_for_day')
+# Alpaca's refusal when the position qty is already held by another open exit order
+QTY_RESERVED = re.compile(r"insufficient (balance|qty)", re.IGNORECASE)
+
+
+def is_qty_reserved(error):
+    return bool(error) and QTY_RESERVED.search(str(error)) is not None
+
+
+def make_order_group_id(symbol, side, bar_ts=None, signal_id=None):
+    """
+    Deterministic id for one trade setup, from the signal's identity.
+
+    The same signal (symbol, side, the bar it fired on and its signal id)
+    always hashes to the same id, however late a retry is sent, so every
+    leg's client_order_id repeats and Alpaca rejects the duplicate instead
+    of opening a second position. Distinct signals never share an id.
+    """
+    if bar_ts is None and signal_id is None:
+        raise ValueError("order group id needs the signal's bar timestamp or signal_id")
+    raw = f"{symbol}|{side}|{bar_ts}|{signal_id}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+class OrderPipeline:
+    """
+    Submits the legs of a trade with deterministic client_order_ids.
+
+    The entry goes first; the protective legs follow one at a time once the
+    entry has filled. Every leg is retried idempotently (a failed submit is
+    checked against get_order_by_client_order_id before resending), and
+    each leg's state lives in a local table keyed by client_order_id.
+    """
+
+    def __init__(self, api, max_workers=4, retries=2, backoff=0.25, fill_timeout=10.0, poll_interval=0.25):
+        self.api = api
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.fill_timeout = float(fill_timeout)
+        self.poll_interval = float(poll_interval)
+        self.orders = {}    # client_order_id -> state dict
+        self.deferred = {}  # group_id -> exit leg worked client-side (see place_manual_bracket)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-leg")
+
+    # --- STATE TABLE ---
+    def _set(self, client_order_id, **fields):
+        with self._lock:
+            state = self.orders.setdefault(client_order_id, {'client_order_id': client_order_id, 'status': PENDING, 'attempts': 0})
+            state.update(fields, updated=time.time())
+            return dict(state)
+
+    def status(self, client_order_id):
+        with self._lock:
+            state = self.orders.get(client_order_id)
+            return dict(state) if state else None
+
+    def on_trade_update(self, data):
+        """Updates the table from a trade-updates stream event."""
+        order = getattr(data, 'order', None) or {}
+        cid = order.get('client_order_id')
+        if not cid or cid not in self.orders:
+            return
+        event = data.event
+        if event == 'fill':
+            self._set(cid, status=FILLED)
+            with self._lock:
+                # The stop closed the position: its deferred take-profit has nothing left to sell
+                for group_id in [g for g, d in self.deferred.items() if d['stop_cid'] == cid]:
+                    del self.deferred[group_id]
+        elif event in ('canceled', 'expired', 'rejected'):
+            self._set(cid, status=CANCELED if event != 'rejected' else FAILED, error=event)
+
+    # --- SUBMISSION ---
+    def _placed(self, cid, placed):
+        """State for an order the broker knows about, by its broker status."""
+        status = str(getattr(placed, 'status', '') or '').lower()
+        order_id = getattr(placed, 'id', None)
+        if status in BROKER_DEAD:
+            return self._set(cid, status=FAILED if status == 'rejected' else CANCELED,
+                             order_id=order_id, error=f"broker status {status}")
+        return self._set(cid, status=FILLED if status == 'filled' else ACCEPTED, order_id=order_id, error=None)
+
+    def submit_leg(self, leg, **order):
+        """Submits one order, retrying idempotently. Returns its final state dict."""
+        cid = order['client_order_id']
+        existing = self.status(cid)
+        if existing and existing['status'] in LIVE:
+            return existing  # Already live, nothing to resend
+        self._set(cid, leg=leg, symbol=order['symbol'], side=order['side'], type=order['type'], status=PENDING)
+
+        error = None
+        for attempt in range(self.retries + 1):
+            self._set(cid, attempts=attempt + 1)
+            try:
+                with timed('order_submit'):
+                    placed = self.api.submit_order(**order)
+                return self._placed(cid, placed)
+            except Exception as e:
+                error = e
+                if is_qty_reserved(e):
+                    break  # Refused outright, resending the same qty cannot succeed
+                # The order may have reached the broker before the error (timeout, dropped reply)
+                try:
+                    placed = self.api.get_order_by_client_order_id(cid)
+                except Exception:
+                    placed = None
+                if placed is not None:
+                    # Rejected / canceled / expired: the id is spent, a resend would only be refused
+                    state = self._placed(cid, placed)
+                    if state['status'] not in LIVE:
+                        logger.error(f"❌ {leg} leg for {order['symbol']} ({cid}) is {state['error']}")
+                    return state
+                if attempt < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+        logger.error(f"❌ {leg} leg failed for {order['symbol']} ({cid}): {error}")
+        return self._set(cid, status=FAILED, error=str(error))
+
+    def _cancel(self, state):
+        try:
+            if state.get('order_id'):
+                self.api.cancel_order(state['order_id'])
+            self._set(state['client_order_id'], status=CANCELED)
+        except Exception as e:
+            logger.error(f"Cancel Error ({state['client_order_id']}): {e}")
+
+    def wait_for_fill(self, client_order_id, timeout=None):
+        """
+        Filled qty of an order once it is done working (filled, canceled,
+        expired). Still working after `timeout`: the rest is canceled and
+        whatever filled so far is returned.
+        """
+        deadline = time.time() + (self.fill_timeout if timeout is None else timeout)
+        filled = 0.0
+        while True:
+            try:
+                order = self.api.get_order_by_client_order_id(client_order_id)
+                filled = float(getattr(order, 'filled_qty', 0) or 0)
+                if str(order.status).lower() == 'filled' or str(order.status).lower() in BROKER_DEAD:
+                    self._placed(client_order_id, order)
+                    return filled
+            except Exception as e:
+                logger.warning(f"⚠️ Order lookup failed ({client_order_id}): {e}")
+            if time.time() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        logger.warning(f"⚠️ {client_order_id} still working after {timeout or self.fill_timeout}s; canceling the rest.")
+        state = self.status(client_order_id)
+        if state:
+            self._cancel(state)
+        try:
+            filled = float(self.api.get_order_by_client_order_id(client_order_id).filled_qty or 0)
+        except Exception:
+            pass
+        return filled
+
+    def _unwind(self, group_id, symbol, qty, exit_side, legs):
+        logger.error(f"🚨 Protection incomplete for {symbol}; unwinding entry {group_id}.")
+        for state in legs.values():
+            if state['status'] in LIVE:
+                self._cancel(state)
+        self.submit_leg('flatten', symbol=symbol, qty=qty, side=exit_side, type='market',
+                        time_in_force='gtc', client_order_id=f"{group_id}-flatten")
+
+    def place_manual_bracket(self, group_id, symbol, qty, side, protective_legs):
+        """
+        Market entry, then the protective legs in order once it has filled.
+
+        `protective_legs` maps a leg name to its submit_order kwargs (without
+        symbol/qty/client_order_id); the first one is the stop. Each leg is
+        sized to the filled qty and sent only after the previous one is in.
+        Crypto has no OCO, and Alpaca reserves the position qty for the stop,
+        so a later leg refused for that reason is worked client-side instead
+        (see on_price) and the trade stays open under its stop. Any other
+        failure cancels the placed legs and flattens the entry, so a
+        position is never left naked.
+        """
+        exit_side = 'sell' if side == 'buy' else 'buy'
+        entry = self.submit_leg('entry', symbol=symbol, qty=qty, side=side, type='market',
+                                time_in_force='gtc', client_order_id=f"{group_id}-entry")
+        if entry['status'] not in LIVE:
+            return False
+        filled = self.wait_for_fill(entry['client_order_id'])
+        if filled <= 0:
+            logger.error(f"❌ Entry {group_id} for {symbol} never filled.")
+            return False
+
+        legs = {}
+        for name, kwargs in protective_legs.items():
+            state = self.submit_leg(name, symbol=symbol, qty=filled, client_order_id=f"{group_id}-{name}", **kwargs)
+            legs[name] = state
+            if state['status'] in LIVE:
+                continue
+            stop = next(iter(legs.values()))
+            if stop is not state and stop['status'] in LIVE and is_qty_reserved(state.get('error')):
+                stop_name = next(iter(legs))
+                self._defer(group_id, symbol, filled, name, kwargs, stop, stop_name, protective_legs[stop_name])
+                continue
+            self._unwind(group_id, symbol, filled, exit_side, legs)
+            return False
+        return True
+
+    # --- CLIENT-SIDE EXIT LEGS ---
+    def _defer(self, group_id, symbol, qty, name, kwargs, stop, stop_name, stop_kwargs):
+        with self._lock:
+            self.deferred[group_id] = {'group_id': group_id, 'symbol': symbol, 'key': _key(symbol), 'qty': qty,
+                                       'leg': name, 'side': kwargs['side'], 'limit_price': float(kwargs['limit_price']),
+                                       'stop_cid': stop['client_order_id'], 'stop_leg': stop_name,
+                                       'stop_kwargs': stop_kwargs}
+        logger.info(f"🎯 {symbol} {name} at {kwargs['limit_price']} worked locally; the stop holds the qty.")
+
+    def on_price(self, symbol, price):
+        """Latest price: fires any deferred exit leg of `symbol` whose limit has been reached."""
+        if not self.deferred:
+            return
+        key, price = _key(symbol), float(price)
+        with self._lock:
+            hit = [d for d in self.deferred.values() if d['key'] == key and
+                   (price >= d['limit_price'] if d['side'] == 'sell' else price <= d['limit_price'])]
+            for d in hit:
+                del self.deferred[d['group_id']]
+        for d in hit:
+            self._pool.submit(self._fire_deferred, d)
+
+    def _fire_deferred(self, d):
+        """Cancels the stop, waits for the broker to release the qty, then exits at market."""
+        stop = self.status(d['stop_cid'])
+        if not stop or stop['status'] != ACCEPTED:
+            return  # Stop already filled or gone; nothing left to exit
+        try:
+            self.api.cancel_order(stop['order_id'])
+        except Exception as e:
+            logger.error(f"Cancel Error ({d['stop_cid']}): {e}")
+            return
+        stopped = self.wait_for_fill(d['stop_cid'])
+        qty = round(d['qty'] - stopped, 8)
+        if qty <= 0:
+            return
+        state = self.submit_leg(d['leg'], symbol=d['symbol'], qty=qty, side=d['side'], type='market',
+                                time_in_force='gtc', client_order_id=f"{d['group_id']}-{d['leg']}-hit")
+        if state['status'] not in LIVE:
+            logger.error(f"🚨 {d['symbol']} {d['leg']} exit failed ({state.get('error')}); re-placing the stop.")
+            self.submit_leg(d['stop_leg'], symbol=d['symbol'], qty=qty,
+                            client_order_id=f"{d['group_id']}-{d['stop_leg']}-again", **d['stop_kwargs'])
+
+    def place_bracket(self, group_id, symbol, qty, side, take_profit, stop_loss):
+        """Native bracket order (stocks) under one idempotent client_order_id."""
+        state = self.submit_leg('bracket', symbol=symbol, qty=qty, side=side, type='market',
+                                time_in_force='day', order_class='bracket',
+                                take_profit=take_profit, stop_loss=stop_loss,
+                                client_order_id=f"{group_id}-bracket")
+        return state['status'] in LIVE
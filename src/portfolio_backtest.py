@@ -0,0 +1,207 @@
+import os
+import heapq
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.indicator_calculator import calculate_indicators
+from src.backtest_engine import compute_signals, _first_hit, BUY, HOLD
+from src.execution import position_size
+from src.shared_bars import SharedBars, attach_bars
+
+logger = logging.getLogger(__name__)
+
+
+# --- PER-SYMBOL CANDIDATES (worker processes) ---
+def symbol_candidates(df: pd.DataFrame, params=None, start=35, strategy=None):
+    """
+    Every trade one symbol could take: for each signal bar from `start` on,
+    its side, SL/TP and the bar where that TP or SL is first hit.
+
+    Whether a candidate is actually taken depends on the portfolio (the
+    symbol being flat, cash for a non-zero size), so that is left to the
+    replay; exits only depend on the price path and are found here.
+    """
+    signals = compute_signals(calculate_indicators(df), params, strategy)
+    close = df['Close'].to_numpy(dtype=float)
+    sig = signals['signal'].to_numpy()
+    tp_arr, sl_arr = signals['tp_price'].to_numpy(), signals['sl_price'].to_numpy()
+    n = len(close)
+    rows = []
+    for i in np.flatnonzero(sig != HOLD):
+        if i < start:
+            continue
+        side, tp, sl = int(sig[i]), tp_arr[i], sl_arr[i]
+        if side == BUY:
+            j = _first_hit(lambda a, b: (close[a:b] >= tp) | (close[a:b] <= sl), i + 1, n)
+        else:
+            j = _first_hit(lambda a, b: (close[a:b] <= tp) | (close[a:b] >= sl), i + 1, n)
+        exit_price = close[j] if j is not None else close[-1]
+        won = exit_price >= tp if side == BUY else exit_price <= tp
+        rows.append((int(i), -1 if j is None else int(j), side, close[i], sl, tp, exit_price,
+                     ('TP' if won else 'SL') if j is not None else 'OPEN'))
+    return rows
+
+
+def _candidates_task(task):
+    symbol, spec, params, start, strategy = task
+    shm, bars = attach_bars(spec)
+    try:
+        return symbol, symbol_candidates(bars.copy(), params, start, strategy)
+    finally:
+        del bars
+        shm.close()
+
+
+# --- PORTFOLIO REPLAY (parent process) ---
+def _epoch_ns(df):
+    return pd.DatetimeIndex(df.index).as_unit('ns').asi8
+
+
+def _replay(symbols, frames, candidates, clock, closes, starting_balance, risk_pct):
+    """
+    Walks every symbol's candidates on the shared clock with live sizing.
+
+    Each open position locks its entry notional out of free cash (no margin,
+    like non_marginable_buying_power); exits land before entries on the same
+    bar so freed cash is usable at once. Equity for sizing is marked to the
+    last close of every open position.
+    """
+    local_to_clock = {s: np.searchsorted(clock, _epoch_ns(frames[s])) for s in symbols}
+    entries = sorted((int(local_to_clock[s][c[0]]), k, s, c)
+                     for k, s in enumerate(symbols) for c in candidates[s])
+
+    cash = float(starting_balance)
+    open_positions = {}   # symbol -> trade dict
+    busy_until = {}       # symbol -> clock index from which it may enter again
+    exits = []            # heap of (exit clock index, symbol)
+    trades = []
+
+    def close_position(symbol):
+        nonlocal cash
+        t = open_positions.pop(symbol)
+        cash += t['notional'] + t['pnl']
+
+    for g, _, symbol, (i, j, side, entry, sl, tp, exit_price, outcome) in entries:
+        while exits and exits[0][0] <= g:
+            close_position(heapq.heappop(exits)[1])
+        if symbol in open_positions or g < busy_until.get(symbol, 0):
+            continue
+        marked = sum(t['qty'] * (closes[t['row'], g] - t['entry_price']) * t['direction']
+                     for t in open_positions.values())
+        equity = cash + sum(t['notional'] for t in open_positions.values()) + marked
+        qty = position_size(symbol, entry, sl, equity, cash, risk_pct)
+        if qty <= 0:
+            continue
+        direction = 1 if side == BUY else -1
+        g_exit = int(local_to_clock[symbol][j]) if j >= 0 else len(clock) - 1
+        trade = {
+            'symbol': symbol, 'side': 'LONG' if side == BUY else 'SHORT', 'qty': qty,
+            'entry_time': frames[symbol].index[i], 'entry_price': entry, 'tp_price': tp, 'sl_price': sl,
+            'exit_time': frames[symbol].index[j] if j >= 0 else None, 'exit_price': exit_price,
+            'outcome': outcome, 'pnl': (exit_price - entry) * qty * direction,
+            'notional': qty * entry, 'direction': direction, 'row': symbols.index(symbol),
+            'entry_clock': g, 'exit_clock': g_exit,
+        }
+        cash -= trade['notional']
+        open_positions[symbol] = trade
+        trades.append(trade)
+        if j >= 0:
+            heapq.heappush(exits, (g_exit, symbol))
+            busy_until[symbol] = g_exit + 1  # Re-entry from the bar after the exit, as in simulate_trades
+        else:
+            busy_until[symbol] = len(clock)
+    return trades
+
+
+def _curves(clock, closes, trades, starting_balance):
+    """Per-bar equity, free cash and gross / net exposure from the taken trades."""
+    n = len(clock)
+    cash_delta = np.zeros(n + 1)
+    gross = np.zeros(n)
+    net = np.zeros(n)
+    value = np.zeros(n)
+    open_count = np.zeros(n + 1, dtype=int)
+    for t in trades:
+        a, b = t['entry_clock'], t['exit_clock']
+        closed = t['exit_time'] is not None
+        end = b if closed else n  # Held through bars [a, end); the exit bar settles to cash
+        cash_delta[a] -= t['notional']
+        if closed:
+            cash_delta[b] += t['notional'] + t['pnl']
+        px = closes[t['row'], a:end]
+        gross[a:end] += t['qty'] * px
+        net[a:end] += t['qty'] * px * t['direction']
+        value[a:end] += t['notional'] + (px - t['entry_price']) * t['qty'] * t['direction']
+        open_count[a] += 1
+        open_count[end] -= 1
+    cash = starting_balance + np.cumsum(cash_delta)[:n]
+    equity = cash + value
+    peaks = np.maximum.accumulate(equity)
+    return pd.DataFrame({
+        'equity': equity, 'cash': cash, 'gross_exposure': gross, 'net_exposure': net,
+        'open_positions': np.cumsum(open_count)[:n], 'drawdown_pct': (peaks - equity) / peaks * 100,
+    }, index=pd.to_datetime(clock, utc=True))
+
+
+def run_portfolio_backtest(frames: dict, starting_balance=10000.0, risk_pct=0.01, params=None,
+                           start=35, processes=None, strategy=None):
+    """
+    Backtests a whole watchlist as one account.
+
+    `frames` is {symbol: raw OHLCV frame}. Each frame is copied once into
+    shared memory; a process pool derives indicators, signals and exits per
+    symbol from it. The parent then replays all symbols on the union of
+    their timestamps with ExecutionEngine's sizing (risk `risk_pct` of
+    equity to the stop, capped at 95% of free cash), one position per
+    symbol, and builds portfolio-level equity, exposure and drawdown.
+    `strategy` is a registered strategy name (workers look it up themselves).
+    """
+    symbols = [s for s, df in frames.items() if df is not None and not df.empty]
+    frames = {s: frames[s].sort_index() for s in symbols}
+    processes = max(1, min(processes or os.cpu_count() or 1, len(symbols) or 1))
+    logger.info(f"🧺 Portfolio backtest: {len(symbols)} symbols on {processes} process(es)...")
+
+    shared = {s: SharedBars(frames[s]) for s in symbols}
+    try:
+        tasks = [(s, shared[s].spec, params, start, strategy) for s in symbols]
+        if processes == 1:
+            candidates = dict(map(_candidates_task, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                candidates = dict(pool.map(_candidates_task, tasks))
+    finally:
+        for block in shared.values():
+            block.close()
+
+    # Shared clock: every timestamp any symbol has; closes carried forward for marking
+    clock = np.unique(np.concatenate([_epoch_ns(frames[s]) for s in symbols])) if symbols else np.array([], dtype=np.int64)
+    closes = np.vstack([pd.Series(frames[s]['Close'].to_numpy(dtype=float), index=_epoch_ns(frames[s]))
+                        .reindex(clock).ffill().bfill().to_numpy() for s in symbols]) if symbols else np.zeros((0, 0))
+
+    trades = _replay(symbols, frames, candidates, clock, closes, starting_balance, risk_pct)
+    curve = _curves(clock, closes, trades, starting_balance)
+    for t in trades:
+        for key in ('notional', 'direction', 'row', 'entry_clock', 'exit_clock'):
+            t.pop(key)
+
+    closed = [t for t in trades if t['outcome'] != 'OPEN']
+    final = float(curve['equity'].iloc[-1]) if len(curve) else starting_balance
+    per_symbol = {}
+    for t in closed:
+        stats = per_symbol.setdefault(t['symbol'], {'trades': 0, 'wins': 0, 'pnl': 0.0})
+        stats['trades'] += 1
+        stats['wins'] += t['outcome'] == 'TP'
+        stats['pnl'] = round(stats['pnl'] + t['pnl'], 2)
+    return {
+        'starting_balance': starting_balance,
+        'final_balance': final,
+        'return_pct': round((final / starting_balance - 1) * 100, 4),
+        'trade_count': len(trades),
+        'wins': sum(1 for t in closed if t['outcome'] == 'TP'),
+        'max_drawdown_pct': round(float(curve['drawdown_pct'].max()), 4) if len(curve) else 0.0,
+        'max_gross_exposure': round(float(curve['gross_exposure'].max()), 2) if len(curve) else 0.0,
+        'per_symbol': per_symbol,
+        'trades': trades,
+        'curve': curve,
+    }
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+class RingSeries:
+    """
+    Fixed-capacity bar series backed by contiguous NumPy arrays.
+
+    Each column lives in one float64 array twice the capacity long. Rows are
+    appended at the end, and when the end is reached the newest `capacity - 1`
+    rows are copied back to the front (amortized O(1) per bar). That way the
+    last N rows are always one contiguous slice, so window() and column()
+    hand out zero-copy views instead of building a DataFrame.
+
+    Views are only valid until the next append(): a compaction rewrites the
+    front of the arrays, so a view held across it silently shows shifted
+    rows, and replace_last() changes a view's last element in place. Read a
+    view right away, or copy it (np.array / to_frame) to keep it.
+    """
+
+    def __init__(self, columns, capacity=1024):
+        self.columns = list(columns)
+        self.capacity = int(capacity)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.zeros((len(self.columns), 2 * self.capacity), dtype=np.float64)
+        self._ts = np.zeros(2 * self.capacity, dtype=np.int64)  # epoch nanoseconds, UTC
+        self._end = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def _compact(self):
+        keep = self.capacity - 1
+        start = self._end - keep
+        self._data[:, :keep] = self._data[:, start:self._end]
+        self._ts[:keep] = self._ts[start:self._end]
+        self._end = keep
+        self._len = min(self._len, keep)
+
+    def append(self, ts, values):
+        """Adds a row; `values` follows self.columns order."""
+        if self._end == 2 * self.capacity:
+            self._compact()
+        self._data[:, self._end] = values
+        self._ts[self._end] = pd.Timestamp(ts).value
+        self._end += 1
+        self._len = min(self._len + 1, self.capacity)
+
+    def replace_last(self, ts, values):
+        """Overwrites the newest row in place (a revised, still-forming bar)."""
+        if not self._len:
+            return self.append(ts, values)
+        self._data[:, self._end - 1] = values
+        self._ts[self._end - 1] = pd.Timestamp(ts).value
+
+    def column(self, name, n=None):
+        """View of the last `n` values of one column (all retained rows by default); valid until the next append."""
+        n = self._len if n is None else min(n, self._len)
+        return self._data[self._index[name], self._end - n:self._end]
+
+    def timestamps(self, n=None):
+        """View of the last `n` timestamps (epoch ns); valid until the next append."""
+        n = self._len if n is None else min(n, self._len)
+        return self._ts[self._end - n:self._end]
+
+    def window(self, n=None):
+        """
+        {column: view} over the last `n` rows, plus 'ts' in epoch nanoseconds.
+
+        The views alias the live arrays and are only valid until the next
+        append(), which may compact rows to the front; copy what you keep.
+        """
+        n = self._len if n is None else min(n, self._len)
+        views = {name: self._data[i, self._end - n:self._end] for name, i in self._index.items()}
+        views['ts'] = self._ts[self._end - n:self._end]
+        return views
+
+    def row(self, pos=-1):
+        """One row as a plain dict (pos counts from the end when negative)."""
+        if pos < 0:
+            pos += self._len
+        if not 0 <= pos < self._len:
+            raise IndexError("row out of range")
+        col = self._end - self._len + pos
+        values = self._data[:, col]
+        out = {name: float(values[i]) for name, i in self._index.items()}
+        out['ts'] = pd.Timestamp(int(self._ts[col]), tz='UTC')
+        return out
+
+    def to_frame(self, n=None) -> pd.DataFrame:
+        """Copies the last `n` rows into a DataFrame (for callers that need pandas)."""
+        views = self.window(n)
+        index = pd.to_datetime(views.pop('ts'), utc=True)
+        return pd.DataFrame({name: np.array(view) for name, view in views.items()}, index=index, columns=self.columns)
@@ -0,0 +1,130 @@
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from src.metrics import REGISTRY, STAGE_SECONDS
+from src.account_mirror import _key
+
+logger = logging.getLogger(__name__)
+
+RISK_DECISIONS = REGISTRY.counter('sniper_risk_decisions_total', 'Pre-trade risk gate decisions by result.', ('result',))
+
+# Fractions of equity unless noted; config.json's risk_settings override these
+DEFAULT_RISK_SETTINGS = {
+    'risk_per_trade_percent': 0.01,
+    'max_daily_loss_percent': 0.03,
+    'max_slippage': 0.005,                 # |order price - last price| / last price
+    'max_symbol_exposure_percent': 0.5,    # One symbol's notional after the order
+    'max_gross_exposure_percent': 1.0,     # All positions' notional after the order
+    'max_orders_per_minute': 6,
+    'symbol_cooldown_seconds': 60,         # Minimum gap between two entries on one symbol
+}
+
+
+class RiskGate:
+    """
+    Pre-trade checks against locally held state only.
+
+    Equity and positions come from the AccountMirror, last prices from the
+    scanner's marks, and the order-rate windows live here, so a check is a
+    handful of dict lookups and never waits on the network. Every decision
+    carries its check time in microseconds and is kept in `decisions`.
+    """
+
+    def __init__(self, account, settings=None, clock=time.time):
+        self.account = account
+        self.settings = {**DEFAULT_RISK_SETTINGS, **(settings or {})}
+        self.clock = clock
+        self.last_prices = {}        # key -> last scanner price
+        self.order_times = deque()   # approved order timestamps, last 60s
+        self.symbol_last_order = {}  # key -> timestamp of last approved order
+        self.day = None
+        self.day_start_equity = None
+        self.decisions = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def mark(self, symbol, price):
+        self.last_prices[_key(symbol)] = float(price)
+
+    def _roll_day(self, now, equity):
+        """
+        The day's reference equity: the broker's previous-close equity
+        (last_equity) when the mirror has it, so losses taken before the
+        first check of the day still count; otherwise the first equity seen
+        after the UTC day boundary.
+        """
+        day = datetime.fromtimestamp(now, tz=timezone.utc).date()
+        if day != self.day:
+            self.day = day
+            self.day_start_equity = equity
+        last_equity = getattr(self.account, 'last_equity', 0.0)
+        if last_equity:
+            self.day_start_equity = last_equity
+
+    def _evaluate(self, symbol, side, qty, price, now):
+        s = self.settings
+        key = _key(symbol)
+        equity = self.account.equity
+        self._roll_day(now, equity)
+
+        # 1. Daily loss: stop opening risk once the day is down max_daily_loss_percent
+        if self.day_start_equity and equity - self.day_start_equity <= -s['max_daily_loss_percent'] * self.day_start_equity:
+            return 'daily_loss'
+
+        # 2. Slippage against the last price the scanner saw
+        last = self.last_prices.get(key)
+        if last and abs(price - last) / last > s['max_slippage']:
+            return 'slippage'
+
+        # 3. Exposure after the order, per symbol and gross
+        signed = qty * price * (1 if side == 'buy' else -1)
+        positions = dict(self.account.positions)  # Snapshot; the stream thread mutates the mirror
+        held = positions.get(key)
+        symbol_notional = (held['qty'] * held['price'] if held else 0.0) + signed
+        if abs(symbol_notional) > s['max_symbol_exposure_percent'] * equity:
+            return 'symbol_exposure'
+        gross = sum(abs(p['qty'] * p['price']) for k, p in positions.items() if k != key) + abs(symbol_notional)
+        if gross > s['max_gross_exposure_percent'] * equity:
+            return 'gross_exposure'
+
+        # 4. Order rate, overall and per symbol
+        while self.order_times and now - self.order_times[0] > 60:
+            self.order_times.popleft()
+        if len(self.order_times) >= s['max_orders_per_minute']:
+            return 'order_rate'
+        if now - self.symbol_last_order.get(key, float('-inf')) < s['symbol_cooldown_seconds']:
+            return 'symbol_cooldown'
+        return None
+
+    def check(self, symbol, side, qty, price):
+        """Approves or rejects one order; returns the decision dict."""
+        start = time.perf_counter_ns()
+        now = self.clock()
+        with self._lock:
+            try:
+                reason = self._evaluate(symbol, side, float(qty), float(price), now)
+            except Exception as e:
+                reason = f"error: {e}"
+            if reason is None:
+                self.order_times.append(now)
+                self.symbol_last_order[_key(symbol)] = now
+        elapsed_us = (time.perf_counter_ns() - start) / 1000
+        decision = {'ts': now, 'symbol': symbol, 'side': side, 'qty': qty, 'price': price,
+                    'approved': reason is None, 'reason': reason, 'check_us': round(elapsed_us, 1)}
+        self.decisions.append(decision)
+        RISK_DECISIONS.inc(result='approved' if reason is None else reason.split(':')[0])
+        STAGE_SECONDS.observe(elapsed_us / 1e6, stage='risk_check')
+        if reason is None:
+            logger.info(f"🛡️ Risk OK: {side.upper()} {qty} {symbol} @ {price} ({elapsed_us:.0f}µs)")
+        else:
+            logger.warning(f"⛔ Risk REJECT ({reason}): {side.upper()} {qty} {symbol} @ {price} ({elapsed_us:.0f}µs)")
+        return decision
+
+    def status(self):
+        equity = self.account.equity
+        with self._lock:
+            day_pnl = equity - self.day_start_equity if self.day_start_equity else 0.0
+            return {'settings': self.settings, 'day': str(self.day) if self.day else None,
+                    'day_start_equity': self.day_start_equity, 'day_pnl': round(day_pnl, 2),
+                    'orders_last_minute': len(self.order_times), 'recent': list(self.decisions)[-20:]}
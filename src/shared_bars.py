@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# Row layout of the shared block: epoch seconds first, then OHLCV
+SHARED_FIELDS = ['ts', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class SharedBars:
+    """
+    OHLCV bars copied once into a POSIX/Windows shared-memory block.
+
+    Worker processes attach by name via attach_bars() and read the arrays in
+    place, so a process pool never pickles the price history per task.
+    The creating process owns the block and must call close() (or use it as
+    a context manager) to release it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_bars = len(df)
+        nbytes = max(1, len(SHARED_FIELDS) * self.n_bars * 8)
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        block = np.ndarray((len(SHARED_FIELDS), self.n_bars), dtype=np.float64, buffer=self._shm.buf)
+        # Epoch seconds are exact in float64 for any realistic date
+        block[0] = pd.DatetimeIndex(df.index).as_unit('s').asi8
+        for row, col in enumerate(SHARED_FIELDS[1:], start=1):
+            block[row] = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.nan
+        del block
+
+    @property
+    def spec(self):
+        """Picklable (name, n_bars) handle for attach_bars()."""
+        return self._shm.name, self.n_bars
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_bars(spec):
+    """Maps a SharedBars block by spec; returns (shm, frame). Keep `shm` alive while using the frame."""
+    name, n_bars = spec
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(SHARED_FIELDS), n_bars), dtype=np.float64, buffer=shm.buf)
+    index = pd.to_datetime(block[0].astype(np.int64), unit='s', utc=True)
+    df = pd.DataFrame({col: block[row] for row, col in enumerate(SHARED_FIELDS) if col != 'ts'},
+                      index=index, copy=False)
+    return shm, df
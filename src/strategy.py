@@ -0,0 +1,281 @@
+import numpy as np
+
+BUY, HOLD, SELL = 1, 0, -1
+SIGNAL_NAMES = {BUY: 'BUY', HOLD: 'HOLD', SELL: 'SELL'}
+WARMUP_REGIME = 'WAITING...'
+
+# Tunable thresholds for the Fusion Engine (see src/optimizer.py for sweeps)
+DEFAULT_PARAMS = {
+    'adx_trending': 25,       # ADX above this -> TRENDING
+    'adx_ranging': 20,        # ADX below this -> RANGING
+    'confluence_threshold': 4,
+    'bull_rsi_low': 40, 'bull_rsi_high': 70,
+    'bear_rsi_low': 30, 'bear_rsi_high': 60,
+    'range_rsi_buy': 35, 'range_rsi_sell': 65,
+    'sl_atr_mult': 2.0,
+    'tp_atr_mult': 3.0,
+    'htf_confirm': False,     # Veto signals against the higher-timeframe trend
+}
+
+
+class Columns(dict):
+    """
+    Indicator columns as arrays of one shape: (bars,), (symbols,) or
+    (symbols, bars). Attribute access reads a column; a missing one reads
+    as zeros, like latest.get(name, 0) in the scalar engine.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            return np.zeros(np.shape(self['Close']))
+
+
+class _Probe(Columns):
+    """Columns that records every name read from it."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.read = set()
+
+    def __getattr__(self, name):
+        self.read.add(name)
+        return super().__getattr__(name)
+
+
+class Rule:
+    """`points` of confluence wherever `when(c, p)` holds."""
+
+    def __init__(self, name, points, when):
+        self.name, self.points, self.when = name, int(points), when
+
+
+class Setup:
+    """
+    One side of a regime's logic. Where the bar is in `regime` and `when`
+    holds (and no earlier setup claimed it), its points are `base` plus
+    every matching rule, and it signals `side` once they reach `threshold`
+    (a number, a params key, or None to signal whenever it claims the bar).
+    """
+
+    def __init__(self, regime, side, when, rules=(), base=0, threshold=None):
+        self.regime, self.side, self.when = regime, side, when
+        self.rules, self.base, self.threshold = tuple(rules), int(base), threshold
+
+
+class Strategy:
+    """
+    Declarative signal rules, evaluated as array expressions.
+
+    `regimes` are (name, condition) pairs, first match wins, anything else
+    is `default_regime`. compile(params) binds the parameters once; the
+    result evaluates any number of symbols x bars in one call.
+    """
+
+    def __init__(self, name, regimes, setups, defaults=None, default_regime='STABILIZING',
+                 min_bars=50, total_possible=6):
+        self.name = name
+        self.regimes = list(regimes)
+        self.setups = list(setups)
+        self.defaults = dict(defaults or {})
+        self.default_regime = default_regime
+        self.min_bars = int(min_bars)
+        self.total_possible = int(total_possible)
+        self.regime_names = np.array([r for r, _ in self.regimes] + [default_regime, WARMUP_REGIME])
+        self._compiled = {}
+
+    def compile(self, params=None):
+        key = tuple(sorted((k, repr(v)) for k, v in params.items())) if params else ()
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = CompiledStrategy(self, {**self.defaults, **(params or {})})
+        return compiled
+
+
+class CompiledStrategy:
+    """A Strategy with its parameters bound; shared by the live scanner and the backtester."""
+
+    def __init__(self, strategy, params):
+        self.strategy = strategy
+        self.params = params
+        index = {name: k for k, (name, _) in enumerate(strategy.regimes)}
+        index[strategy.default_regime] = len(strategy.regimes)
+        self._setups = [(index[s.regime], s, params[s.threshold] if isinstance(s.threshold, str) else s.threshold)
+                        for s in strategy.setups]
+        # Which columns the rules read, found by running every expression once on a dummy row
+        probe = _Probe({'Close': np.zeros(1)})
+        for _, condition in strategy.regimes:
+            condition(probe, params)
+        for s in strategy.setups:
+            s.when(probe, params)
+            for rule in s.rules:
+                rule.when(probe, params)
+        self.columns = sorted(probe.read - {'prev_Close'} | {'Close', 'ATR', 'RSI', 'ADX'})
+
+    def evaluate(self, cols, bar_count=None, veto_buy=None, veto_sell=None):
+        """
+        Signals for every cell of `cols` (a mapping of equally shaped arrays).
+
+        `prev_Close` is derived along the last axis when not given. `bar_count`
+        (broadcastable) is how much history each cell's indicators saw; by
+        default the position along the last axis + 1. `veto_buy`/`veto_sell`
+        are boolean masks (e.g. the higher-timeframe confirmation).
+        Returns {'signal', 'points', 'confluence', 'regime', 'regime_code'}.
+        """
+        s, p = self.strategy, self.params
+        c = Columns(cols)
+        shape = np.shape(c['Close'])
+        if 'prev_Close' not in c:
+            prev = np.full(shape, np.nan)
+            prev[..., 1:] = np.asarray(c['Close'])[..., :-1]
+            c['prev_Close'] = prev
+        if bar_count is None:
+            bar_count = np.arange(1, shape[-1] + 1) if shape else 1
+
+        # --- REGIME ---
+        codes = np.full(shape, len(s.regimes))
+        for k in range(len(s.regimes) - 1, -1, -1):
+            codes = np.where(s.regimes[k][1](c, p), k, codes)
+
+        # --- SETUPS (first to claim a bar sets its points) ---
+        signal = np.zeros(shape, dtype=np.int8)
+        points = np.zeros(shape, dtype=np.int64)
+        claimed = np.zeros(shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for code, setup, threshold in self._setups:
+                mask = (codes == code) & ~claimed
+                if not mask.any():
+                    continue  # Regime absent everywhere (the common case for one live row)
+                mask &= setup.when(c, p)
+                total = np.full(shape, setup.base, dtype=np.int64)
+                for rule in setup.rules:
+                    total = total + rule.points * np.asarray(rule.when(c, p), dtype=np.int64)
+                claimed |= mask
+                points = np.where(mask, setup.side * total, points)
+                fires = mask if threshold is None else mask & (total >= threshold)
+                signal = np.where(fires, setup.side, signal)
+
+        if veto_buy is not None:
+            signal = np.where((signal == BUY) & veto_buy, HOLD, signal)
+        if veto_sell is not None:
+            signal = np.where((signal == SELL) & veto_sell, HOLD, signal)
+
+        # --- WARM-UP ---
+        warm = np.asarray(bar_count) >= s.min_bars
+        signal = np.where(warm, signal, HOLD).astype(np.int8)
+        confluence = np.where(warm, np.minimum(100, (np.abs(points) * 100) // s.total_possible), 0)
+        codes = np.where(warm, codes, len(s.regimes) + 1)
+        return {'signal': signal, 'points': points, 'confluence': confluence,
+                'regime': s.regime_names[codes], 'regime_code': codes}
+
+    def risk_levels(self, signal, close, atr):
+        """(entry, sl, tp) arrays; Python round() on signal cells so prices match to the cent."""
+        p = self.params
+        signal, close, atr = np.asarray(signal), np.asarray(close, dtype=float), np.asarray(atr, dtype=float)
+        entry = np.round(close, 2)
+        sl, tp = np.zeros(signal.shape), np.zeros(signal.shape)
+        for i in zip(*np.nonzero(signal != HOLD)):
+            price = round(float(close[i]), 2)
+            direction = 1 if signal[i] == BUY else -1
+            entry[i] = price
+            sl[i] = round(price - direction * (atr[i] * p['sl_atr_mult']), 2)
+            tp[i] = round(price + direction * (atr[i] * p['tp_atr_mult']), 2)
+        return entry, sl, tp
+
+
+# --- FUSION ENGINE ---
+FUSION_ENGINE = Strategy(
+    'fusion',
+    defaults=DEFAULT_PARAMS,
+    regimes=[
+        # 9 EMA Sniper logic is only active in TRENDING regimes
+        ('TRENDING', lambda c, p: c.ADX > p['adx_trending']),
+        ('RANGING', lambda c, p: c.ADX < p['adx_ranging']),
+    ],
+    setups=[
+        # BULLISH ALIGNMENT; needs the Sniper trigger + at least 1 Platinum filter
+        Setup('TRENDING', BUY, lambda c, p: (c.Close > c.Slow_MA) & (c.Close > c.Trend_MA),
+              threshold='confluence_threshold', rules=[
+                  # SMB Capital 9 EMA Reclaim: previous close below the 9 EMA, current close above it
+                  Rule('ema9_reclaim', 3, lambda c, p: (c.prev_Close < c.Fast_MA) & (c.Close >= c.Fast_MA)),
+                  Rule('macd', 1, lambda c, p: c.MACD_hist > 0),
+                  Rule('vwap', 1, lambda c, p: c.Close > c.VWAP),
+                  Rule('rsi_band', 1, lambda c, p: (c.RSI > p['bull_rsi_low']) & (c.RSI < p['bull_rsi_high'])),
+              ]),
+        # BEARISH ALIGNMENT
+        Setup('TRENDING', SELL, lambda c, p: (c.Close < c.Slow_MA) & (c.Close < c.Trend_MA),
+              threshold='confluence_threshold', rules=[
+                  Rule('ema9_reclaim', 3, lambda c, p: (c.prev_Close > c.Fast_MA) & (c.Close <= c.Fast_MA)),
+                  Rule('macd', 1, lambda c, p: c.MACD_hist < 0),
+                  Rule('vwap', 1, lambda c, p: c.Close < c.VWAP),
+                  Rule('rsi_band', 1, lambda c, p: (c.RSI > p['bear_rsi_low']) & (c.RSI < p['bear_rsi_high'])),
+              ]),
+        # RANGING: defensive mean reversion at the Bollinger bands
+        Setup('RANGING', BUY, lambda c, p: (c.Close <= c.BB_Lower) & (c.RSI < p['range_rsi_buy']), base=5),
+        Setup('RANGING', SELL, lambda c, p: (c.Close >= c.BB_Upper) & (c.RSI > p['range_rsi_sell']), base=5),
+    ],
+)
+
+STRATEGIES = {FUSION_ENGINE.name: FUSION_ENGINE}
+
+
+def register_strategy(strategy: Strategy):
+    STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def get_strategy(name=None) -> Strategy:
+    if name is None or isinstance(name, Strategy):
+        return name or FUSION_ENGINE
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}; registered: {sorted(STRATEGIES)}")
+
+
+def htf_vetoes(htf_list, params):
+    """Per-symbol (veto_buy, veto_sell) masks from TimeframeSeries.context() dicts."""
+    if not params.get('htf_confirm') or not any(htf_list):
+        return None, None
+    trends = [{ctx.get('trend') for ctx in (htf or {}).values()} for htf in htf_list]
+    return np.array(['DOWN' in t for t in trends]), np.array(['UP' in t for t in trends])
+
+
+def evaluate_rows(rows, params=None, strategy=None):
+    """
+    Batch live evaluation: `rows` is a list of (latest, prev, bar_count, htf)
+    with latest/prev any row mappings. All symbols go through the compiled
+    strategy as one (symbols,) array pass; returns one result dict per row.
+    """
+    compiled = get_strategy(strategy).compile(params)
+    columns = {name: np.array([float(latest.get(name, 0)) if latest is not None else 0.0 for latest, _, _, _ in rows])
+               for name in compiled.columns}
+    columns['prev_Close'] = np.array([float(prev['Close']) if prev is not None else np.nan for _, prev, _, _ in rows])
+    bar_count = np.array([0 if latest is None else count for latest, _, count, _ in rows])
+    veto_buy, veto_sell = htf_vetoes([htf for _, _, _, htf in rows], compiled.params)
+
+    out = compiled.evaluate(columns, bar_count, veto_buy, veto_sell)
+    c = Columns(columns)
+    _, sl, tp = compiled.risk_levels(out['signal'], c.Close, c.ATR)
+    results = []
+    for k, (_, _, _, htf) in enumerate(rows):
+        if bar_count[k] < compiled.strategy.min_bars:
+            results.append({'signal': 'HOLD', 'confluence': 0, 'regime': WARMUP_REGIME,
+                            'entry_price': 0, 'sl_price': 0, 'tp_price': 0, 'rsi': 0, 'adx': 0, 'atr': 0})
+            continue
+        result = {
+            'signal': SIGNAL_NAMES[int(out['signal'][k])],
+            'confluence': int(out['confluence'][k]),
+            'regime': str(out['regime'][k]),
+            'entry_price': round(float(c.Close[k]), 2),
+            'sl_price': float(sl[k]),
+            'tp_price': float(tp[k]),
+            'rsi': round(float(c.RSI[k]), 2),
+            'adx': round(float(c.ADX[k]), 2),
+            'atr': round(float(c.ATR[k]), 2),
+        }
+        if htf:
+            result['htf'] = htf
+        results.append(result)
+    return results
@@ -0,0 +1,309 @@
+import math
+import logging
+from collections import deque
+import pandas as pd
+from src.ring_buffer import RingSeries
+
+logger = logging.getLogger(__name__)
+
+# Output columns, in the same order calculate_indicators() appends them
+INDICATOR_COLUMNS = [
+    'Fast_MA', 'Slow_MA', 'Trend_MA', 'RSI', 'TP', 'VWAP',
+    'BB_Middle', 'BB_Upper', 'BB_Lower', 'MACD', 'Signal_Line', 'MACD_hist',
+    'TR', 'ATR', 'plus_dm', 'minus_dm', 'plus_di', 'minus_di', 'ADX'
+]
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _clean(value):
+    """Mirrors the final fillna(0) / inf -> 0 pass of calculate_indicators."""
+    if value is None or math.isnan(value) or math.isinf(value):
+        return 0.0
+    return float(value)
+
+
+_EMPTY = object()
+
+
+class _RollingWindow:
+    """Fixed-size rolling mean with min_periods=1 and an O(1) running sum.
+
+    The running sum is rebuilt from the window every `window` pushes so
+    floating-point drift can never accumulate past one window's worth. With
+    `spread`, sums of the values around a shift point are kept as well, for
+    an O(1) sample std (shifting keeps large prices from cancelling out).
+    """
+
+    def __init__(self, window, spread=False):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.pushes = 0
+        self.spread = spread
+        self.shift = self.s1 = self.s2 = 0.0
+
+    def checkpoint(self):
+        """O(1) token that rollback() uses to undo the next push."""
+        evicted = self.values[0] if len(self.values) == self.window else _EMPTY
+        return evicted, self.total, self.pushes, self.shift, self.s1, self.s2
+
+    def rollback(self, token):
+        evicted, self.total, self.pushes, self.shift, self.s1, self.s2 = token
+        self.values.pop()
+        if evicted is not _EMPTY:
+            self.values.appendleft(evicted)
+
+    def mean_with(self, x):
+        """Mean of the window if `x` were pushed, without mutating state."""
+        if len(self.values) == self.window:
+            total = self.total - self.values[0] + x
+            return total / self.window
+        return (self.total + x) / (len(self.values) + 1)
+
+    def std_with(self, x):
+        """Sample std of the window if `x` were pushed (NaN for a single value)."""
+        d = x - self.shift
+        s1, s2, n = self.s1 + d, self.s2 + d * d, len(self.values) + 1
+        if n > self.window:
+            out = self.values[0] - self.shift
+            s1, s2, n = s1 - out, s2 - out * out, self.window
+        if n < 2:
+            return float('nan')
+        return math.sqrt(max(s2 - s1 * s1 / n, 0.0) / (n - 1))
+
+    def push(self, x):
+        if len(self.values) == self.window:
+            out = self.values[0]
+            self.total -= out
+            if self.spread:
+                self.s1 -= out - self.shift
+                self.s2 -= (out - self.shift) ** 2
+        self.values.append(x)
+        self.total += x
+        if self.spread:
+            self.s1 += x - self.shift
+            self.s2 += (x - self.shift) ** 2
+        self.pushes += 1
+        if self.pushes % self.window == 0:
+            self.total = math.fsum(self.values)
+            if self.spread:
+                self.shift = self.total / len(self.values)
+                self.s1 = math.fsum(v - self.shift for v in self.values)
+                self.s2 = math.fsum((v - self.shift) ** 2 for v in self.values)
+
+
+class _EWM:
+    """adjust=False exponential mean, seeded with the first observation."""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None
+
+    def checkpoint(self):
+        return self.value
+
+    def rollback(self, token):
+        self.value = token
+
+    def peek(self, x):
+        if self.value is None:
+            return x
+        return (1 - self.alpha) * self.value + self.alpha * x
+
+    def push(self, x):
+        self.value = self.peek(x)
+
+
+class _State:
+    """Everything that carries over from one closed bar to the next."""
+    SCALARS = ('pv_sum', 'vol_sum', 'prev_high', 'prev_low', 'prev_close')
+
+    def __init__(self):
+        self.fast = _RollingWindow(10)
+        self.slow = _RollingWindow(50)
+        self.trend = _RollingWindow(200)
+        self.gain = _RollingWindow(14)
+        self.loss = _RollingWindow(14)
+        self.bb = _RollingWindow(20, spread=True)
+        self.ema12 = _EWM(2 / 13)
+        self.ema26 = _EWM(2 / 27)
+        self.signal = _EWM(2 / 10)
+        self.atr = _EWM(1 / 14)
+        self.plus_dm = _EWM(1 / 14)
+        self.minus_dm = _EWM(1 / 14)
+        self.adx = _EWM(1 / 14)
+        self.pv_sum = 0.0
+        self.vol_sum = 0.0
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        self.parts = [v for v in self.__dict__.values() if hasattr(v, 'checkpoint')]
+
+    def checkpoint(self):
+        """O(1) snapshot (no window is copied) that rollback() uses to undo one _step."""
+        return [part.checkpoint() for part in self.parts], [getattr(self, k) for k in self.SCALARS]
+
+    def rollback(self, token):
+        parts, scalars = token
+        for part, saved in zip(self.parts, parts):
+            part.rollback(saved)
+        for key, value in zip(self.SCALARS, scalars):
+            setattr(self, key, value)
+
+
+class StreamingIndicators:
+    """
+    Stateful, bar-by-bar twin of calculate_indicators().
+
+    Feeding the same bars through update() yields the same indicator values
+    calculate_indicators() produces for the full frame, but each call costs
+    O(1) instead of a full-frame recompute. Re-sending the timestamp of the
+    latest bar revises it in place (the still-forming candle); only a newer
+    timestamp commits it into the running state.
+
+    Recent bars and their indicators are kept in a RingSeries, so readers get
+    zero-copy array views rather than a freshly built DataFrame.
+
+    The cumulative parts (VWAP's sums, the EMA seeds) run from the first bar
+    fed, not over a fixed lookback. A long-lived engine therefore drifts from
+    calculate_indicators() on a sliding fetch window; callers that need the
+    two to agree re-seed a fresh engine from the window now and then
+    (app.py does once `first_timestamp` falls a day behind the window).
+    """
+
+    def __init__(self, history=1024):
+        self._state = _State()  # Includes the newest bar; _undo takes it back out for a revision
+        self._undo = None
+        self._pending = None  # (timestamp, bar dict)
+        self.first_timestamp = None  # Bar the cumulative state starts from
+        self.history = RingSeries(OHLCV_COLUMNS + INDICATOR_COLUMNS, capacity=history)
+        self.bars_seen = 0
+
+    @property
+    def last_timestamp(self):
+        return self._pending[0] if self._pending else None
+
+    @property
+    def latest(self):
+        """Newest bar + indicators as a dict, or None before the first bar."""
+        return self._pending[1] if self._pending else None
+
+    @property
+    def previous(self):
+        return self.history.row(-2) if len(self.history) > 1 else None
+
+    def window(self, n=None):
+        """Zero-copy {column: array view} over the last `n` bars, valid until the next update() (see RingSeries)."""
+        return self.history.window(n)
+
+    def update(self, timestamp, open_, high, low, close, volume):
+        """Apply one new or revised bar and return its indicator row."""
+        if self._pending is not None and timestamp < self._pending[0]:
+            return None  # Stale bar, already superseded
+
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        revising = self._pending is not None and timestamp == self._pending[0]
+        if revising:
+            self._state.rollback(self._undo)  # Take the forming bar back out, in place
+        self._undo = self._state.checkpoint()
+        row = self._step(self._state, float(open_), float(high), float(low), float(close), float(volume))
+        self._pending = (timestamp, row)
+        values = [row[c] for c in self.history.columns]
+        if revising:
+            self.history.replace_last(timestamp, values)
+        else:
+            self.history.append(timestamp, values)
+            self.bars_seen += 1
+        return row
+
+    def update_from_frame(self, df: pd.DataFrame):
+        """Feed every row of an OHLCV frame at or after the latest seen bar."""
+        last_ts = self.last_timestamp
+        if last_ts is not None:
+            df = df[df.index >= last_ts]
+        for ts, o, h, l, c, v in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume']):
+            if pd.isna(c):
+                continue
+            self.update(ts, o, h, l, c, v)
+        return self.latest
+
+    def frame(self, tail=None) -> pd.DataFrame:
+        """Recent bars plus indicators copied into a DataFrame, like calculate_indicators() output."""
+        return self.history.to_frame(tail)
+
+    @staticmethod
+    def _step(s, o, h, l, c, v):
+        prev_close, prev_high, prev_low = s.prev_close, s.prev_high, s.prev_low
+
+        # --- MOVING AVERAGES ---
+        fast = s.fast.mean_with(c)
+        slow = s.slow.mean_with(c)
+        trend = s.trend.mean_with(c)
+
+        # --- RSI (simple rolling means of gains/losses) ---
+        delta = c - prev_close if prev_close is not None else None
+        gain = delta if delta is not None and delta > 0 else 0.0
+        loss = -delta if delta is not None and delta < 0 else 0.0
+        avg_gain = s.gain.mean_with(gain)
+        avg_loss = s.loss.mean_with(loss)
+        rsi = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+        # --- VWAP (cumulative; NaN volume is skipped like cumsum does) ---
+        tp = (h + l + c) / 3
+        if math.isnan(v):
+            vwap = float('nan')
+        else:
+            s.pv_sum += tp * v
+            s.vol_sum += v
+            vwap = s.pv_sum / (s.vol_sum + 1e-10)
+
+        # --- BOLLINGER BANDS (sample std, NaN for a single bar) ---
+        bb_mid = s.bb.mean_with(c)
+        std = s.bb.std_with(c)
+        bb_upper = bb_mid + 2 * std
+        bb_lower = bb_mid - 2 * std
+
+        # --- MACD ---
+        s.ema12.push(c)
+        s.ema26.push(c)
+        macd = s.ema12.value - s.ema26.value
+        s.signal.push(macd)
+        macd_hist = macd - s.signal.value
+
+        # --- ATR & ADX (Wilder smoothing) ---
+        if prev_close is None:
+            tr = abs(h - l)
+            plus_dm = minus_dm = 0.0
+        else:
+            tr = max(abs(h - l), abs(h - prev_close), abs(l - prev_close))
+            up_move = h - prev_high
+            down_move = prev_low - l
+            plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+            minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        s.atr.push(tr)
+        s.plus_dm.push(plus_dm)
+        s.minus_dm.push(minus_dm)
+        atr = s.atr.value
+        plus_di = 100 * (s.plus_dm.value / (atr + 1e-10))
+        minus_di = 100 * (s.minus_dm.value / (atr + 1e-10))
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
+        s.adx.push(dx)
+
+        # --- COMMIT WINDOWS FOR THE NEXT BAR ---
+        s.fast.push(c)
+        s.slow.push(c)
+        s.trend.push(c)
+        s.gain.push(gain)
+        s.loss.push(loss)
+        s.bb.push(c)
+        s.prev_close, s.prev_high, s.prev_low = c, h, l
+
+        row = {'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v,
+               'Fast_MA': fast, 'Slow_MA': slow, 'Trend_MA': trend, 'RSI': rsi,
+               'TP': tp, 'VWAP': vwap, 'BB_Middle': bb_mid, 'BB_Upper': bb_upper,
+               'BB_Lower': bb_lower, 'MACD': macd, 'Signal_Line': s.signal.value,
+               'MACD_hist': macd_hist, 'TR': tr, 'ATR': atr, 'plus_dm': plus_dm,
+               'minus_dm': minus_dm, 'plus_di': plus_di, 'minus_di': minus_di,
+               'ADX': s.adx.value}
+        return {k: _clean(val) for k, val in row.items()}
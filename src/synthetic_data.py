@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+SERIES_KINDS = ('trending', 'ranging', 'gappy')
+
+
+def generate_ohlcv(n_bars, kind='trending', interval='1min', seed=0, start='2026-01-05', price=100.0) -> pd.DataFrame:
+    """
+    Seeded synthetic OHLCV bars shaped like fetch_market_data() output.
+
+    trending: geometric random walk with drift, so ADX/MA regimes engage.
+    ranging:  mean-reverting (Ornstein-Uhlenbeck) walk around `price`.
+    gappy:    trending walk with random sessions of missing bars and an
+              opening jump after each gap (weekend/halt-style).
+    The same (n_bars, kind, seed) always returns the same frame.
+    """
+    if kind not in SERIES_KINDS:
+        raise ValueError(f"kind must be one of {SERIES_KINDS}")
+    rng = np.random.default_rng(seed)
+    total = n_bars
+
+    if kind == 'gappy':
+        # Draw extra bars, then punch out runs of them so exactly n_bars remain
+        total = int(n_bars * 1.25) + 1
+
+    shocks = rng.standard_normal(total) * 0.0015
+    if kind == 'ranging':
+        log_price = np.empty(total)
+        level, theta = np.log(price), 0.02
+        x = level
+        for i in range(total):
+            x += theta * (level - x) + shocks[i]
+            log_price[i] = x
+    else:
+        # Slow regime swings so the trend flips now and then
+        drift = 0.00004 * np.sign(np.sin(np.arange(total) / max(total / 6, 50) + rng.uniform(0, 2 * np.pi)) + 0.3)
+        log_price = np.log(price) + np.cumsum(drift + shocks)
+
+    keep = np.ones(total, dtype=bool)
+    if kind == 'gappy':
+        drop = total - n_bars
+        while drop > 0:
+            run = min(drop, int(rng.integers(5, 120)))
+            at = int(rng.integers(1, total - run))
+            newly = keep[at:at + run].sum()
+            keep[at:at + run] = False
+            drop -= newly
+        # Jump the price across each gap
+        opens_after_gap = np.flatnonzero(keep[1:] & ~keep[:-1]) + 1
+        jumps = np.zeros(total)
+        jumps[opens_after_gap] = rng.standard_normal(len(opens_after_gap)) * 0.01
+        log_price = log_price + np.cumsum(jumps)
+        surplus = keep.sum() - n_bars
+        if surplus > 0:
+            keep[np.flatnonzero(keep)[-surplus:]] = False
+
+    close = np.exp(log_price)
+    open_ = np.empty(total)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.standard_normal((2, total))) * close * 0.0008
+    high = np.maximum(open_, close) + spread[0]
+    low = np.minimum(open_, close) - spread[1]
+    volume = rng.gamma(2.0, 50.0, total)
+
+    index = pd.date_range(start, periods=total, freq=interval, tz='UTC')
+    df = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+    return df[keep]
+
+
+def yahoo_chart_payload(df: pd.DataFrame) -> dict:
+    """Wraps a frame in Yahoo's v8 chart JSON layout (canned input for the parser)."""
+    return {'chart': {'error': None, 'result': [{
+        'meta': {'dataGranularity': '1m'},
+        'timestamp': pd.DatetimeIndex(df.index).as_unit('s').asi8.tolist(),
+        'indicators': {'quote': [{
+            'open': df['Open'].tolist(), 'high': df['High'].tolist(), 'low': df['Low'].tolist(),
+            'close': df['Close'].tolist(), 'volume': df['Volume'].tolist()
+        }]}
+    }]}}
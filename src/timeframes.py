@@ -0,0 +1,105 @@
+import threading
+import pandas as pd
+from src.indicator_calculator import calculate_indicators
+from src.trade_executor import resolve_params
+
+BASE_INTERVAL = "1m"
+DERIVED_INTERVALS = ("5m", "15m", "1h")
+CONFIRM_INTERVALS = ("15m", "1h") # Higher timeframes the Fusion Engine can read
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def pandas_rule(interval: str) -> str:
+    """'5m' -> '5min', '1h' -> '1h' (pandas offset aliases)."""
+    return interval.replace('m', 'min') if interval.endswith('m') else interval
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Rolls base bars up into `interval` bars, labelled by bucket start like the upstream feeds."""
+    if df.empty:
+        return df
+    bars = df[list(OHLCV_AGG)].resample(pandas_rule(interval), label='left', closed='left').agg(OHLCV_AGG)
+    return bars.dropna(subset=['Close'])
+
+
+def trend_context(row, params=None) -> dict:
+    """Trend direction and regime of one indicator row, judged like the Fusion Engine does."""
+    p = resolve_params(params)
+    close = row['Close']
+    if close > row['Slow_MA'] and close > row['Trend_MA']:
+        trend = "UP"
+    elif close < row['Slow_MA'] and close < row['Trend_MA']:
+        trend = "DOWN"
+    else:
+        trend = "FLAT"
+    adx = float(row['ADX'])
+    regime = "TRENDING" if adx > p['adx_trending'] else "RANGING" if adx < p['adx_ranging'] else "STABILIZING"
+    return {'trend': trend, 'regime': regime, 'adx': round(adx, 2)}
+
+
+class TimeframeSeries:
+    """
+    One symbol's 1m base bars plus the 5m/15m/1h bars derived from them.
+
+    update() takes base bars (a full window or just the newest ones), merges
+    them and re-aggregates only the derived buckets they touch, so one base
+    fetch feeds every timeframe. Higher-timeframe indicators are computed in
+    one vectorized pass per timeframe, on closed bars only, and cached until
+    another bar of that timeframe closes.
+    """
+
+    def __init__(self, intervals=DERIVED_INTERVALS, lookback=pd.Timedelta(days=7)):
+        self.intervals = tuple(intervals)
+        self.lookback = lookback
+        self.base = pd.DataFrame(columns=list(OHLCV_AGG), dtype=float)
+        self.frames = {i: self.base for i in self.intervals}
+        self._context = {}  # interval -> (closed bar count, last closed ts, context dict)
+        self._lock = threading.Lock()
+
+    def update(self, df: pd.DataFrame):
+        """Merges base bars; bars before the last held one are already known and skipped."""
+        if df is None or df.empty:
+            return self
+        with self._lock:
+            if not self.base.empty:
+                df = df.iloc[df.index.searchsorted(self.base.index[-1]):]
+                if df.empty:
+                    return self
+            first = df.index[0]
+            held = self.base.iloc[:self.base.index.searchsorted(first)]
+            base = pd.concat([held, df[list(OHLCV_AGG)]]) if not held.empty else df[list(OHLCV_AGG)]
+            cutoff = base.index[-1] - self.lookback
+            self.base = base.iloc[base.index.searchsorted(cutoff):]
+
+            for interval in self.intervals:
+                # Only the buckets from the one holding the first new bar onwards can change
+                rule = pandas_rule(interval)
+                start = first.floor(rule)
+                tail = resample_ohlcv(self.base.iloc[self.base.index.searchsorted(start):], interval)
+                old = self.frames[interval]
+                old = old.iloc[:old.index.searchsorted(start)]
+                merged = pd.concat([old, tail]) if not old.empty else tail
+                self.frames[interval] = merged.iloc[merged.index.searchsorted(cutoff.floor(rule)):]
+        return self
+
+    def frame(self, interval: str) -> pd.DataFrame:
+        return self.base if interval == BASE_INTERVAL else self.frames[interval]
+
+    def context(self, intervals=CONFIRM_INTERVALS, params=None) -> dict:
+        """{interval: {'trend', 'regime', 'adx'}} from each timeframe's last closed bar."""
+        out = {}
+        for interval in intervals:
+            with self._lock:
+                bars = self.frames.get(interval)
+            if bars is None or len(bars) < 2:
+                continue
+            closed = bars.iloc[:-1]  # The newest bucket is still forming
+            cached = self._context.get(interval)
+            if cached and cached[0] == len(closed) and cached[1] == closed.index[-1]:
+                out[interval] = cached[2]
+                continue
+            ind = calculate_indicators(closed.copy())
+            ctx = trend_context(ind.iloc[-1], params)
+            self._context[interval] = (len(closed), closed.index[-1], ctx)
+            out[interval] = ctx
+        return out
@@ -1,5 +1,6 @@
 document.addEventListener('DOMContentLoaded', () => {
-    const socket = io();
+    const socket = io(window.SOCKET_TRANSPORTS ? { transports: window.SOCKET_TRANSPORTS } : {});
+    let currentSymbol = window.INITIAL_SYMBOL || 'BTC/USD';
     const buySound = new Audio('/static/sounds/sniper_target.mp3');
     const sellSound = new Audio('/static/sounds/sell_alert.mp3'); 
     let lastSignal = "HOLD";
@@ -55,6 +56,7 @@ document.addEventListener('DOMContentLoaded', () => {
         });
         emaSeries = chart.addLineSeries({ color: '#2962FF', lineWidth: 2, title: '9 EMA' });
         candleSeries = chart.addCandlestickSeries({ upColor: '#50fa7b', downColor: '#ff5555', borderVisible: false });
+        chart.timeScale().subscribeVisibleLogicalRangeChange(range => maybeLoadOlder(range));
         
         const tooltip = document.createElement('div');
         tooltip.style = `position: absolute; display: none; padding: 12px; z-index: 1000; top: 15px; left: 15px; border-radius: 6px; background: rgba(26, 26, 46, 0.9); color: #f8f8f2; font-family: monospace; font-size: 13px; border: 1px solid #6272a4; pointer-events: none;`;
@@ -154,35 +156,91 @@ document.addEventListener('DOMContentLoaded', () => {
                 Object.values(els.metrics).forEach(el => el.innerText = "--");
                 // Keep Hyphen formatting for URL consistency
                 window.history.pushState({ symbol }, '', `/${symbol.replace('/', '-')}`);
-                fetch('/change_symbol', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ symbol })
-                });
+                // Only this client switches; the server moves it to the new symbol's room
+                currentSymbol = symbol;
+                socket.emit('subscribe', { symbol });
             }
         };
     }
 
     // --- 4. SOCKET UPDATES ---
+    // (Re)join our symbol's room on every connect, including automatic reconnects
+    socket.on('connect', () => socket.emit('subscribe', { symbol: currentSymbol }));
+
+    // History arrives as one packed Float64 block: all times, then opens, highs, lows, closes
+    function decodeCandles(data) {
+        const n = data.count;
+        const block = new Float64Array(data.candles);
+        const candles = new Array(n);
+        for (let i = 0; i < n; i++) {
+            candles[i] = { time: block[i], open: block[n + i], high: block[2 * n + i], low: block[3 * n + i], close: block[4 * n + i] };
+        }
+        return candles;
+    }
+
+    // Chart state: candles + the server's 9 EMA overlay; older pages are prepended on scroll-back.
+    // A true EMA (older builds drew a 9-bar SMA under the same "9 EMA" title).
+    const EMA_ALPHA = 2 / (9 + 1);
+    let history = { candles: [], ema: [], bucket: '5m', hasMore: false, loading: false };
+    let emaPrev = null, emaLast = null, lastTime = null; // EMA of the previous / forming candle
+
+    function decodeLine(buffer, candles) {
+        const values = new Float64Array(buffer);
+        return candles.map((c, i) => Number.isNaN(values[i]) ? { time: c.time } : { time: c.time, value: values[i] });
+    }
+
+    function renderHistory() {
+        candleSeries.setData(history.candles);
+        emaSeries.setData(history.ema);
+        const n = history.ema.length;
+        lastTime = n ? history.candles[n - 1].time : null;
+        emaLast = n ? history.ema[n - 1].value ?? null : null;
+        emaPrev = n > 1 ? history.ema[n - 2].value ?? null : null;
+    }
+
     socket.on('chart_history', (data) => {
-        candleSeries.setData(data.candles);
-        const emaData = data.candles.map((c, i, a) => {
-            if (i < 9) return { time: c.time };
-            const avg = a.slice(i-8, i+1).reduce((s, x) => s + x.close, 0) / 9;
-            return { time: c.time, value: avg };
-        });
-        emaSeries.setData(emaData);
+        const candles = decodeCandles(data);
+        const ema = data.overlays && data.overlays.ema9 ? decodeLine(data.overlays.ema9, candles) : candles.map(c => ({ time: c.time }));
+        history = { candles, ema, bucket: data.bucket || '5m', hasMore: candles.length > 0, loading: false };
+        renderHistory();
         chart.timeScale().fitContent();
     });
 
+    // Lazy scroll-back: near the left edge, ask for the page before the oldest candle we hold
+    function maybeLoadOlder(range) {
+        if (!range || range.from > 10 || !history.hasMore || history.loading || !history.candles.length) return;
+        history.loading = true;
+        socket.emit('history_range', { symbol: currentSymbol, end: history.candles[0].time, bucket: history.bucket, points: 500 });
+    }
+
+    socket.on('chart_history_page', (data) => {
+        if (data.symbol !== currentSymbol) return;
+        const oldest = history.candles.length ? history.candles[0].time : Infinity;
+        const candles = decodeCandles(data).filter(c => c.time < oldest);
+        const ema = data.overlays && data.overlays.ema9 ? decodeLine(data.overlays.ema9, decodeCandles(data)).filter(p => p.time < oldest) : candles.map(c => ({ time: c.time }));
+        history.candles = candles.concat(history.candles);
+        history.ema = ema.concat(history.ema);
+        history.hasMore = data.has_more && candles.length > 0;
+        history.loading = false;
+        const visible = chart.timeScale().getVisibleLogicalRange();
+        renderHistory();
+        if (visible) chart.timeScale().setVisibleLogicalRange({ from: visible.from + candles.length, to: visible.to + candles.length });
+    });
+
+    // Live candle: O(1) EMA step from the previous candle's value instead of re-averaging the series
     socket.on('chart_update', (candle) => {
         candleSeries.update(candle);
-        const data = candleSeries.data() || []; // Added fallback to empty array
-        if (data.length >= 9) {
-            const recentCloseSum = data.slice(-9).reduce((s, c) => s + (c.close || 0), 0);
-            const avg = recentCloseSum / 9;
-            emaSeries.update({ time: candle.time, value: avg });
+        if (lastTime !== null && candle.time > lastTime) {
+            emaPrev = emaLast;
+            history.candles.push(candle);
+            history.ema.push({ time: candle.time });
+        } else if (history.candles.length) {
+            history.candles[history.candles.length - 1] = candle;
         }
+        lastTime = candle.time;
+        emaLast = emaPrev === null ? candle.close : emaPrev + EMA_ALPHA * (candle.close - emaPrev);
+        history.ema[history.ema.length - 1] = { time: candle.time, value: emaLast };
+        emaSeries.update({ time: candle.time, value: emaLast });
     });
 
     socket.on('analysis_update', (data) => {
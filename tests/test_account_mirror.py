@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+from src.account_mirror import AccountMirror, _key
+
+
+class FakeApi:
+    """Stand-in for the REST client: whatever account / positions the test sets."""
+
+    def __init__(self, cash=10000.0, positions=()):
+        self.account = SimpleNamespace(cash=cash, non_marginable_buying_power=cash, equity=cash, last_equity=cash)
+        self.positions = list(positions)
+
+    def get_account(self):
+        return self.account
+
+    def list_positions(self):
+        return self.positions
+
+
+def broker_position(symbol, qty, avg, price):
+    return SimpleNamespace(symbol=symbol, qty=str(qty), avg_entry_price=str(avg), current_price=str(price))
+
+
+def test_key_matches_order_and_position_symbols():
+    assert _key('BTC/USD') == _key('BTCUSD') == _key('btc/usd') == 'BTCUSD'
+    assert _key('AAPL') == 'AAPL'
+
+
+def test_partial_close_keeps_the_average_entry():
+    mirror = AccountMirror(FakeApi()).refresh()
+    mirror.apply_fill('BTC/USD', 'buy', 1.0, 100.0)
+    mirror.apply_fill('BTC/USD', 'buy', 1.0, 110.0)
+    mirror.apply_fill('BTC/USD', 'sell', 0.5, 120.0)
+    position = mirror.position('BTCUSD')
+    assert position['qty'] == 1.5 and position['avg_entry_price'] == 105.0
+    assert mirror.cash == 10000.0 - 100.0 - 110.0 + 60.0
+
+
+def test_flip_resets_the_average_to_the_fill_price():
+    mirror = AccountMirror(FakeApi()).refresh()
+    mirror.apply_fill('BTC/USD', 'buy', 2.0, 100.0)
+    mirror.apply_fill('BTC/USD', 'sell', 3.0, 120.0)
+    position = mirror.position('BTC/USD')
+    assert position['qty'] == -1.0 and position['avg_entry_price'] == 120.0
+
+    mirror.apply_fill('BTC/USD', 'buy', 1.0, 90.0)
+    assert mirror.position('BTC/USD') is None
+
+
+def test_refresh_takes_the_broker_mark_over_the_local_one():
+    api = FakeApi(positions=[broker_position('BTCUSD', 1, 100, 150)])
+    mirror = AccountMirror(api).refresh()
+    mirror.mark('BTC/USD', 140.0)
+    assert mirror.position('BTC/USD')['price'] == 140.0
+
+    api.positions = [broker_position('BTCUSD', 1, 100, 155)]
+    mirror.refresh()
+    assert mirror.position('BTC/USD')['price'] == 155.0
+
+    # No broker mark: the last local one fills in
+    mirror.mark('BTC/USD', 160.0)
+    api.positions = [broker_position('BTCUSD', 1, 100, 0)]
+    mirror.refresh()
+    assert mirror.position('BTC/USD')['price'] == 160.0
+
+
+def test_trade_update_stream_applies_fills():
+    mirror = AccountMirror(FakeApi()).refresh()
+    event = SimpleNamespace(event='fill', price='100', qty='0.5', position_qty='0.5',
+                            order={'symbol': 'BTC/USD', 'side': 'buy', 'filled_qty': '0.5'})
+    asyncio.run(mirror.on_trade_update(event))
+    asyncio.run(mirror.on_trade_update(SimpleNamespace(event='new', order={})))
+    assert mirror.position('BTCUSD')['qty'] == 0.5
+    assert mirror.equity == 10000.0
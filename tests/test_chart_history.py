@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.chart_history import ChartHistory, bucket_minutes
+
+
+def minute_bars(since, until):
+    index = pd.date_range(pd.Timestamp(since, unit='s', tz='UTC'), pd.Timestamp(until, unit='s', tz='UTC'),
+                          freq='1min', inclusive='left')
+    close = np.linspace(100, 110, len(index))
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.ones(len(index))}, index=index)
+
+
+@pytest.mark.parametrize('spec, minutes', [('15m', 15), ('1h', 60), (' 1D ', 1440), (5, 5)])
+def test_bucket_minutes(spec, minutes):
+    assert bucket_minutes(spec) == minutes
+
+
+@pytest.mark.parametrize('spec', ['0m', '-5m', 0, -1, 'abc', 'm', '', '5x', '1.5h', '2d', None])
+def test_bucket_minutes_rejects_bad_input(spec):
+    with pytest.raises(ValueError):
+        bucket_minutes(spec)
+
+
+def test_window_rejects_bad_bucket_before_reading():
+    reads = []
+    history = ChartHistory(lambda *args: reads.append(args) or minute_bars(*args[1:]))
+    with pytest.raises(ValueError):
+        history.window('BTC/USD', start=1_700_000_000, end=1_700_086_400, bucket='0m')
+    assert not reads
+
+
+def test_window_downsamples_to_bucket():
+    history = ChartHistory(lambda symbol, since, until: minute_bars(since, until))
+    win = history.window('BTC/USD', start=1_700_006_400, end=1_700_092_800, bucket='1h')
+    assert win['bucket'] == '60m' and len(win['candles']) == 24
@@ -0,0 +1,68 @@
+import threading
+import time
+import pytest
+import src.fetch_cache as fetch_cache
+from src.fetch_cache import SingleFlightCache, FETCH_CACHE, next_bar_boundary
+
+CALLERS = 16
+
+
+def test_concurrent_misses_share_one_load():
+    cache = SingleFlightCache()
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(threading.current_thread().name)
+        release.wait(5)  # Hold the flight open until every other caller has joined it
+        return {'bars': 42}
+
+    coalesced_before = FETCH_CACHE.value(result='coalesced')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('BTC/USD|1m', loader, time.time() + 60)))
+               for _ in range(CALLERS)]
+    for t in threads:
+        t.start()
+    deadline = time.time() + 5
+    while cache.coalesced < CALLERS - 1 and time.time() < deadline:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{'bars': 42}] * CALLERS
+    assert cache.stats()['misses'] == 1 and cache.coalesced == CALLERS - 1
+    assert FETCH_CACHE.value(result='coalesced') - coalesced_before == CALLERS - 1
+    assert cache.stats()['in_flight'] == 0
+
+
+def test_entry_expires_at_the_bar_boundary(monkeypatch):
+    now = [1_700_000_030.0]  # 30s into a 1m bar
+    monkeypatch.setattr(fetch_cache.time, 'time', lambda: now[0])
+    cache = SingleFlightCache()
+    calls = []
+
+    def loader():
+        calls.append(now[0])
+        return len(calls)
+
+    expires = next_bar_boundary(60, now[0])
+    assert expires == 1_700_000_040
+    assert cache.get('k', loader, expires) == 1
+    now[0] = expires - 0.001
+    assert cache.get('k', loader, expires) == 1 and len(calls) == 1
+    now[0] = expires
+    assert cache.get('k', loader, next_bar_boundary(60, now[0])) == 2 and len(calls) == 2
+
+
+def test_errors_are_not_cached():
+    cache = SingleFlightCache()
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            cache.get('k', failing, time.time() + 60)
+    assert cache.stats()['misses'] == 2 and cache.stats()['entries'] == 0
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from src.history_archive import HistoryArchive, BulkLoader
+
+
+def hourly_pages(page_size=100):
+    """Page source serving one hourly bar per hour of any requested range."""
+    calls = []
+
+    def pages(symbol, interval, start, end, page_token=None):
+        calls.append((pd.Timestamp(start), pd.Timestamp(end), page_token))
+        stamps = pd.date_range(pd.Timestamp(start).ceil('h'), pd.Timestamp(end), freq='h', inclusive='left')
+        offset = int(page_token or 0)
+        page = stamps[offset:offset + page_size]
+        bars = [{'t': t.isoformat(), 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 10.0} for t in page]
+        more = offset + page_size < len(stamps)
+        return {'bars': {symbol: bars}, 'next_page_token': str(offset + page_size) if more else None}
+
+    pages.calls = calls
+    return pages
+
+
+def test_partial_then_full_load_fetches_rest_of_month(tmp_path):
+    archive = HistoryArchive(tmp_path)
+    pages = hourly_pages()
+    loader = BulkLoader(archive, pages, max_workers=1)
+
+    loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-01-15')
+    meta = archive.manifest('BTC/USD', '1h')['chunks']['2024-01']
+    assert not meta['complete']
+
+    pages.calls.clear()
+    loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-02-01')
+    df = archive.read('BTC/USD', '1h')
+    assert len(df) == 31 * 24
+    assert df.index[-1] == pd.Timestamp('2024-01-31 23:00', tz='UTC')
+    assert not df.index.duplicated().any()
+    # Resumed from the high-water mark instead of re-reading the first half
+    assert pages.calls[0][0] >= pd.Timestamp('2024-01-14 23:00', tz='UTC')
+    assert archive.manifest('BTC/USD', '1h')['chunks']['2024-01']['complete']
+
+    pages.calls.clear()
+    summary = loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-02-01')
+    assert summary['BTC/USD']['skipped'] == 1 and not pages.calls
+
+
+def test_mid_month_start_is_not_complete(tmp_path):
+    archive = HistoryArchive(tmp_path)
+    loader = BulkLoader(archive, hourly_pages(), max_workers=1)
+    loader.load(['BTC/USD'], '1h', '2024-01-10', '2024-02-01')
+    assert not archive.manifest('BTC/USD', '1h')['chunks']['2024-01']['complete']
+
+    loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-02-01')
+    df = archive.read('BTC/USD', '1h')
+    assert len(df) == 31 * 24
+    assert np.all(np.diff(df.index.asi8) > 0)
+
+
+def test_earlier_overlapping_load_extends_recorded_span(tmp_path):
+    archive = HistoryArchive(tmp_path)
+    pages = hourly_pages()
+    loader = BulkLoader(archive, pages, max_workers=1)
+    loader.load(['BTC/USD'], '1h', '2024-01-10', '2024-02-01')
+
+    # Starts before the stored span and overlaps it: the old tail must stay recorded
+    loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-01-15')
+    meta = archive.manifest('BTC/USD', '1h')['chunks']['2024-01']
+    assert meta['from'] == int(pd.Timestamp('2024-01-01', tz='UTC').timestamp())
+    assert meta['until'] == int(pd.Timestamp('2024-02-01', tz='UTC').timestamp())
+    assert meta['complete']
+
+    pages.calls.clear()
+    summary = loader.load(['BTC/USD'], '1h', '2024-01-01', '2024-02-01')
+    assert summary['BTC/USD']['skipped'] == 1 and not pages.calls
+    assert len(archive.read('BTC/USD', '1h')) == 31 * 24
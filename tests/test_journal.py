@@ -0,0 +1,31 @@
+from src.journal import Journal
+
+
+def test_seeded_crypto_position_closes_on_order_symbol_fill(tmp_path):
+    journal = Journal(tmp_path / "journal.db")
+    # AccountMirror.positions: broker reports the crypto position as 'BTCUSD'
+    journal.seed_positions({'BTCUSD': {'symbol': 'BTCUSD', 'qty': 0.5, 'avg_entry_price': 40000.0}})
+    journal.record_fill('BTC/USD', 'sell', 0.5, 42000.0, ts=1_700_000_000)
+    journal.flush()
+
+    trades = journal.trades()
+    assert len(trades) == 1
+    assert trades[0]['side'] == 'LONG' and trades[0]['symbol'] == 'BTC/USD'
+    assert trades[0]['pnl'] == 1000.0
+    assert journal._round_trips.books['BTCUSD'][0] == 0.0
+
+
+def test_two_journals_write_to_their_own_files(tmp_path):
+    first = Journal(tmp_path / "first.db")
+    second = Journal(tmp_path / "second.db")  # Must not re-point the first journal's writer
+    first.record_fill('AAPL', 'buy', 1, 100.0, ts=1_700_000_000)
+    first.record_fill('AAPL', 'sell', 1, 110.0, ts=1_700_000_060)
+    second.record_fill('MSFT', 'sell', 2, 300.0, ts=1_700_000_000)
+    second.record_fill('MSFT', 'buy', 2, 290.0, ts=1_700_000_060)
+    first.flush()
+    second.flush()
+
+    assert [t['symbol'] for t in first.trades()] == ['AAPL']
+    assert [t['symbol'] for t in second.trades()] == ['MSFT']
+    assert first.performance()['net_pnl'] == 10.0
+    assert second.performance()['net_pnl'] == 20.0
@@ -0,0 +1,53 @@
+import json
+import pandas as pd
+from src.market_stream import MarketStream, RecordedFeed
+
+T0 = pd.Timestamp('2026-01-05T14:30:00Z')
+
+
+def trade(seconds, price, size=1.0, symbol='BTC/USD'):
+    ts = (T0 + pd.Timedelta(seconds=seconds)).isoformat().replace('+00:00', 'Z')
+    return {'T': 't', 'S': symbol, 'p': price, 's': size, 't': ts}
+
+
+def replay(tmp_path, messages, intervals=('1m', '5m')):
+    path = tmp_path / "trades.jsonl"
+    path.write_text("\n".join(json.dumps(m) for m in messages) + "\n")
+    events = []
+    stream = MarketStream(RecordedFeed(path), intervals=intervals,
+                          on_bar=lambda symbol, interval, bar, closed: events.append((symbol, interval, bar, closed)))
+    stream.feed.run(stream.handle_trade)
+    return stream, events
+
+
+def closed_bars(events, interval):
+    return [bar for _, i, bar, closed in events if i == interval and closed]
+
+
+def test_rollover_late_trade_and_multi_interval(tmp_path):
+    stream, events = replay(tmp_path, [
+        trade(1, 100.0), trade(20, 102.0, 2.0), {'T': 'q', 'S': 'BTC/USD'}, trade(50, 99.0),
+        trade(61, 101.0),                # Opens minute 1: closes minute 0
+        trade(30, 500.0, 9.0),           # Late for the closed minute 0: dropped for 1m
+        trade(299, 103.0),               # Minute 4
+        trade(301, 104.0),               # Minute 5: closes minute 4 and the first 5m bar
+    ])
+    assert stream.trades == 7  # The quote line is skipped
+
+    one_minute = closed_bars(events, '1m')
+    assert [b['time'] for b in one_minute] == [T0, T0 + pd.Timedelta(minutes=1), T0 + pd.Timedelta(minutes=4)]
+    first = one_minute[0]
+    assert (first['Open'], first['High'], first['Low'], first['Close'], first['Volume']) == (100.0, 102.0, 99.0, 99.0, 4.0)
+    assert one_minute[1]['Close'] == 101.0 and one_minute[1]['Volume'] == 1.0  # The late trade never landed
+
+    five_minute = closed_bars(events, '5m')
+    assert len(five_minute) == 1 and five_minute[0]['time'] == T0
+    bar = five_minute[0]
+    # The late trade still fell inside the open 5m bucket, so it counts there
+    assert (bar['Open'], bar['High'], bar['Low'], bar['Close'], bar['Volume']) == (100.0, 500.0, 99.0, 103.0, 15.0)
+
+
+def test_last_bar_stays_open_until_the_next_trade(tmp_path):
+    _, events = replay(tmp_path, [trade(1, 100.0), trade(40, 101.0)], intervals=('1m',))
+    assert not closed_bars(events, '1m')
+    assert events[-1][2]['Close'] == 101.0 and events[-1][3] is False
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.notifier import Notifier, RetryAfter, TelegramChannel, NOTIFICATIONS
+
+BUY = {'signal': 'BUY', 'entry_price': 100.0, 'sl_price': 98.0, 'tp_price': 103.0,
+       'regime': 'TRENDING', 'confluence': 83}
+
+
+class FakeChannel:
+    """Records every send; `failures` are raised, in order, before sends start succeeding."""
+    name = 'fake'
+    max_chars = 4096
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []   # (monotonic time, text)
+        self.attempts = []
+
+    def send(self, text):
+        self.attempts.append(time.monotonic())
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((time.monotonic(), text))
+
+
+def notifier(channel, **kwargs):
+    options = dict(batch_window=0.0, rate=1000, burst=1000, retries=3, backoff=0.01)
+    options.update(kwargs)
+    return Notifier([channel], **options)
+
+
+def test_retry_after_backs_off_for_the_requested_time():
+    channel = FakeChannel(failures=[RetryAfter(0.2)])
+    retried = NOTIFICATIONS.value(channel='fake', result='retried')
+    n = notifier(channel)
+    assert n.notify("fill")
+    n.flush(5)
+    assert [text for _, text in channel.sent] == ["fill"]
+    assert channel.attempts[1] - channel.attempts[0] >= 0.2
+    assert NOTIFICATIONS.value(channel='fake', result='retried') - retried == 1
+    assert n.stats()['fake'] == {'queued': 0, 'sent': 1, 'failed': 0, 'dropped': 0}
+
+
+def test_gives_up_after_the_retries():
+    channel = FakeChannel(failures=[ConnectionError("down")] * 4)
+    n = notifier(channel, retries=2)
+    n.notify("fill")
+    n.flush(5)
+    assert not channel.sent and n.stats()['fake']['failed'] == 1
+
+
+def test_repeated_signal_is_sent_once_per_bar():
+    channel = FakeChannel()
+    n = notifier(channel)
+    results = [n.signal('BTC/USD', BUY, bar_ts=1000) for _ in range(5)]
+    assert results == [True, False, False, False, False]
+    assert n.signal('BTC/USD', BUY, bar_ts=1300)  # Next bar
+    assert not n.signal('BTC/USD', dict(BUY, signal='HOLD'), bar_ts=1600)
+    n.flush(5)
+    assert len(channel.sent) == 2
+
+
+def test_burst_is_batched_and_held_to_the_token_bucket():
+    channel = FakeChannel()
+    n = notifier(channel, batch_window=0.1, max_batch=5, rate=10, burst=1)
+    for i in range(12):
+        n.notify(f"signal {i}")
+    n.flush(10)
+    assert [text.count('\n\n') + 1 for _, text in channel.sent] == [5, 5, 2]
+    gaps = [b - a for (a, _), (b, _) in zip(channel.sent, channel.sent[1:])]
+    assert all(gap >= 0.09 for gap in gaps)  # 10/s with a burst of one
+
+
+def test_telegram_channel_against_a_local_stand_in():
+    requests_seen = []
+    plan = [429]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            requests_seen.append((self.path, body))
+            status = plan.pop(0) if plan else 200
+            payload = {'ok': False, 'parameters': {'retry_after': 3}} if status == 429 else {'ok': True}
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        channel = TelegramChannel('TOKEN', '42', base_url=f"http://127.0.0.1:{server.server_port}")
+        with pytest.raises(RetryAfter) as limited:
+            channel.send("hello")
+        assert limited.value.seconds == 3
+        channel.send("hello")
+    finally:
+        server.shutdown()
+    assert requests_seen[-1] == ('/botTOKEN/sendMessage',
+                                 {'chat_id': '42', 'text': 'hello', 'disable_web_page_preview': True})
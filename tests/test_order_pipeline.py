@@ -0,0 +1,115 @@
+import itertools
+from types import SimpleNamespace
+from src.order_pipeline import OrderPipeline, ACCEPTED, FAILED, FILLED, CANCELED, LIVE
+
+SL = dict(side='sell', type='stop_limit', stop_price=90.0, limit_price=89.5, time_in_force='gtc')
+TP = dict(side='sell', type='limit', limit_price=110.0, time_in_force='gtc')
+
+
+class FakeBroker:
+    """Crypto-like broker: market orders fill at once, open sells reserve the position qty."""
+
+    def __init__(self):
+        self.orders = {}
+        self.position = 0.0
+        self.submits = []
+        self.ids = itertools.count(1)
+        self.fail = {}        # client_order_id -> exception raised before the order exists
+        self.lost_reply = set()  # client_order_ids that reach the broker but whose reply is lost
+        self.reject = set()      # client_order_ids the broker records as rejected
+        self.fill_market = True
+
+    def reserved(self):
+        return sum(o.qty for o in self.orders.values() if o.side == 'sell' and o.status == 'new')
+
+    def submit_order(self, symbol, qty, side, type, client_order_id, **kwargs):
+        self.submits.append(client_order_id)
+        if client_order_id in self.fail:
+            raise self.fail[client_order_id]
+        if client_order_id in self.orders:
+            raise Exception("client_order_id must be unique")
+        if side == 'sell' and qty > self.position - self.reserved() + 1e-12:
+            raise Exception(f"insufficient balance for BTC (requested: {qty}, available: {self.position - self.reserved()})")
+        order = SimpleNamespace(id=str(next(self.ids)), client_order_id=client_order_id, symbol=symbol,
+                                qty=qty, side=side, type=type, status='new', filled_qty=0.0)
+        if client_order_id in self.reject:
+            order.status = 'rejected'
+        elif type == 'market' and self.fill_market:
+            order.status, order.filled_qty = 'filled', qty
+            self.position += qty if side == 'buy' else -qty
+        self.orders[client_order_id] = order
+        if client_order_id in self.lost_reply:
+            raise TimeoutError("read timed out")
+        return order
+
+    def get_order_by_client_order_id(self, client_order_id):
+        if client_order_id not in self.orders:
+            raise Exception("order not found")
+        return self.orders[client_order_id]
+
+    def cancel_order(self, order_id):
+        for order in self.orders.values():
+            if order.id == order_id and order.status == 'new':
+                order.status = 'canceled'
+
+
+def pipeline(api):
+    return OrderPipeline(api, retries=2, backoff=0, fill_timeout=0.2, poll_interval=0.01)
+
+
+def test_resend_after_timeout_finds_the_order_instead_of_duplicating():
+    api = FakeBroker()
+    api.lost_reply.add('g-entry')
+    state = pipeline(api).submit_leg('entry', symbol='BTC/USD', qty=1.0, side='buy', type='market',
+                                     time_in_force='gtc', client_order_id='g-entry')
+    assert state['status'] == FILLED and state['order_id'] == api.orders['g-entry'].id
+    assert api.submits == ['g-entry'] and api.position == 1.0
+
+
+def test_rejected_lookup_does_not_count_as_placed():
+    api = FakeBroker()
+    api.lost_reply.add('g-entry')
+    api.reject.add('g-entry')
+    state = pipeline(api).submit_leg('entry', symbol='BTC/USD', qty=1.0, side='buy', type='market',
+                                     time_in_force='gtc', client_order_id='g-entry')
+    assert state['status'] == FAILED and state['status'] not in LIVE
+    assert 'rejected' in state['error']
+    assert api.submits == ['g-entry']  # The id is spent; no resend
+
+
+def test_qty_reserved_take_profit_is_deferred_and_fires_on_price():
+    api = FakeBroker()
+    orders = pipeline(api)
+    assert orders.place_manual_bracket('g', 'BTC/USD', 0.5, 'buy', {'sl': SL, 'tp': TP})
+    assert api.position == 0.5 and 'g-flatten' not in api.submits
+    assert orders.status('g-sl')['status'] == ACCEPTED and 'g' in orders.deferred
+
+    orders.on_price('BTCUSD', 105.0)
+    assert 'g' in orders.deferred
+    orders.on_price('BTC/USD', 110.5)
+    orders._pool.shutdown(wait=True)
+    assert not orders.deferred
+    assert api.orders['g-sl'].status == 'canceled'
+    assert api.orders['g-tp-hit'].status == 'filled' and api.position == 0.0
+
+
+def test_stop_leg_failure_unwinds_the_entry():
+    api = FakeBroker()
+    api.fail['g-sl'] = Exception("stop price must not be above the market")
+    orders = pipeline(api)
+    assert not orders.place_manual_bracket('g', 'BTC/USD', 0.5, 'buy', {'sl': SL, 'tp': TP})
+    assert api.orders['g-flatten'].side == 'sell' and api.orders['g-flatten'].qty == 0.5
+    assert api.position == 0.0
+    assert 'g-tp' not in api.submits
+
+
+def test_wait_for_fill_cancels_the_rest_on_timeout():
+    api = FakeBroker()
+    api.fill_market = False
+    orders = pipeline(api)
+    orders.submit_leg('entry', symbol='BTC/USD', qty=1.0, side='buy', type='market',
+                      time_in_force='gtc', client_order_id='g-entry')
+    api.orders['g-entry'].filled_qty = 0.4  # Partially filled, then stuck
+    assert orders.wait_for_fill('g-entry', timeout=0.05) == 0.4
+    assert api.orders['g-entry'].status == 'canceled'
+    assert orders.status('g-entry')['status'] == CANCELED
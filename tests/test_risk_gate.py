@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+from src.risk_gate import RiskGate
+
+DAY = 1_700_006_400  # 2023-11-15 00:00 UTC
+
+
+def account(equity, last_equity=0.0):
+    return SimpleNamespace(equity=equity, last_equity=last_equity, positions={})
+
+
+def test_loss_before_first_check_counts_against_daily_limit():
+    # Down 4% since the previous close before the gate has seen a single order
+    gate = RiskGate(account(9600.0, last_equity=10000.0), clock=lambda: DAY + 3600)
+    decision = gate.check('BTC/USD', 'buy', 0.01, 50000.0)
+    assert not decision['approved'] and decision['reason'] == 'daily_loss'
+    assert gate.status()['day_start_equity'] == 10000.0
+
+
+def test_day_start_falls_back_to_first_equity_seen():
+    acct = account(10000.0)
+    now = [DAY + 60]
+    gate = RiskGate(acct, clock=lambda: now[0])
+    assert gate.check('BTC/USD', 'buy', 0.01, 50000.0)['approved']
+
+    acct.equity = 9600.0
+    now[0] += 120
+    assert gate.check('ETH/USD', 'buy', 0.1, 2000.0)['reason'] == 'daily_loss'
+
+    # A new UTC day starts from the equity seen then
+    now[0] = DAY + 86400 + 60
+    assert gate.check('ETH/USD', 'buy', 0.1, 2000.0)['approved']
+    assert gate.status()['day_start_equity'] == 9600.0
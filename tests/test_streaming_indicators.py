@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from src.indicator_calculator import calculate_indicators
+from src.streaming_indicators import StreamingIndicators, INDICATOR_COLUMNS
+
+
+def synthetic_bars(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 50000 + np.cumsum(rng.normal(0, 30, n))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 5, n), 'High': close + np.abs(rng.normal(0, 20, n)),
+        'Low': close - np.abs(rng.normal(0, 20, n)), 'Close': close, 'Volume': np.abs(rng.normal(10, 3, n)),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='5min', tz='UTC'))
+
+
+def assert_matches(engine, df):
+    expected = calculate_indicators(df.copy()).replace([np.inf, -np.inf], np.nan).fillna(0)
+    got = engine.frame()
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(got[col].to_numpy(), expected[col].to_numpy(), rtol=1e-9, atol=1e-6, err_msg=col)
+
+
+def test_matches_calculate_indicators_bar_by_bar():
+    df = synthetic_bars()
+    engine = StreamingIndicators(history=len(df))
+    engine.update_from_frame(df)
+    assert_matches(engine, df)
+    assert engine.first_timestamp == df.index[0]
+
+
+def test_revising_the_forming_bar_matches_the_final_bar():
+    df = synthetic_bars()
+    rng = np.random.default_rng(1)
+    engine = StreamingIndicators(history=len(df))
+    for ts, bar in df.iterrows():
+        # The forming candle is re-sent with interim values before it settles
+        for _ in range(3):
+            jitter = rng.normal(0, 15)
+            engine.update(ts, bar.Open, bar.High + abs(jitter), bar.Low - abs(jitter), bar.Close + jitter, bar.Volume / 2)
+        engine.update(ts, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume)
+    assert len(engine.frame()) == len(df)
+    assert_matches(engine, df)
+
+
+def test_revising_only_the_last_bar():
+    df = synthetic_bars(300)
+    engine = StreamingIndicators(history=len(df))
+    engine.update_from_frame(df)
+    last = df.index[-1]
+    revised = df.copy()
+    revised.loc[last, ['High', 'Close']] = [revised.loc[last, 'High'] + 100, revised.loc[last, 'Close'] + 80]
+    engine.update(last, *revised.loc[last, ['Open', 'High', 'Low', 'Close', 'Volume']])
+    assert_matches(engine, revised)
+    assert engine.update(df.index[-2], 1, 1, 1, 1, 1) is None  # Stale bar ignored